@@ -23,4 +23,10 @@ setup(
     include_package_data=True,
     python_requires=">=3.8",
     install_requires=install_requires,
+    extras_require=dict(
+        # The lazy reader of the NWB files (tye_lab_to_nwb.tools.lazy_reader)
+        lazy=["dask", "xarray"],
+        # The Parquet sidecars of the tables (tye_lab_to_nwb.tools.parquet_sidecars)
+        parquet=["pyarrow"],
+    ),
 )
@@ -1,5 +1,5 @@
 from collections import defaultdict
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 import numpy as np
 from scipy.io import loadmat
@@ -57,6 +57,31 @@ class AStSortingExtractor(BaseSorting):
         for property_name, values in all_unit_properties.items():
             self.set_property(key=property_name, values=values)
 
+    def get_unit_spike_trains(
+        self,
+        start_frame: Optional[int] = None,
+        end_frame: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the spike frames of all units at once, in the order of the unit ids (see
+        `AStSortingSegment.get_unit_spike_trains`).
+
+        Parameters
+        ----------
+        start_frame : int, optional
+            The first frame of the range, the default is the start of the recording.
+        end_frame : int, optional
+            The frame after the range, the default is the end of the recording.
+
+        Returns
+        -------
+        spike_frames : np.ndarray
+            The spike frames of the units, the frames of each unit are contiguous and sorted.
+        unit_offsets : np.ndarray
+            The index of the first spike of each unit in `spike_frames` and the number of spikes as the last value.
+        """
+        return self._sorting_segments[0].get_unit_spike_trains(start_frame=start_frame, end_frame=end_frame)
+
     def _filter_units(self) -> List[int]:
         # remove duplicated units
         # discard units where the value in this array equals to 1
@@ -73,20 +98,70 @@ class AStSortingExtractor(BaseSorting):
 
 class AStSortingSegment(BaseSortingSegment):
     def __init__(self, sampling_frequency: float, spike_times: np.ndarray):
+        """
+        The spike times of the units are converted to frames once, and stored as a single vector where the frames of
+        each unit are contiguous and sorted, with the offsets of the units in the vector.
+
+        Parameters
+        ----------
+        sampling_frequency : float
+            The sampling frequency in Hz.
+        spike_times : np.ndarray
+            The spike times of each unit in seconds (an object array of arrays).
+        """
         BaseSortingSegment.__init__(self)
-        self._spike_times = spike_times
         self._sampling_frequency = sampling_frequency
 
+        spike_times = [np.atleast_1d(np.asarray(unit_spike_times, dtype=float)) for unit_spike_times in spike_times]
+        num_spikes = [len(unit_spike_times) for unit_spike_times in spike_times]
+        self._unit_offsets = np.concatenate([[0], np.cumsum(num_spikes)]).astype(np.int64)
+        spike_frames = (np.concatenate(spike_times) * sampling_frequency).astype(np.int64)
+        # the frames of each unit are sorted for the range queries
+        unit_indices = np.repeat(np.arange(len(num_spikes)), num_spikes)
+        is_sorted = (np.diff(spike_frames) >= 0) | (np.diff(unit_indices) != 0)
+        if not np.all(is_sorted):
+            spike_frames = spike_frames[np.lexsort((spike_frames, unit_indices))]
+        self._spike_frames = spike_frames
+
     def get_unit_spike_train(
         self,
         unit_id: int,
         start_frame: Optional[int] = None,
         end_frame: Optional[int] = None,
     ) -> np.ndarray:
-        times = self._spike_times[unit_id]
-        frames = (times * self._sampling_frequency).astype(int)
-        if start_frame is not None:
-            frames = frames[frames >= start_frame]
-        if end_frame is not None:
-            frames = frames[frames < end_frame]
-        return frames
+        frames = self._spike_frames[self._unit_offsets[unit_id] : self._unit_offsets[unit_id + 1]]
+        start_index = np.searchsorted(frames, start_frame, side="left") if start_frame is not None else 0
+        end_index = np.searchsorted(frames, end_frame, side="left") if end_frame is not None else len(frames)
+        return frames[start_index:end_index]
+
+    def get_unit_spike_trains(
+        self,
+        start_frame: Optional[int] = None,
+        end_frame: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the spike frames of all units at once.
+
+        Returns
+        -------
+        spike_frames : np.ndarray
+            The spike frames of the units, the frames of each unit are contiguous and sorted.
+        unit_offsets : np.ndarray
+            The index of the first spike of each unit in `spike_frames` and the number of spikes as the last value,
+            the spikes of unit i are spike_frames[unit_offsets[i]:unit_offsets[i + 1]].
+        """
+        if start_frame is None and end_frame is None:
+            return self._spike_frames, self._unit_offsets
+        frame_range = [
+            start_frame if start_frame is not None else np.iinfo(np.int64).min,
+            end_frame if end_frame is not None else np.iinfo(np.int64).max,
+        ]
+        # the frames of each unit are sorted, so the range of each unit is found by bisection
+        index_ranges = [
+            unit_offset + np.searchsorted(self._spike_frames[unit_offset:next_unit_offset], frame_range, side="left")
+            for unit_offset, next_unit_offset in zip(self._unit_offsets[:-1], self._unit_offsets[1:])
+        ]
+        spike_frames = [self._spike_frames[start_index:end_index] for start_index, end_index in index_ranges]
+        num_spikes_in_range = [end_index - start_index for start_index, end_index in index_ranges]
+        unit_offsets = np.concatenate([[0], np.cumsum(num_spikes_in_range)]).astype(np.int64)
+        return np.concatenate([self._spike_frames[:0], *spike_frames]), unit_offsets
@@ -1,5 +1,12 @@
+from typing import Literal, Optional
+
+import numpy as np
+from hdmf.common import ElementIdentifiers, VectorData, VectorIndex
 from neuroconv.datainterfaces.ecephys.basesortingextractorinterface import BaseSortingExtractorInterface
-from neuroconv.utils import FilePathType
+from neuroconv.utils import DeepDict, FilePathType
+from pynwb import NWBFile
+from pynwb.misc import Units
+
 from tye_lab_to_nwb.ast_ecephys.ast_sortingextractor import AStSortingExtractor
 
 
@@ -16,3 +23,132 @@ class AstSortingInterface(BaseSortingExtractorInterface):
             Allows verbosity.
         """
         super().__init__(file_path=file_path, verbose=verbose)
+
+    def get_units_table(
+        self,
+        metadata: Optional[DeepDict] = None,
+        stub_test: bool = False,
+        units_name: str = "units",
+        units_description: str = "Autogenerated by neuroconv.",
+    ) -> Units:
+        """
+        Builds the units table from the spike frames of all units at once (see
+        `AStSortingExtractor.get_unit_spike_trains`), with the same columns as
+        `neuroconv.tools.spikeinterface.add_units_table`.
+
+        Parameters
+        ----------
+        metadata : DeepDict, optional
+            The descriptions of the unit properties are in metadata["Ecephys"]["UnitProperties"].
+        stub_test : bool, default: False
+            If True, only the spikes until 1.1 times the latest first spike of the units (at most until the end of the
+            recording) are written.
+        units_name : str, default: 'units'
+            The name of the units table.
+        units_description : str, default: 'Autogenerated by neuroconv.'
+        """
+        sorting_extractor = self.sorting_extractor
+        spike_frames, unit_offsets = sorting_extractor.get_unit_spike_trains()
+        has_spikes = np.diff(unit_offsets) > 0
+        if stub_test and np.any(has_spikes):
+            # the same range as `subset_sorting`, within the frames of the recording (or the spikes)
+            end_frame = int(1.1 * spike_frames[unit_offsets[:-1][has_spikes]].max())
+            if sorting_extractor.has_recording():
+                end_frame = min(end_frame, sorting_extractor._recording.get_num_samples())
+            else:
+                end_frame = min(end_frame, int(spike_frames.max()) + 1)
+            spike_frames, unit_offsets = sorting_extractor.get_unit_spike_trains(start_frame=0, end_frame=end_frame)
+        spike_times = spike_frames / sorting_extractor.get_sampling_frequency()
+
+        property_descriptions = dict(unit_name="Unique reference for each unit.")
+        if metadata is not None:
+            for metadata_column in metadata["Ecephys"].get("UnitProperties", []):
+                property_descriptions.update({metadata_column["name"]: metadata_column["description"]})
+
+        spike_times_column = VectorData(
+            name="spike_times", description="the spike times for each unit in seconds", data=spike_times
+        )
+        columns = [
+            spike_times_column,
+            VectorIndex(name="spike_times_index", data=unit_offsets[1:], target=spike_times_column),
+        ]
+        property_keys = sorting_extractor.get_property_keys()
+        if "unit_name" not in property_keys:
+            columns.append(
+                VectorData(
+                    name="unit_name",
+                    description=property_descriptions["unit_name"],
+                    data=sorting_extractor.unit_ids.astype("str"),
+                )
+            )
+        for property_name in property_keys:
+            if property_name == "contact_vector":
+                continue
+            data = sorting_extractor.get_property(property_name)
+            if isinstance(data[0], (bool, np.bool_)):
+                data = data.astype(str)
+            elif np.issubdtype(data.dtype, np.integer) and property_name != "unit_name":
+                data = data.astype("float")
+            columns.append(
+                VectorData(
+                    name=property_name,
+                    description=property_descriptions.get(property_name, "No description."),
+                    data=data,
+                )
+            )
+
+        return Units(
+            name=units_name,
+            description=units_description,
+            id=ElementIdentifiers(name="id", data=np.arange(sorting_extractor.get_num_units())),
+            columns=columns,
+        )
+
+    def add_to_nwbfile(
+        self,
+        nwbfile: NWBFile,
+        metadata: Optional[DeepDict] = None,
+        stub_test: bool = False,
+        write_ecephys_metadata: bool = False,
+        write_as: Literal["units", "processing"] = "units",
+        units_name: str = "units",
+        units_description: str = "Autogenerated by neuroconv.",
+    ):
+        """
+        Adds the units to the NWB file, the units table is built from the spike frames of all units at once when the
+        NWB file does not have units (see `get_units_table`).
+
+        Parameters
+        ----------
+        nwbfile : NWBFile
+            Fill the relevant fields within the NWBFile object.
+        metadata : DeepDict
+            Information for constructing the NWB file (optional) and units table descriptions.
+        stub_test : bool, default: False
+            If True, will truncate the data to run the conversion faster and take up less memory.
+        write_ecephys_metadata : bool, default: False
+            Write electrode information contained in the metadata.
+        write_as : {'units', 'processing'}
+            How to save the units table in the nwb file.
+        units_name : str, default: 'units'
+            The name of the units table. If write_as=='units', then units_name must also be 'units'.
+        units_description : str, default: 'Autogenerated by neuroconv.'
+        """
+        if write_ecephys_metadata or write_as != "units" or nwbfile.units is not None:
+            # the rows are added to the existing units table by neuroconv
+            return super().add_to_nwbfile(
+                nwbfile=nwbfile,
+                metadata=metadata,
+                stub_test=stub_test,
+                write_ecephys_metadata=write_ecephys_metadata,
+                write_as=write_as,
+                units_name=units_name,
+                units_description=units_description,
+            )
+
+        nwbfile.units = self.get_units_table(
+            metadata=metadata,
+            stub_test=stub_test,
+            units_name=units_name,
+            units_description=units_description,
+        )
@@ -1,6 +1,6 @@
 import traceback
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from warnings import warn
 
 from nwbinspector import inspect_nwb
@@ -13,7 +13,17 @@ from neuroconv.utils import (
     dict_deep_update,
 )
 from tye_lab_to_nwb.ast_ecephys import AStEcephysNWBConverter
-from tye_lab_to_nwb.tools import read_session_config
+from tye_lab_to_nwb.tools import (
+    read_session_config,
+    repack_nwbfile,
+    verify_nwbfile,
+    profile_conversion,
+    update_catalog,
+    export_parquet_sidecars,
+    compute_summary_statistics,
+    add_peri_event_responses,
+    compute_envelope_pyramids,
+)
 
 
 def session_to_nwb(
@@ -26,6 +36,15 @@ def session_to_nwb(
     video_file_path: Optional[FilePathType] = None,
     subject_metadata: Optional[Dict[str, str]] = None,
     stub_test: Optional[bool] = False,
+    repack: Optional[bool] = False,
+    verification_sample_fraction: Optional[float] = None,
+    profile: Optional[bool] = False,
+    catalog_file_path: Optional[FilePathType] = None,
+    parquet_folder_path: Optional[FolderPathType] = None,
+    peri_event_window: Optional[Tuple[float, float]] = None,
+    peri_event_bin_size: Optional[float] = 0.05,
+    envelope_base_decimation: Optional[int] = None,
+    summary_statistics: Optional[bool] = False,
 ):
     """
     Converts a single session to NWB.
@@ -52,6 +71,37 @@ def session_to_nwb(
     stub_test: bool, optional
         For testing purposes, when stub_test=True only writes a subset of ecephys and plexon data.
         Default is to write the whole ecephys recording and plexon data to the file.
+    repack: bool, optional
+        Whether to rewrite the NWB file with the HDF5 paged file-space strategy after the conversion.
+        Repacked files open with far fewer small reads over the network. Default is to not repack the file.
+    verification_sample_fraction: float, optional
+        The fraction of chunks of each written dataset that is compared against the source data after the conversion.
+        A mismatch fails the session and the error log points to the dataset and the chunk. Default is to not verify.
+    profile: bool, optional
+        Whether to record a timeline of the conversion (interfaces, chunk reads and chunk writes) in the Chrome trace
+        format. The trace is saved next to the NWB file as '<nwbfile name>_trace.json'. Default is to not profile.
+    catalog_file_path: FilePathType, optional
+        The path to the SQLite catalog of the converted sessions (see `tye_lab_to_nwb.tools.catalog`).
+        When specified, the metadata, streams and counts of the NWB file are added to the catalog after the conversion.
+        Default is to not catalog the session.
+    parquet_folder_path: FolderPathType, optional
+        The folder of the Parquet sidecars of the batch (see `tye_lab_to_nwb.tools.parquet_sidecars`). When specified,
+        the trials, events, units and pose estimation tables are also written as Parquet files partitioned by subject
+        and session. Default is to not write the sidecars.
+    peri_event_window: tuple of float, optional
+        The start and stop time (in seconds) of the window around the events for the binned responses of the units
+        and of the ROI traces, which are stored in the "peri_event_responses" processing module
+        (see `tye_lab_to_nwb.tools.peri_event_responses`). Default is to not compute the responses.
+    peri_event_bin_size: float, optional
+        The width of the bins of the peri-event responses in seconds, the default is 0.05.
+    envelope_base_decimation: int, optional
+        When specified, the per-channel minimum and maximum of the recordings are computed while they are written,
+        at bins of this many samples (e.g. 256) and at coarser levels, and stored in the "ecephys_envelopes" processing
+        module for fast browsing (see `tye_lab_to_nwb.tools.envelope_pyramid`). Default is to not compute the envelopes.
+    summary_statistics: bool, optional
+        Whether to compute the summary statistics of the recordings (per channel) while they are written, which are
+        stored in the "summary_statistics" processing module (see `tye_lab_to_nwb.tools.summary_statistics`). Default is
+        to not compute the statistics.
     """
     ecephys_recording_folder_path = Path(ecephys_recording_folder_path)
 
@@ -148,9 +198,32 @@ def session_to_nwb(
 
     try:
         # Run conversion
-        converter.run_conversion(
-            nwbfile_path=str(nwbfile_path), metadata=metadata, conversion_options=conversion_options
-        )
+        trace_file_path = nwbfile_path.parent / f"{nwbfile_path.stem}_trace.json" if profile else None
+        with profile_conversion(converter=converter, trace_file_path=trace_file_path), export_parquet_sidecars(
+            converter=converter, sidecar_folder_path=parquet_folder_path
+        ), compute_envelope_pyramids(
+            converter=converter, nwbfile_path=nwbfile_path, base_decimation=envelope_base_decimation
+        ), compute_summary_statistics(
+            converter=converter, nwbfile_path=nwbfile_path, summary_statistics=summary_statistics
+        ):
+            converter.run_conversion(
+                nwbfile_path=str(nwbfile_path), metadata=metadata, conversion_options=conversion_options
+            )
+
+        if peri_event_window:
+            add_peri_event_responses(nwbfile_path=nwbfile_path, window=peri_event_window, bin_size=peri_event_bin_size)
+
+        if repack:
+            repack_nwbfile(nwbfile_path=nwbfile_path)
+
+        if verification_sample_fraction:
+            verify_nwbfile(
+                nwbfile_path=nwbfile_path,
+                data_interfaces=converter.data_interface_objects,
+                metadata=metadata,
+                conversion_options=conversion_options,
+                sample_fraction=verification_sample_fraction,
+            )
 
         # Run inspection for nwbfile
         results = list(inspect_nwb(nwbfile_path=nwbfile_path))
@@ -162,6 +235,9 @@ def session_to_nwb(
                 levels=["importance", "file_path"],
             ),
         )
+
+        if catalog_file_path:
+            update_catalog(catalog_file_path=catalog_file_path, nwbfile_path=nwbfile_path, source_data=source_data)
     except Exception as e:
         with open(f"{nwbfile_path.parent}/{nwbfile_path.stem}_error_log.txt", "w") as f:
             f.write(traceback.format_exc())
@@ -1,13 +1,16 @@
+from functools import partial
 from typing import Optional
 
 import tifffile
 from hdmf.backends.hdf5 import H5DataIO
 from neuroconv import BaseDataInterface
-from neuroconv.utils import FilePathType
+from neuroconv.utils import FilePathType, OptionalFolderPathType
 from pynwb import NWBFile
 from pynwb.base import Images
 from pynwb.image import RGBImage
 
+from tye_lab_to_nwb.tools import get_shared_datasets
+
 
 class AStNeuropixelsHistologyInterface(BaseDataInterface):
     """Primary interface for converting the histology image for the Ephys Neuropixels dataset."""
@@ -52,20 +55,45 @@ class AStNeuropixelsHistologyInterface(BaseDataInterface):
         metadata: Optional[dict] = None,
         overwrite: bool = False,
         verbose: bool = False,
+        shared_assets_folder_path: OptionalFolderPathType = None,
     ):
+        """
+        Adds the histology image to the NWBFile.
+
+        Parameters
+        ----------
+        shared_assets_folder_path : FolderPathType, optional
+            The folder of the assets that are shared by the sessions of a batch. When specified, the image is written
+            once into a shared asset file and the NWB file links to it, otherwise the image is copied into the NWB file.
+        """
+        shared_datasets = None
+        if shared_assets_folder_path:
+            shared_datasets = get_shared_datasets(
+                shared_assets_folder_path=shared_assets_folder_path,
+                file_paths=[self.source_data["file_path"]],
+                create_container=partial(self._create_images, metadata=metadata),
+            )
+
+        images = self._create_images(metadata=metadata, shared_datasets=shared_datasets)
+        nwbfile.add_acquisition(images)
+
+    def _create_images(self, metadata: dict, shared_datasets: Optional[dict] = None) -> Images:
         images = Images(name=metadata["Images"]["name"], description=metadata["Images"]["description"])
 
-        # loads as height by width and color dimension
-        image_data = self._tif.asarray()
-        # transpose to width by height and color (NWB convention)
-        image_data = image_data.transpose((1, 0, 2))
         image_metadata = metadata["Images"]["images"][0]
+        if shared_datasets is not None:
+            image_data = shared_datasets[image_metadata["name"]]
+        else:
+            # loads as height by width and color dimension
+            image_data = self._tif.asarray()
+            # transpose to width by height and color (NWB convention)
+            image_data = H5DataIO(image_data.transpose((1, 0, 2)), compression=True)
         images.add_image(
             RGBImage(
                 name=image_metadata["name"],
-                data=H5DataIO(image_data, compression=True),
+                data=image_data,
                 description=image_metadata["description"],
             )
         )
 
-        nwbfile.add_acquisition(images)
+        return images
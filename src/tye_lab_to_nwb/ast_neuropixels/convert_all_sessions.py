@@ -1,7 +1,7 @@
 from pathlib import Path
 from typing import Optional
 
-from neuroconv.utils import FilePathType
+from neuroconv.utils import FilePathType, FolderPathType, OptionalFolderPathType
 from tye_lab_to_nwb.ast_neuropixels.convert_session import session_to_nwb
 from tye_lab_to_nwb.tools import read_session_config, parallel_execute
 
@@ -10,6 +10,12 @@ def parallel_convert_sessions(
     excel_file_path: FilePathType,
     num_parallel_jobs: Optional[int] = 1,
     stub_test: Optional[bool] = False,
+    profile: Optional[bool] = False,
+    shared_assets_folder_path: OptionalFolderPathType = None,
+    catalog_file_path: Optional[FilePathType] = None,
+    parquet_folder_path: Optional[FolderPathType] = None,
+    envelope_base_decimation: Optional[int] = None,
+    summary_statistics: Optional[bool] = False,
 ):
     """
     Parallel converts NWB files.
@@ -26,6 +32,25 @@ def parallel_convert_sessions(
     stub_test: bool, optional
         For testing purposes, when stub_test=True only writes a subset of ecephys and plexon data.
         Default is to write the whole ecephys recording and plexon data to the file.
+    profile: bool, optional
+        Whether to record a timeline of the conversion for each session (saved next to the NWB file as
+        '<nwbfile name>_trace.json'). When the Excel file has a 'profile' column, it enables profiling per session.
+        Default is to not profile the conversions.
+    shared_assets_folder_path: FolderPathType, optional
+        The folder of the assets that are shared by the sessions, e.g. the histology image of a subject. Each unique asset is written once
+        into this folder and linked from the NWB files. Default is to copy the assets into each NWB file.
+    catalog_file_path: FilePathType, optional
+        The path to the SQLite catalog where each converted session is added (see `tye_lab_to_nwb.tools.catalog`).
+        Default is to not catalog the sessions.
+    parquet_folder_path: FolderPathType, optional
+        The folder where the trials, events, units and pose estimation tables of each session are written as Parquet
+        files partitioned by subject and session. Default is to not write the sidecars.
+    envelope_base_decimation: int, optional
+        When specified, the min/max envelope pyramids of the recordings are stored in each NWB file, with this many
+        samples per bin at the finest level (e.g. 256). Default is to not compute the envelopes.
+    summary_statistics: bool, optional
+        Whether to store the summary statistics of the recordings (per channel) in each NWB file. Default is to not
+        compute the statistics.
     """
 
     config = read_session_config(excel_file_path=excel_file_path)
@@ -43,7 +68,13 @@ def parallel_convert_sessions(
                 phy_sorting_folder_path=row["phy_folder_path"],
                 histology_image_file_path=row["histology_image_file_path"],
                 subject_metadata=subject_metadata,
+                profile=bool(row["profile"]) if "profile" in config.columns else profile,
+                catalog_file_path=catalog_file_path,
+                parquet_folder_path=parquet_folder_path,
+                summary_statistics=summary_statistics,
+                envelope_base_decimation=envelope_base_decimation,
                 stub_test=stub_test,
+                shared_assets_folder_path=shared_assets_folder_path,
             )
         )
     parallel_execute(
@@ -15,7 +15,17 @@ from neuroconv.utils import (
     OptionalFilePathType,
 )
 from tye_lab_to_nwb.ast_neuropixels import AStNeuroPixelsNNWBConverter
-from tye_lab_to_nwb.tools import read_session_config
+from tye_lab_to_nwb.tools import (
+    read_session_config,
+    repack_nwbfile,
+    verify_nwbfile,
+    profile_conversion,
+    update_catalog,
+    export_parquet_sidecars,
+    compute_summary_statistics,
+    compute_envelope_pyramids,
+    close_shared_asset_files,
+)
 
 
 def session_to_nwb(
@@ -25,6 +35,14 @@ def session_to_nwb(
     histology_image_file_path: OptionalFilePathType,
     subject_metadata: Optional[Dict[str, str]] = None,
     stub_test: Optional[bool] = False,
+    repack: Optional[bool] = False,
+    verification_sample_fraction: Optional[float] = None,
+    profile: Optional[bool] = False,
+    shared_assets_folder_path: OptionalFolderPathType = None,
+    catalog_file_path: Optional[FilePathType] = None,
+    parquet_folder_path: Optional[FolderPathType] = None,
+    envelope_base_decimation: Optional[int] = None,
+    summary_statistics: Optional[bool] = False,
 ):
     """
     Converts a single session to NWB.
@@ -44,6 +62,35 @@ def session_to_nwb(
     stub_test: bool, optional
         For testing purposes, when stub_test=True only writes a subset of ecephys data.
         Default is to write the whole ecephys recording to the file.
+    repack: bool, optional
+        Whether to rewrite the NWB file with the HDF5 paged file-space strategy after the conversion.
+        Repacked files open with far fewer small reads over the network. Default is to not repack the file.
+    verification_sample_fraction: float, optional
+        The fraction of chunks of each written dataset that is compared against the source data after the conversion.
+        A mismatch fails the session and the error log points to the dataset and the chunk. Default is to not verify.
+    profile: bool, optional
+        Whether to record a timeline of the conversion (interfaces, chunk reads and chunk writes) in the Chrome trace
+        format. The trace is saved next to the NWB file as '<nwbfile name>_trace.json'. Default is to not profile.
+    shared_assets_folder_path: FolderPathType, optional
+        The folder of the assets that are shared by the sessions of a batch, identified by the hash of their contents.
+        When specified, the histology image is written once into this folder and linked from the NWB file with an HDF5 external link.
+        The folder must be kept next to the NWB files. Default is to copy the image into each NWB file.
+    catalog_file_path: FilePathType, optional
+        The path to the SQLite catalog of the converted sessions (see `tye_lab_to_nwb.tools.catalog`).
+        When specified, the metadata, streams and counts of the NWB file are added to the catalog after the conversion.
+        Default is to not catalog the session.
+    parquet_folder_path: FolderPathType, optional
+        The folder of the Parquet sidecars of the batch (see `tye_lab_to_nwb.tools.parquet_sidecars`). When specified,
+        the trials, events, units and pose estimation tables are also written as Parquet files partitioned by subject
+        and session. Default is to not write the sidecars.
+    envelope_base_decimation: int, optional
+        When specified, the per-channel minimum and maximum of the recordings are computed while they are written,
+        at bins of this many samples (e.g. 256) and at coarser levels, and stored in the "ecephys_envelopes" processing
+        module for fast browsing (see `tye_lab_to_nwb.tools.envelope_pyramid`). Default is to not compute the envelopes.
+    summary_statistics: bool, optional
+        Whether to compute the summary statistics of the recordings (per channel) while they are written, which are
+        stored in the "summary_statistics" processing module (see `tye_lab_to_nwb.tools.summary_statistics`). Default is
+        to not compute the statistics.
     """
 
     source_data = dict()
@@ -76,6 +123,8 @@ def session_to_nwb(
 
     if histology_image_file_path:
         source_data.update(dict(Image=dict(file_path=str(histology_image_file_path))))
+        if shared_assets_folder_path:
+            conversion_options.update(dict(Image=dict(shared_assets_folder_path=str(shared_assets_folder_path))))
 
     converter = AStNeuroPixelsNNWBConverter(source_data=source_data)
 
@@ -103,9 +152,29 @@ def session_to_nwb(
 
     try:
         # Run conversion
-        converter.run_conversion(
-            nwbfile_path=str(nwbfile_path), metadata=metadata, conversion_options=conversion_options
-        )
+        trace_file_path = nwbfile_path.parent / f"{nwbfile_path.stem}_trace.json" if profile else None
+        with profile_conversion(converter=converter, trace_file_path=trace_file_path), export_parquet_sidecars(
+            converter=converter, sidecar_folder_path=parquet_folder_path
+        ), compute_envelope_pyramids(
+            converter=converter, nwbfile_path=nwbfile_path, base_decimation=envelope_base_decimation
+        ), compute_summary_statistics(
+            converter=converter, nwbfile_path=nwbfile_path, summary_statistics=summary_statistics
+        ):
+            converter.run_conversion(
+                nwbfile_path=str(nwbfile_path), metadata=metadata, conversion_options=conversion_options
+            )
+
+        if repack:
+            repack_nwbfile(nwbfile_path=nwbfile_path)
+
+        if verification_sample_fraction:
+            verify_nwbfile(
+                nwbfile_path=nwbfile_path,
+                data_interfaces=converter.data_interface_objects,
+                metadata=metadata,
+                conversion_options=conversion_options,
+                sample_fraction=verification_sample_fraction,
+            )
 
         # Run inspection for nwbfile
         results = list(inspect_nwbfile(nwbfile_path=nwbfile_path))
@@ -118,10 +187,16 @@ def session_to_nwb(
             ),
             overwrite=True,
         )
+
+        if catalog_file_path:
+            update_catalog(catalog_file_path=catalog_file_path, nwbfile_path=nwbfile_path, source_data=source_data)
     except Exception as e:
         with open(f"{nwbfile_path.parent}/{nwbfile_path.stem}_error_log.txt", "w") as f:
             f.write(traceback.format_exc())
         warn(f"There was an error during the conversion of {nwbfile_path}. The full traceback: {e}")
+    finally:
+        # The shared assets are linked to the NWB file, they are not read after the conversion
+        close_shared_asset_files()
 
 
 if __name__ == "__main__":
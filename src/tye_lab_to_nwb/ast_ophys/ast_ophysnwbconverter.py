@@ -1,23 +1,24 @@
+from contextlib import nullcontext
 from typing import Optional
 
-from neuroconv.converters import MiniscopeConverter
-
 from neuroconv import NWBConverter
 from pynwb import NWBFile
 
 
 from tye_lab_to_nwb.ast_ophys.interfaces import (
     CnmfeMatlabSegmentationSegmentationInterface,
+    ConcurrentMiniscopeConverter,
     MotionCorrectedMiniscopeImagingInterface,
     ProcessedMiniscopeImagingInterface,
 )
+from tye_lab_to_nwb.ast_ophys.tools import reextract_fluorescence
 
 
 class AStOphysNWBConverter(NWBConverter):
     """Primary conversion class for the ASt optical imaging dataset."""
 
     data_interface_classes = dict(
-        RawImaging=MiniscopeConverter,
+        RawImaging=ConcurrentMiniscopeConverter,
         ProcessedImaging=ProcessedMiniscopeImagingInterface,
         MotionCorrectedImaging=MotionCorrectedMiniscopeImagingInterface,
         Segmentation=CnmfeMatlabSegmentationSegmentationInterface,
@@ -30,7 +31,16 @@ class AStOphysNWBConverter(NWBConverter):
         metadata: Optional[dict] = None,
         overwrite: bool = False,
         conversion_options: Optional[dict] = None,
+        reextract_fluorescence_traces: bool = False,
     ):
+        """
+        Run the conversion of the session.
+
+        When `reextract_fluorescence_traces` is True and both the motion corrected imaging and the segmentation are
+        available, the fluorescence of each ROI is also computed from the motion corrected movie while it is written
+        (the mean of the pixels weighted by the CNMF-E footprint), and added as the "RoiResponseSeriesReextracted"
+        of the "Fluorescence" (see `tye_lab_to_nwb.ast_ophys.tools.fluorescence_reextraction`).
+        """
         # Setting the sampling frequency of the processed and motion corrected imaging extractors to
         # the raw imaging. When the raw imaging is missing but the segmentation is available, use that.
         sampling_frequency = None
@@ -56,9 +66,26 @@ class AStOphysNWBConverter(NWBConverter):
         imaging_plane_metadata = metadata["Ophys"]["ImagingPlane"][0]
         imaging_plane_metadata.update(location="ASt")
 
-        super().run_conversion(
-            nwbfile_path=nwbfile_path,
-            nwbfile=nwbfile,
-            metadata=metadata,
-            conversion_options=conversion_options,
-        )
+        fluorescence_reextraction = nullcontext()
+        if (
+            reextract_fluorescence_traces
+            and nwbfile_path is not None
+            and "MotionCorrectedImaging" in self.data_interface_objects
+            and "Segmentation" in self.data_interface_objects
+        ):
+            segmentation_extractor = self.data_interface_objects["Segmentation"].segmentation_extractor
+            fluorescence_reextraction = reextract_fluorescence(
+                converter=self,
+                nwbfile_path=nwbfile_path,
+                series_name="OnePhotonSeriesMotionCorrected",
+                footprints=segmentation_extractor.get_roi_footprints(),
+                image_size=tuple(int(length) for length in segmentation_extractor.get_image_size()),
+            )
+
+        with fluorescence_reextraction:
+            super().run_conversion(
+                nwbfile_path=nwbfile_path,
+                nwbfile=nwbfile,
+                metadata=metadata,
+                conversion_options=conversion_options,
+            )
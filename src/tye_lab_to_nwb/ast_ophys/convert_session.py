@@ -1,6 +1,6 @@
 import traceback
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from warnings import warn
 
 from dateutil import tz
@@ -15,6 +15,16 @@ from nwbinspector import inspect_nwbfile
 from nwbinspector.inspector_tools import save_report, format_messages
 
 from tye_lab_to_nwb.ast_ophys.ast_ophysnwbconverter import AStOphysNWBConverter
+from tye_lab_to_nwb.ast_ophys.tools import compute_movie_pyramids
+from tye_lab_to_nwb.tools import (
+    repack_nwbfile,
+    verify_nwbfile,
+    profile_conversion,
+    update_catalog,
+    export_parquet_sidecars,
+    compute_summary_statistics,
+    add_peri_event_responses,
+)
 
 
 def session_to_nwb(
@@ -28,6 +38,18 @@ def session_to_nwb(
     subject_metadata: Optional[dict] = None,
     session_start_time: Optional[str] = None,
     stub_test: Optional[bool] = False,
+    repack: Optional[bool] = False,
+    verification_sample_fraction: Optional[float] = None,
+    profile: Optional[bool] = False,
+    catalog_file_path: Optional[FilePathType] = None,
+    parquet_folder_path: Optional[FolderPathType] = None,
+    peri_event_window: Optional[Tuple[float, float]] = None,
+    peri_event_bin_size: Optional[float] = 0.05,
+    summary_statistics: Optional[bool] = False,
+    num_decoding_threads: Optional[int] = 1,
+    external_videos: Optional[bool] = False,
+    movie_pyramid: Optional[bool] = False,
+    reextract_fluorescence: Optional[bool] = False,
 ):
     """
     Converts a single session to NWB.
@@ -55,8 +77,63 @@ def session_to_nwb(
     stub_test: bool, optional
         Write the first 100 frames to the NWB file for testing purposes.
         Default is to write the whole imaging and segmentation data to the file.
+    repack: bool, optional
+        Whether to rewrite the NWB file with the HDF5 paged file-space strategy after the conversion.
+        Repacked files open with far fewer small reads over the network. Default is to not repack the file.
+    verification_sample_fraction: float, optional
+        The fraction of chunks of each written dataset that is compared against the source data after the conversion.
+        A mismatch fails the session and the error log points to the dataset and the chunk. Default is to not verify.
+    profile: bool, optional
+        Whether to record a timeline of the conversion (interfaces, chunk reads and chunk writes) in the Chrome trace
+        format. The trace is saved next to the NWB file as '<nwbfile name>_trace.json'. Default is to not profile.
+    catalog_file_path: FilePathType, optional
+        The path to the SQLite catalog of the converted sessions (see `tye_lab_to_nwb.tools.catalog`).
+        When specified, the metadata, streams and counts of the NWB file are added to the catalog after the conversion.
+        Default is to not catalog the session.
+    parquet_folder_path: FolderPathType, optional
+        The folder of the Parquet sidecars of the batch (see `tye_lab_to_nwb.tools.parquet_sidecars`). When specified,
+        the trials, events, units and pose estimation tables are also written as Parquet files partitioned by subject
+        and session. Default is to not write the sidecars.
+    peri_event_window: tuple of float, optional
+        The start and stop time (in seconds) of the window around the events for the binned responses of the units
+        and of the ROI traces, which are stored in the "peri_event_responses" processing module
+        (see `tye_lab_to_nwb.tools.peri_event_responses`). Default is to not compute the responses.
+    peri_event_bin_size: float, optional
+        The width of the bins of the peri-event responses in seconds, the default is 0.05.
+    summary_statistics: bool, optional
+        Whether to compute the summary statistics of the Miniscope movies (mean, max and std images) and of the CNMF-E
+        traces while they are written, which are stored in the "summary_statistics" processing module (see
+        `tye_lab_to_nwb.tools.summary_statistics`). Default is to not compute the statistics.
+    num_decoding_threads: int, optional
+        The number of threads that decode the frames of the raw Miniscope videos (one segment per thread, see
+        `tye_lab_to_nwb.ast_ophys.extractors.ConcurrentMiniscopeImagingExtractor`) and of the processed Miniscope
+        video (see `tye_lab_to_nwb.ast_ophys.tools.ParallelVideoDataChunkIterator`) concurrently. The frames are
+        identical to the frames of a sequential read. The default is to decode the frames sequentially.
+    external_videos: bool, optional
+        Whether to reference the raw Miniscope videos (msCam*.avi) and the processed Miniscope video (.avi) as the
+        external files of their OnePhotonSeries instead of writing their frames, which takes seconds instead of hours
+        when the videos are archived next to the NWB file. The number of frames of the videos is verified against
+        the timestamps. The paths of the videos are relative to the folder of the NWB file. The referenced videos
+        are written in full for the stub test, and their movie pyramids and summary statistics are not computed
+        (a warning is raised). Default is to write the frames to the NWB file.
+    movie_pyramid: bool, optional
+        Whether to also write the 2x, 4x and 8x binned (in time and space) versions of the processed and motion
+        corrected Miniscope movies to the "ophys" processing module while they are written, for browsing and quick
+        checks (see `tye_lab_to_nwb.ast_ophys.tools.movie_pyramid`). Default is to not write the binned movies.
+    reextract_fluorescence: bool, optional
+        Whether to also compute the fluorescence of each ROI from the motion corrected Miniscope movie (the mean of
+        the pixels weighted by the CNMF-E footprint) while the movie is written, which is stored as the
+        "RoiResponseSeriesReextracted" of the "Fluorescence". Requires the motion corrected movie and the segmentation.
+        Default is to not re-extract the fluorescence.
     """
 
+    if external_videos and (movie_pyramid or summary_statistics):
+        # The taps only see the frames that are written, the frames of the referenced videos are not read
+        warn(
+            "The movie pyramids and summary statistics are not computed for the raw and processed Miniscope videos "
+            "that are referenced as external files, only for the motion corrected movie."
+        )
+
     source_data = dict()
     conversion_options = dict()
 
@@ -64,7 +141,12 @@ def session_to_nwb(
     if miniscope_folder_path:
         imaging_folder_path = Path(miniscope_folder_path)
         source_data.update(dict(RawImaging=dict(folder_path=str(imaging_folder_path))))
-        conversion_options.update(dict(RawImaging=dict(stub_test=stub_test)))
+        raw_imaging_conversion_options = dict(stub_test=stub_test, num_decoding_threads=num_decoding_threads)
+        if external_videos:
+            raw_imaging_conversion_options.update(
+                external_file=True, external_file_folder_path=str(Path(nwbfile_path).parent)
+            )
+        conversion_options.update(dict(RawImaging=raw_imaging_conversion_options))
 
     # Add processed Miniscope imaging
     if processed_miniscope_avi_file_path:
@@ -77,8 +159,14 @@ def session_to_nwb(
             )
         )
         processed_imaging_conversion_options = dict(
-            stub_test=stub_test, photon_series_index=1 if miniscope_folder_path else 0
+            stub_test=stub_test,
+            photon_series_index=1 if miniscope_folder_path else 0,
+            num_decoding_threads=num_decoding_threads,
         )
+        if external_videos:
+            processed_imaging_conversion_options.update(
+                external_file=True, external_file_folder_path=str(Path(nwbfile_path).parent)
+            )
         conversion_options.update(dict(ProcessedImaging=processed_imaging_conversion_options))
 
     # Add motion corrected imaging
@@ -145,9 +233,35 @@ def session_to_nwb(
     nwbfile_path = Path(nwbfile_path)
     try:
         # Run conversion
-        converter.run_conversion(
-            nwbfile_path=str(nwbfile_path), metadata=metadata, conversion_options=conversion_options
-        )
+        trace_file_path = nwbfile_path.parent / f"{nwbfile_path.stem}_trace.json" if profile else None
+        with profile_conversion(converter=converter, trace_file_path=trace_file_path), export_parquet_sidecars(
+            converter=converter, sidecar_folder_path=parquet_folder_path
+        ), compute_summary_statistics(
+            converter=converter, nwbfile_path=nwbfile_path, summary_statistics=summary_statistics
+        ), compute_movie_pyramids(
+            converter=converter, nwbfile_path=nwbfile_path, movie_pyramid=movie_pyramid
+        ):
+            converter.run_conversion(
+                nwbfile_path=str(nwbfile_path),
+                metadata=metadata,
+                conversion_options=conversion_options,
+                reextract_fluorescence_traces=reextract_fluorescence,
+            )
+
+        if peri_event_window:
+            add_peri_event_responses(nwbfile_path=nwbfile_path, window=peri_event_window, bin_size=peri_event_bin_size)
+
+        if repack:
+            repack_nwbfile(nwbfile_path=nwbfile_path)
+
+        if verification_sample_fraction:
+            verify_nwbfile(
+                nwbfile_path=nwbfile_path,
+                data_interfaces=converter.data_interface_objects,
+                metadata=metadata,
+                conversion_options=conversion_options,
+                sample_fraction=verification_sample_fraction,
+            )
 
         # Run inspection for nwbfile
         results = list(inspect_nwbfile(nwbfile_path=nwbfile_path))
@@ -160,6 +274,9 @@ def session_to_nwb(
             ),
             overwrite=True,
         )
+
+        if catalog_file_path:
+            update_catalog(catalog_file_path=catalog_file_path, nwbfile_path=nwbfile_path, source_data=source_data)
     except Exception as e:
         with open(f"{nwbfile_path.parent}/{nwbfile_path.stem}_error_log.txt", "w") as f:
             f.write(traceback.format_exc())
@@ -1,2 +1,3 @@
 from .cnmfe_matlab_segmentationextractor import CnmfeMatlabSegmentationExtractor
 from .motion_corrected_miniscope_imagingextractor import MotionCorrectedMiniscopeImagingExtractor
+from .concurrent_miniscope_imagingextractor import ConcurrentMiniscopeImagingExtractor
@@ -1,10 +1,126 @@
 from encodings.utf_8 import decode
+from typing import List, Optional, Tuple
 
+import h5py
 import numpy as np
 from pymatreader import read_mat
 from roiextractors import SegmentationExtractor
-from roiextractors.extraction_tools import PathType
-from scipy.sparse import csc_matrix
+from roiextractors.extraction_tools import ArrayType, PathType
+from scipy.sparse import csc_matrix, issparse
+
+# The variables of the saved 'neuron' struct that are read by the extractor
+NEURON_VARIABLE_NAMES = ["A", "C", "S", "Cn", "Fs", "options", "P"]
+# The number of frames of the blocks that are read to check whether the lazy traces are all zeros
+NUM_FRAMES_PER_BLOCK = 10_000
+
+
+def _read_hdf5_mat_variable(dataset: h5py.Dataset):
+    # MATLAB stores the arrays in column-major order, the HDF5 datasets have the reversed shape
+    if dataset.attrs.get("MATLAB_empty", 0):
+        return np.empty((0, 0))
+    value = dataset[()].T
+    return value.item() if value.size == 1 else value
+
+
+def _read_hdf5_mat_sparse(group: h5py.Group) -> csc_matrix:
+    num_rows = int(group.attrs["MATLAB_sparse"])
+    column_pointers = group["jc"][()]
+    if "data" not in group:
+        return csc_matrix((num_rows, len(column_pointers) - 1))
+    return csc_matrix((group["data"][()], group["ir"][()], column_pointers), shape=(num_rows, len(column_pointers) - 1))
+
+
+def load_cnmfe_hdf5_mat_file(file: h5py.File) -> dict:
+    """
+    Reads the fields of a MATLAB v7.3 (HDF5) CNMF-E .mat file that are used by the extractor.
+
+    The other fields of the 'neuron' struct are not read. The sparse matrices ("A" and "S") and the small fields
+    are read in memory, while the dense traces ("C", and "S" when it is not sparse) are returned as the h5py datasets
+    with shape (number of frames, number of ROIs), which are read lazily.
+
+    Parameters
+    ----------
+    file : h5py.File
+        The open .mat file, it must stay open while the traces are read.
+    """
+    neuron = dict()
+    for variable_name in ["A", "C", "S", "Cn", "Fs"]:
+        if variable_name not in file:
+            continue
+        variable = file[variable_name]
+        if isinstance(variable, h5py.Group) and "MATLAB_sparse" in variable.attrs:
+            neuron[variable_name] = _read_hdf5_mat_sparse(group=variable)
+        elif variable_name in ["C", "S"] and not variable.attrs.get("MATLAB_empty", 0):
+            neuron[variable_name] = variable
+        else:
+            neuron[variable_name] = _read_hdf5_mat_variable(dataset=variable)
+    for struct_name, field_names in [("options", ["d1", "d2"]), ("P", ["numFrames"])]:
+        if struct_name in file:
+            struct = file[struct_name]
+            neuron[struct_name] = {
+                name: int(_read_hdf5_mat_variable(struct[name])) for name in field_names if name in struct
+            }
+    return neuron
+
+
+def _has_nonzero_values(traces: h5py.Dataset) -> bool:
+    return any(
+        np.any(traces[start_frame : start_frame + NUM_FRAMES_PER_BLOCK])
+        for start_frame in range(0, traces.shape[0], NUM_FRAMES_PER_BLOCK)
+    )
+
+
+class SparseImageMasks:
+    """
+    The image masks of the ROIs with shape (height, width, number of ROIs) backed by the sparse footprints.
+
+    The footprints are the columns of the CNMF-E "A" matrix (pixels x ROIs), only the image mask of a single ROI
+    is made dense when it is indexed as `image_masks[:, :, roi_index]`.
+    """
+
+    def __init__(self, footprints: csc_matrix, image_size: Tuple[int, int]):
+        self.footprints = footprints
+        self.shape = (*image_size, footprints.shape[1])
+        self.dtype = footprints.dtype
+
+    def __getitem__(self, item):
+        *pixel_selection, roi_index = item
+        image_mask = self.footprints[:, roi_index].toarray().reshape(self.shape[:2])
+        return image_mask[tuple(pixel_selection)]
+
+
+class SparseTraces:
+    """
+    The traces with shape (number of frames, number of ROIs) backed by a sparse matrix, only the selected frames and
+    ROIs are made dense when they are indexed (e.g. by the SliceableDataChunkIterator that writes the traces).
+
+    The traces have the attributes of a two-dimensional array (shape, size, ndim and dtype) that are used by
+    neuroconv and roiextractors, converting them with `np.asarray` makes all of the traces dense.
+    """
+
+    def __init__(self, traces):
+        self.traces = traces.tocsr()
+        self.shape = self.traces.shape
+        self.size = self.shape[0] * self.shape[1]
+        self.ndim = 2
+        self.dtype = self.traces.dtype
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        traces = self.traces.toarray()
+        return traces if dtype is None else traces.astype(dtype)
+
+    def __getitem__(self, item):
+        if not isinstance(item, tuple):
+            item = (item,)
+        frame_selection = item[0]
+        roi_selection = item[1] if len(item) > 1 else slice(None)
+        traces = self.traces[frame_selection].toarray()
+        if isinstance(frame_selection, (int, np.integer)):
+            traces = traces[0]
+        return traces[..., roi_selection]
 
 
 class CnmfeMatlabSegmentationExtractor(SegmentationExtractor):
@@ -38,17 +154,25 @@ class CnmfeMatlabSegmentationExtractor(SegmentationExtractor):
         self._num_frames = self._dataset_file["P"]["numFrames"]
 
         roi_response_raw = self._dataset_file["C"]
-        # For single roi data insert new axis
-        if len(roi_response_raw.shape) == 1:
-            roi_response_raw = roi_response_raw[np.newaxis, :]
-    
-        self._roi_response_raw = roi_response_raw.T
+        if isinstance(roi_response_raw, h5py.Dataset):
+            # the traces of the v7.3 files are read lazily, the stored shape is (number of frames, number of ROIs)
+            self._roi_response_raw = roi_response_raw
+        else:
+            # For single roi data insert new axis
+            if len(roi_response_raw.shape) == 1:
+                roi_response_raw = roi_response_raw[np.newaxis, :]
+
+            self._roi_response_raw = roi_response_raw.T
         self._roi_response_deconvolved = self._transform_deconvolved_traces()
         self._image_correlation = self._dataset_file["Cn"]
         self._image_masks = self._transform_image_masks()
 
     def _load_mat_file(self):
-        return read_mat(self.file_path)
+        # the v7.3 files are HDF5 files, only the fields that are used are read
+        if h5py.is_hdf5(self.file_path):
+            self._file = h5py.File(self.file_path, mode="r")
+            return load_cnmfe_hdf5_mat_file(file=self._file)
+        return read_mat(self.file_path, variable_names=NEURON_VARIABLE_NAMES)
 
     def get_image_size(self):
         return self._image_size
@@ -65,14 +189,83 @@ class CnmfeMatlabSegmentationExtractor(SegmentationExtractor):
     def _transform_deconvolved_traces(self):
         deconvolved_traces = self._dataset_file["S"]
 
-        if isinstance(deconvolved_traces, csc_matrix):
-            deconvolved_traces = deconvolved_traces.toarray()
+        # the deconvolved traces are kept sparse, they are made dense only for the frames that are read
+        if issparse(deconvolved_traces):
+            if not deconvolved_traces.count_nonzero():
+                return None
+            return SparseTraces(deconvolved_traces.T)
+        if isinstance(deconvolved_traces, h5py.Dataset):
+            # the stored shape of the v7.3 traces is (number of frames, number of ROIs)
+            return deconvolved_traces if _has_nonzero_values(traces=deconvolved_traces) else None
         if not np.any(deconvolved_traces):
             return None
 
         return deconvolved_traces.T
 
     def _transform_image_masks(self):
-        image_masks = self._dataset_file["A"].toarray()
-        num_rois = self.get_num_rois()
-        return image_masks.reshape((*self._image_size, num_rois))
+        # the pixels of the footprints are in the order of the flattened (height, width) image
+        footprints = csc_matrix(self._dataset_file["A"])
+        footprints.sort_indices()
+        return SparseImageMasks(footprints=footprints, image_size=self._image_size)
+
+    def _get_roi_indices(self, roi_ids: Optional[ArrayType] = None) -> List[int]:
+        if roi_ids is None:
+            return list(range(self.get_num_rois()))
+        all_ids = self.get_roi_ids()
+        return [all_ids.index(roi_id) for roi_id in roi_ids]
+
+    def get_traces(self, roi_ids=None, start_frame=None, end_frame=None, name="raw"):
+        traces = self.get_traces_dict().get(name)
+        if not isinstance(traces, SparseTraces):
+            return super().get_traces(roi_ids=roi_ids, start_frame=start_frame, end_frame=end_frame, name=name)
+        return traces[start_frame:end_frame, self._get_roi_indices(roi_ids=roi_ids)]
+
+    def get_roi_footprints(self) -> csc_matrix:
+        """
+        Returns the sparse footprints of the ROIs with shape (number of pixels, number of ROIs), the pixels are in the
+        order of the flattened (height, width) image.
+        """
+        return self._image_masks.footprints
+
+    def get_roi_image_masks(self, roi_ids=None) -> np.ndarray:
+        roi_indices = self._get_roi_indices(roi_ids=roi_ids)
+        image_masks = self._image_masks.footprints[:, roi_indices].toarray()
+        return image_masks.reshape((*self._image_size, len(roi_indices)))
+
+    def get_roi_pixel_masks(self, roi_ids=None) -> List[np.ndarray]:
+        """
+        Returns the pixel masks of the ROIs from the columns of the sparse footprints.
+
+        Each pixel mask has shape (number of pixels with a positive weight, 3), the columns are the coordinates of
+        the pixels along the height and width of the image and their weights.
+        """
+        footprints = self._image_masks.footprints
+        image_width = self._image_size[1]
+        pixel_masks = []
+        for roi_index in self._get_roi_indices(roi_ids=roi_ids):
+            start, stop = footprints.indptr[roi_index], footprints.indptr[roi_index + 1]
+            pixel_indices, weights = footprints.indices[start:stop], footprints.data[start:stop]
+            is_positive = weights > 0
+            pixel_indices, weights = pixel_indices[is_positive], weights[is_positive]
+            pixel_masks.append(np.vstack((pixel_indices // image_width, pixel_indices % image_width, weights)).T)
+        return pixel_masks
+
+    def get_roi_locations(self, roi_ids=None) -> np.ndarray:
+        footprints = self._image_masks.footprints
+        image_width = self._image_size[1]
+        roi_indices = self._get_roi_indices(roi_ids=roi_ids)
+        roi_locations = np.zeros([2, len(roi_indices)], dtype="int")
+        for location_index, roi_index in enumerate(roi_indices):
+            start, stop = footprints.indptr[roi_index], footprints.indptr[roi_index + 1]
+            pixel_indices, weights = footprints.indices[start:stop], footprints.data[start:stop]
+            if not len(weights) or weights.max() <= 0:
+                # the maximum is one of the zero pixels that are not stored
+                roi_id = self.get_roi_ids()[roi_index]
+                roi_locations[:, location_index] = super().get_roi_locations(roi_ids=[roi_id])[:, 0]
+                continue
+            pixel_indices = pixel_indices[weights == weights.max()]
+            roi_locations[:, location_index] = [
+                np.median(pixel_indices // image_width),
+                np.median(pixel_indices % image_width),
+            ]
+        return roi_locations
@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+from roiextractors.extractors.miniscopeimagingextractor import MiniscopeImagingExtractor
+from roiextractors.extraction_tools import PathType
+
+
+class ConcurrentMiniscopeImagingExtractor(MiniscopeImagingExtractor):
+    """
+    The MiniscopeImagingExtractor that decodes the segments (the msCam .avi files) of a frame range concurrently.
+
+    The frame range is split at the boundaries of the segments, and each part is split again so that there are at
+    least as many parts as threads. Each thread opens its segment and seeks to the start of its part, and writes the
+    decoded frames to their place in the video, so the frames are in order and identical to a sequential read.
+    """
+
+    extractor_name = "ConcurrentMiniscopeImaging"
+
+    def __init__(self, folder_path: PathType, num_threads: int = 1):
+        """
+        The imaging extractor for the raw Miniscope videos (.avi) of a session.
+
+        Parameters
+        ----------
+        folder_path: PathType
+           The folder path that contains the Miniscope data.
+        num_threads: int, default: 1
+            The number of threads that decode the segments. OpenCV releases the GIL while decoding.
+        """
+        super().__init__(folder_path=folder_path)
+        self.num_threads = num_threads
+
+    def get_video(
+        self, start_frame: Optional[int] = None, end_frame: Optional[int] = None, channel: int = 0
+    ) -> np.ndarray:
+        if self.num_threads == 1:
+            return super().get_video(start_frame=start_frame, end_frame=end_frame, channel=channel)
+        if channel != 0:
+            raise NotImplementedError(f"The {self.extractor_name}Extractor does not support multiple channels.")
+
+        start_frame = start_frame if start_frame is not None else 0
+        end_frame = end_frame if end_frame is not None else self.get_num_frames()
+        segments = []
+        for extractor, segment_start_frame, segment_end_frame in zip(
+            self._imaging_extractors, self._start_frames, self._end_frames
+        ):
+            if max(start_frame, segment_start_frame) < min(end_frame, segment_end_frame):
+                segments.append((extractor, segment_start_frame, segment_end_frame))
+
+        # The parts are (extractor, start and end frame in the segment, start frame in the video)
+        parts = []
+        num_parts_per_segment = -(-self.num_threads // len(segments))
+        for extractor, segment_start_frame, segment_end_frame in segments:
+            part_start_frame = max(start_frame, segment_start_frame)
+            part_end_frame = min(end_frame, segment_end_frame)
+            num_frames_per_part = -(-(part_end_frame - part_start_frame) // num_parts_per_segment)
+            for frame in range(part_start_frame, part_end_frame, num_frames_per_part):
+                stop_frame = min(frame + num_frames_per_part, part_end_frame)
+                parts.append(
+                    (extractor, frame - segment_start_frame, stop_frame - segment_start_frame, frame - start_frame)
+                )
+
+        video = np.empty(shape=(end_frame - start_frame, *self.get_image_size()), dtype=self.get_dtype())
+
+        def decode_part(extractor, relative_start_frame: int, relative_end_frame: int, video_start_frame: int):
+            frames = extractor.get_video(start_frame=relative_start_frame, end_frame=relative_end_frame)
+            video[video_start_frame : video_start_frame + len(frames)] = frames
+
+        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+            # The results are collected to raise the errors of the threads
+            for future in [executor.submit(decode_part, *part) for part in parts]:
+                future.result()
+        return video
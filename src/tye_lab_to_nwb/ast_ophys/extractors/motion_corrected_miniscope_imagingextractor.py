@@ -1,11 +1,13 @@
 from typing import Tuple, List, Optional
 
 import numpy as np
-from lazy_ops import DatasetView
 from roiextractors import ImagingExtractor
 
 from neuroconv.utils import FilePathType
 
+# The chunk cache holds at least this many bytes, the default cache of HDF5 (1 MiB) is smaller than one row of chunks
+MIN_CHUNK_CACHE_SIZE = 64 * 1024 * 1024
+
 
 class MotionCorrectedMiniscopeImagingExtractor(ImagingExtractor):
     extractor_name = "MotionCorrectedMiniscopeImaging"
@@ -26,8 +28,24 @@ class MotionCorrectedMiniscopeImagingExtractor(ImagingExtractor):
         file = h5py.File(file_path, mode="r")
         expected_struct_name = "Mr_8bit"
         assert expected_struct_name in file.keys(), f"'{expected_struct_name}' is not in {file_path}."
-        self._video = DatasetView(file[expected_struct_name])
-        self._num_frames, self._width, self._height = self._video.shape
+        dataset = file[expected_struct_name]
+        self._num_frames, self._width, self._height = dataset.shape
+        self._chunks = dataset.chunks
+
+        # The dataset is opened again with a chunk cache that holds (twice) the chunks of a block of frames, so the
+        # chunks that are split between two reads are decompressed once
+        chunk_cache_size = MIN_CHUNK_CACHE_SIZE
+        chunk_cache_num_slots = 521
+        if self._chunks is not None:
+            chunk_size = int(np.prod(self._chunks)) * dataset.dtype.itemsize
+            num_chunks_per_block = int(np.prod(np.ceil(np.divide(dataset.shape[1:], self._chunks[1:]))))
+            chunk_cache_size = max(chunk_cache_size, 2 * num_chunks_per_block * chunk_size)
+            # HDF5 recommends about 100 times more slots than the number of chunks that fit in the cache
+            chunk_cache_num_slots = max(chunk_cache_num_slots, 100 * (chunk_cache_size // chunk_size))
+        dataset_access = h5py.h5p.create(h5py.h5p.DATASET_ACCESS)
+        # The chunks that were read entirely are evicted first
+        dataset_access.set_chunk_cache(chunk_cache_num_slots, chunk_cache_size, 1.0)
+        self._video = h5py.Dataset(h5py.h5d.open(file.id, expected_struct_name.encode(), dapl=dataset_access))
         self._sampling_frequency = None
 
     def get_image_size(self) -> Tuple[int, int]:
@@ -45,7 +63,25 @@ class MotionCorrectedMiniscopeImagingExtractor(ImagingExtractor):
     def get_num_channels(self) -> int:
         return 1
 
+    def get_dtype(self) -> np.dtype:
+        return self._video.dtype
+
+    def get_chunk_shape(self) -> Optional[Tuple[int, int, int]]:
+        """Returns the HDF5 chunk shape of the video in the stored (frames, width, height) order, None if contiguous."""
+        return self._chunks
+
+    def get_stored_video(self, start_frame: Optional[int] = None, end_frame: Optional[int] = None) -> np.ndarray:
+        """
+        Reads the frames in the stored (MATLAB column-major) order, with shape (frames, width, height).
+
+        This is the order of the OnePhotonSeries data, so the frames can be written without transposing them.
+        """
+        return self._video[start_frame:end_frame]
+
     def get_video(
         self, start_frame: Optional[int] = None, end_frame: Optional[int] = None, channel: int = 0
     ) -> np.ndarray:
-        return self._video.lazy_slice[start_frame:end_frame, ...].lazy_transpose(axis_order=(0, 2, 1)).dsetread()
+        # The block is read at once and transposed in a single copy
+        return np.ascontiguousarray(
+            self.get_stored_video(start_frame=start_frame, end_frame=end_frame).transpose(0, 2, 1)
+        )
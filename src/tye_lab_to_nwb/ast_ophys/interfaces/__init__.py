@@ -1,3 +1,4 @@
 from .cnmfe_matlab_segmentationinterface import CnmfeMatlabSegmentationSegmentationInterface
 from .motioncorrected_miniscope_imaginginterface import MotionCorrectedMiniscopeImagingInterface
 from .processed_miniscope_imaginginterface import ProcessedMiniscopeImagingInterface
+from .miniscope_imaginginterface import ConcurrentMiniscopeImagingInterface, ConcurrentMiniscopeConverter
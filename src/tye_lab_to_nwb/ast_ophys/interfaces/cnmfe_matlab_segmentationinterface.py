@@ -1,5 +1,9 @@
+from typing import Optional
+
 from neuroconv.datainterfaces.ophys.basesegmentationextractorinterface import BaseSegmentationExtractorInterface
 from neuroconv.utils import FilePathType
+from pynwb import NWBFile
+
 from tye_lab_to_nwb.ast_ophys.extractors.cnmfe_matlab_segmentationextractor import CnmfeMatlabSegmentationExtractor
 
 
@@ -22,3 +26,55 @@ class CnmfeMatlabSegmentationSegmentationInterface(BaseSegmentationExtractorInte
         imaging_plane_metadata.update(device="Miniscope")
 
         return metadata
+
+    def add_to_nwbfile(
+        self,
+        nwbfile: NWBFile,
+        metadata: Optional[dict] = None,
+        stub_test: bool = False,
+        stub_frames: int = 100,
+        include_roi_centroids: bool = True,
+        include_roi_acceptance: bool = True,
+        mask_type: Optional[str] = "pixel",
+        iterator_options: Optional[dict] = None,
+        compression_options: Optional[dict] = None,
+    ):
+        """
+        Adds the CNMF-E segmentation to the NWB file.
+
+        The ROIs are written as pixel masks by default, which are built from the sparse footprints of the ROIs, so
+        the memory scales with the number of pixels of the footprints instead of the image size times the number
+        of ROIs. Use mask_type="image" to write the dense image masks.
+
+        Parameters
+        ----------
+        nwbfile : NWBFile
+            The NWBFile to add the plane segmentation to.
+        metadata : dict, optional
+            The metadata for the interface.
+        stub_test : bool, default: False
+            Whether to write only the first `stub_frames` frames of the traces.
+        stub_frames : int, default: 100
+            The number of frames of the stub test.
+        include_roi_centroids : bool, default: True
+            Whether to include the ROI centroids on the PlaneSegmentation table.
+        include_roi_acceptance : bool, default: True
+            Whether to include if the detected ROI was 'accepted' or 'rejected'.
+        mask_type : {'pixel', 'image'}, optional
+            The type of the ROI masks, the default is 'pixel'. If None, the masks are not written.
+        iterator_options : dict, optional
+            The options to use when iterating over the traces.
+        compression_options : dict, optional
+            The options to use when compressing the masks and traces.
+        """
+        super().add_to_nwbfile(
+            nwbfile=nwbfile,
+            metadata=metadata,
+            stub_test=stub_test,
+            stub_frames=stub_frames,
+            include_roi_centroids=include_roi_centroids,
+            include_roi_acceptance=include_roi_acceptance,
+            mask_type=mask_type,
+            iterator_options=iterator_options,
+            compression_options=compression_options,
+        )
@@ -0,0 +1,159 @@
+from copy import deepcopy
+from typing import Literal, Optional
+from warnings import warn
+
+from hdmf.backends.hdf5 import H5DataIO
+from neuroconv.datainterfaces import MiniscopeBehaviorInterface, MiniscopeImagingInterface
+from neuroconv.datainterfaces.ophys.miniscope.miniscopeconverter import MiniscopeConverter
+from neuroconv.tools.roiextractors import add_imaging_plane, get_nwb_imaging_metadata
+from neuroconv.utils import FolderPathType, calculate_regular_series_rate, dict_deep_update
+from pynwb import NWBFile
+from pynwb.ophys import OnePhotonSeries
+
+from tye_lab_to_nwb.ast_ophys.extractors import ConcurrentMiniscopeImagingExtractor
+from tye_lab_to_nwb.ast_ophys.tools import get_external_file_paths, verify_external_videos
+
+
+class ConcurrentMiniscopeImagingInterface(MiniscopeImagingInterface):
+    """Data Interface for ConcurrentMiniscopeImagingExtractor."""
+
+    Extractor = ConcurrentMiniscopeImagingExtractor
+
+    def add_to_nwbfile(
+        self,
+        nwbfile: NWBFile,
+        metadata: Optional[dict] = None,
+        photon_series_type: Literal["TwoPhotonSeries", "OnePhotonSeries"] = "OnePhotonSeries",
+        stub_test: bool = False,
+        stub_frames: int = 100,
+        num_decoding_threads: int = 1,
+        external_file: bool = False,
+        external_file_folder_path: Optional[FolderPathType] = None,
+    ):
+        """
+        Adds the raw Miniscope videos as a OnePhotonSeries with the timestamps of the "timeStamps.csv" files.
+
+        Parameters
+        ----------
+        nwbfile : NWBFile
+            The in-memory NWB file.
+        metadata : dict, optional
+            The metadata for the conversion.
+        photon_series_type : {"OnePhotonSeries", "TwoPhotonSeries"}, default: "OnePhotonSeries"
+            The type of the photon series.
+        stub_test : bool, default: False
+            Whether to only write the first `stub_frames` frames.
+        stub_frames : int, default: 100
+            The number of frames that are written for the stub test.
+        num_decoding_threads : int, default: 1
+            The number of threads that decode the segments (.avi files) of the videos concurrently
+            (see `ConcurrentMiniscopeImagingExtractor`). The default is to decode the frames sequentially.
+        external_file : bool, default: False
+            Whether to reference the segments (.avi files) as the external files of the OnePhotonSeries instead of
+            writing their frames. The number of frames of the segments is verified against the timestamps. All the
+            segments are referenced for the stub test as well.
+        external_file_folder_path : FolderPathType, optional
+            The folder of the NWB file, the paths of the external files are relative to it when specified (e.g.
+            when the videos are archived with the NWB file). The default is the absolute paths of the videos.
+        """
+        if external_file:
+            if stub_test:
+                warn(
+                    "The stub test does not apply to the external files, all the segments of the videos are referenced."
+                )
+            self.add_external_files_to_nwbfile(
+                nwbfile=nwbfile, metadata=metadata, external_file_folder_path=external_file_folder_path
+            )
+            return
+
+        # The frames are still written in order, so the timestamps of each folder line up with its frames
+        self.imaging_extractor.num_threads = num_decoding_threads
+        super().add_to_nwbfile(
+            nwbfile=nwbfile,
+            metadata=metadata,
+            photon_series_type=photon_series_type,
+            stub_test=stub_test,
+            stub_frames=stub_frames,
+        )
+
+    def add_external_files_to_nwbfile(
+        self, nwbfile: NWBFile, metadata: dict, external_file_folder_path: Optional[FolderPathType] = None
+    ):
+        """
+        Adds the raw Miniscope videos as a OnePhotonSeries that references the segments (.avi files) with the index
+        of the first frame of each segment and the timestamps of the "timeStamps.csv" files.
+        """
+        from ndx_miniscope.utils import add_miniscope_device
+
+        imaging_extractor = self.imaging_extractor
+        file_paths = [segment_extractor.file_path for segment_extractor in imaging_extractor._imaging_extractors]
+        starting_frames = [int(start_frame) for start_frame in imaging_extractor._start_frames]
+        timestamps = self.get_original_timestamps()
+        verify_external_videos(file_paths=file_paths, starting_frames=starting_frames, num_timestamps=len(timestamps))
+
+        metadata = dict_deep_update(
+            get_nwb_imaging_metadata(imaging_extractor, photon_series_type="OnePhotonSeries"),
+            deepcopy(metadata),
+            append_list=False,
+        )
+        add_miniscope_device(nwbfile=nwbfile, device_metadata=metadata["Ophys"]["Device"][0])
+        add_imaging_plane(nwbfile=nwbfile, metadata=metadata, imaging_plane_index=0)
+        photon_series_kwargs = metadata["Ophys"]["OnePhotonSeries"][0]
+        photon_series_kwargs.update(
+            imaging_plane=nwbfile.get_imaging_plane(name=photon_series_kwargs["imaging_plane"]),
+            dimension=imaging_extractor.get_image_size()[::-1],
+            format="external",
+            external_file=get_external_file_paths(file_paths=file_paths, folder_path=external_file_folder_path),
+            starting_frame=starting_frames,
+        )
+        rate = calculate_regular_series_rate(series=timestamps)
+        if rate:
+            photon_series_kwargs.update(starting_time=timestamps[0], rate=rate)
+        else:
+            photon_series_kwargs.update(timestamps=H5DataIO(data=timestamps, compression="gzip"))
+        nwbfile.add_acquisition(OnePhotonSeries(**photon_series_kwargs))
+
+
+class ConcurrentMiniscopeConverter(MiniscopeConverter):
+    """The MiniscopeConverter that decodes the segments of the Miniscope videos concurrently."""
+
+    def __init__(self, folder_path: FolderPathType, verbose: bool = True):
+        """
+        Initializes the data interfaces for the Miniscope recording and behavioral data stream.
+
+        Parameters
+        ----------
+        folder_path : FolderPathType
+            The path to the main Miniscope folder.
+        verbose : bool, default: True
+            Controls verbosity.
+        """
+        self.verbose = verbose
+        self.data_interface_objects = dict(
+            MiniscopeImaging=ConcurrentMiniscopeImagingInterface(folder_path=folder_path),
+            MiniscopeBehavCam=MiniscopeBehaviorInterface(folder_path=folder_path),
+        )
+
+    def add_to_nwbfile(
+        self,
+        nwbfile: NWBFile,
+        metadata,
+        stub_test: bool = False,
+        stub_frames: int = 100,
+        num_decoding_threads: int = 1,
+        external_file: bool = False,
+        external_file_folder_path: Optional[FolderPathType] = None,
+    ):
+        self.data_interface_objects["MiniscopeImaging"].add_to_nwbfile(
+            nwbfile=nwbfile,
+            metadata=metadata,
+            stub_test=stub_test,
+            stub_frames=stub_frames,
+            num_decoding_threads=num_decoding_threads,
+            external_file=external_file,
+            external_file_folder_path=external_file_folder_path,
+        )
+        self.data_interface_objects["MiniscopeBehavCam"].add_to_nwbfile(
+            nwbfile=nwbfile,
+            metadata=metadata,
+        )
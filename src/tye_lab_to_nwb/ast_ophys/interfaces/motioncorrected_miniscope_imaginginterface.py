@@ -2,7 +2,6 @@ from pathlib import Path
 from typing import Optional, List
 
 import numpy as np
-import pandas as pd
 from neuroconv.datainterfaces.ophys.baseimagingextractorinterface import BaseImagingExtractorInterface
 from neuroconv.tools.roiextractors import get_nwb_imaging_metadata
 from neuroconv.utils import ArrayType, FilePathType, dict_deep_update
@@ -11,7 +10,12 @@ from pynwb import NWBFile
 from tye_lab_to_nwb.ast_ophys.extractors.motion_corrected_miniscope_imagingextractor import (
     MotionCorrectedMiniscopeImagingExtractor,
 )
-from tye_lab_to_nwb.ast_ophys.tools import load_timestamps_from_mat, add_processed_one_photon_series
+from tye_lab_to_nwb.ast_ophys.tools import (
+    get_session_timestamps,
+    add_processed_one_photon_series,
+    MotionCorrectedMiniscopeDataChunkIterator,
+)
+from tye_lab_to_nwb.tools import add_time_intervals, build_time_intervals
 
 
 class MotionCorrectedMiniscopeImagingInterface(BaseImagingExtractorInterface):
@@ -34,16 +38,14 @@ class MotionCorrectedMiniscopeImagingInterface(BaseImagingExtractorInterface):
         """
 
         self.timestamps_file_path = Path(timestamps_file_path)
-        self._timestamps_arr = load_timestamps_from_mat(self.timestamps_file_path)
+        self._session_timestamps = get_session_timestamps(file_path=self.timestamps_file_path)
 
         super().__init__(file_path=file_path)
 
     def get_original_timestamps(self) -> np.ndarray:
-        frames = load_timestamps_from_mat(self.timestamps_file_path)
-        # also shift to start from zero beacuse of matlab start from 1.0
-        frames = frames[~np.isnan(frames[:, 5]), 4] - 1
-        timestamps = frames / self.imaging_extractor.get_sampling_frequency()
-        return timestamps
+        # the frame indices of the kept frames are shifted to start from zero beacuse of matlab start from 1.0
+        sampling_frequency = self.imaging_extractor.get_sampling_frequency()
+        return self._session_timestamps.get_timestamps(sampling_frequency=sampling_frequency)
 
     def get_metadata(self) -> dict:
         metadata = super().get_metadata()
@@ -77,33 +79,23 @@ class MotionCorrectedMiniscopeImagingInterface(BaseImagingExtractorInterface):
         nwbfile: NWBFile,
         reward_trials_indices: Optional[List[int]] = None,
     ):
-        trial_frame_times = pd.DataFrame(self._timestamps_arr)
-        # the first three frame indices for each trial are NaNs
-        trial_frame_times = trial_frame_times.dropna()
-
-        # get the trial start and end frames (column 2 corresponds to trial index starting from 1, column 4 corresponds to frame indices starting from 1
-        trial_frame_indices = trial_frame_times.groupby(2).aggregate({4: ["min", "max"]}).values
-        # shift frame indices to zero because matlab starts from 1
-        trial_frame_indices -= 1
-        # frame to time
-        trial_frame_times_values = trial_frame_indices / self.imaging_extractor.get_sampling_frequency()
-
-        for trial_frame_times_value in trial_frame_times_values:
-            nwbfile.add_trial(
-                start_time=trial_frame_times_value[0],
-                stop_time=trial_frame_times_value[1],
-            )
-
-        num_trials = trial_frame_times_values.shape[0]
+        # the trial start and end times are the first and last kept frames of each trial (the first three are deleted)
+        sampling_frequency = self.imaging_extractor.get_sampling_frequency()
+        trial_times = self._session_timestamps.get_trial_times(sampling_frequency=sampling_frequency)
+
+        columns = dict()
         if reward_trials_indices is not None:
-            trial_types = [
-                "Reward" if (trial_ind + 1) in reward_trials_indices else "Shock" for trial_ind in range(num_trials)
-            ]
-            nwbfile.add_trial_column(
-                name="trial_type",
-                description="Defines whether the trial was reward or shock.",
-                data=trial_types,
-            )
+            # the trial numbers of the reward trials start from 1
+            is_reward_trial = np.isin(np.arange(1, len(trial_times) + 1), reward_trials_indices)
+            columns.update(trial_type=np.where(is_reward_trial, "Reward", "Shock"))
+
+        trials = build_time_intervals(
+            start_times=trial_times[:, 0],
+            stop_times=trial_times[:, 1],
+            columns=columns,
+            column_descriptions=dict(trial_type="Defines whether the trial was reward or shock."),
+        )
+        add_time_intervals(nwbfile=nwbfile, time_intervals=trials)
 
         return nwbfile
 
@@ -131,4 +123,6 @@ class MotionCorrectedMiniscopeImagingInterface(BaseImagingExtractorInterface):
             imaging=imaging_extractor,
             timestamps=timestamps,
             photon_series_index=photon_series_index,
+            # The frames are read in blocks of whole chunks of the "Mr_8bit" dataset and written without transposing
+            data_chunk_iterator=MotionCorrectedMiniscopeDataChunkIterator(imaging_extractor=imaging_extractor),
         )
@@ -1,14 +1,21 @@
 from pathlib import Path
 from typing import Optional
+from warnings import warn
 
 import numpy as np
 from neuroconv.datainterfaces.ophys.baseimagingextractorinterface import BaseImagingExtractorInterface
 from pynwb import NWBFile
 from roiextractors.extractors.miniscopeimagingextractor.miniscopeimagingextractor import _MiniscopeImagingExtractor
-from neuroconv.utils import FilePathType, dict_deep_update
+from neuroconv.utils import FilePathType, FolderPathType, dict_deep_update
 from neuroconv.tools.roiextractors import get_nwb_imaging_metadata
 
-from tye_lab_to_nwb.ast_ophys.tools import load_timestamps_from_mat, add_processed_one_photon_series
+from tye_lab_to_nwb.ast_ophys.tools import (
+    get_session_timestamps,
+    add_processed_one_photon_series,
+    ParallelVideoDataChunkIterator,
+    get_external_file_paths,
+    verify_external_videos,
+)
 
 
 class ProcessedMiniscopeImagingInterface(BaseImagingExtractorInterface):
@@ -31,16 +38,14 @@ class ProcessedMiniscopeImagingInterface(BaseImagingExtractorInterface):
         """
 
         self.timestamps_file_path = Path(timestamps_file_path)
-        self._timestamps_arr = load_timestamps_from_mat(self.timestamps_file_path)
+        self._session_timestamps = get_session_timestamps(file_path=self.timestamps_file_path)
 
         super().__init__(file_path=file_path)
 
     def get_original_timestamps(self) -> np.ndarray:
-        frames = load_timestamps_from_mat(self.timestamps_file_path)
-        # also shift to start from zero beacuse of matlab start from 1.0
-        frames = frames[~np.isnan(frames[:, 5]), 4] - 1
-        timestamps = frames / self.imaging_extractor.get_sampling_frequency()
-        return timestamps
+        # the frame indices of the kept frames are shifted to start from zero beacuse of matlab start from 1.0
+        sampling_frequency = self.imaging_extractor.get_sampling_frequency()
+        return self._session_timestamps.get_timestamps(sampling_frequency=sampling_frequency)
 
     def get_metadata(self) -> dict:
         metadata = super().get_metadata()
@@ -76,9 +81,55 @@ class ProcessedMiniscopeImagingInterface(BaseImagingExtractorInterface):
         stub_test: bool = False,
         stub_frames: int = 100,
         photon_series_index: int = 0,
+        num_decoding_threads: int = 1,
+        external_file: bool = False,
+        external_file_folder_path: Optional[FolderPathType] = None,
     ):
+        """
+        Adds the processed Miniscope video as a OnePhotonSeries to the "ophys" processing module.
+
+        Parameters
+        ----------
+        nwbfile : NWBFile
+            The in-memory NWB file.
+        metadata : dict, optional
+            The metadata for the conversion.
+        stub_test : bool, default: False
+            Whether to only write the first `stub_frames` frames.
+        stub_frames : int, default: 100
+            The number of frames that are written for the stub test.
+        photon_series_index : int, default: 0
+            The index of the OnePhotonSeries in the metadata.
+        num_decoding_threads : int, default: 1
+            The number of threads that decode the frames of the video concurrently
+            (see `tye_lab_to_nwb.ast_ophys.tools.ParallelVideoDataChunkIterator`). The default is to decode the frames
+            sequentially.
+        external_file : bool, default: False
+            Whether to reference the video (.avi) file as the external file of the OnePhotonSeries instead of writing
+            its frames. The number of frames of the video is verified against the timestamps. The whole video is
+            referenced for the stub test as well.
+        external_file_folder_path : FolderPathType, optional
+            The folder of the NWB file, the path of the external file is relative to it when specified (e.g.
+            when the video is archived with the NWB file). The default is the absolute path of the video.
+        """
         imaging_extractor = self.imaging_extractor
         timestamps = self.get_original_timestamps()
+        if external_file:
+            if stub_test:
+                warn("The stub test does not apply to the external file, the whole processed video is referenced.")
+            file_paths = [self.source_data["file_path"]]
+            verify_external_videos(file_paths=file_paths, starting_frames=[0], num_timestamps=len(timestamps))
+            add_processed_one_photon_series(
+                nwbfile=nwbfile,
+                metadata=metadata,
+                photon_series_index=photon_series_index,
+                imaging=imaging_extractor,
+                timestamps=timestamps,
+                external_files=get_external_file_paths(file_paths=file_paths, folder_path=external_file_folder_path),
+                starting_frames=[0],
+            )
+            return
+
         if stub_test:
             stub_frames = min([stub_frames, self.imaging_extractor.get_num_frames()])
             imaging_extractor = self.imaging_extractor.frame_slice(start_frame=0, end_frame=stub_frames)
@@ -90,4 +141,9 @@ class ProcessedMiniscopeImagingInterface(BaseImagingExtractorInterface):
             photon_series_index=photon_series_index,
             imaging=imaging_extractor,
             timestamps=timestamps,
+            data_chunk_iterator=(
+                ParallelVideoDataChunkIterator(imaging_extractor=imaging_extractor, num_threads=num_decoding_threads)
+                if num_decoding_threads > 1
+                else None
+            ),
         )
@@ -1,2 +1,7 @@
-from .timestamps import load_timestamps_from_mat
+from .timestamps import load_timestamps_from_mat, get_session_timestamps, MiniscopeSessionTimestamps
 from .add_photon_series_to_processing import add_processed_one_photon_series
+from .motion_corrected_data_chunk_iterator import MotionCorrectedMiniscopeDataChunkIterator
+from .parallel_video_data_chunk_iterator import ParallelVideoDataChunkIterator
+from .external_videos import get_external_file_paths, get_video_frame_count, verify_external_videos
+from .movie_pyramid import MoviePyramidTap, compute_movie_pyramids, get_movie_pyramid_level
+from .fluorescence_reextraction import FluorescenceReextractionTap, reextract_fluorescence
@@ -1,5 +1,5 @@
 from copy import deepcopy
-from typing import Optional
+from typing import List, Optional
 
 import numpy as np
 from hdmf.backends.hdf5 import H5DataIO
@@ -19,6 +19,9 @@ def add_processed_one_photon_series(
     timestamps: np.ndarray,
     photon_series_index: Optional[int] = 1,
     metadata: Optional[dict] = None,
+    data_chunk_iterator: Optional[ImagingExtractorDataChunkIterator] = None,
+    external_files: Optional[List[str]] = None,
+    starting_frames: Optional[List[int]] = None,
 ):
     add_imaging_plane(nwbfile=nwbfile, metadata=metadata, imaging_plane_index=0)
     imaging_plane_name = metadata["Ophys"]["ImagingPlane"][0]["name"]
@@ -27,11 +30,17 @@ def add_processed_one_photon_series(
     photon_series_kwargs = deepcopy(metadata["Ophys"]["OnePhotonSeries"][photon_series_index])
     photon_series_kwargs.update(
         imaging_plane=imaging_plane,
-        # H5DataIO wrap should be eventually removed
-        data=H5DataIO(data=ImagingExtractorDataChunkIterator(imaging_extractor=imaging), compression=True),
         dimension=imaging.get_image_size()[::-1],
         unit="n.a.",
     )
+    if external_files is not None:
+        # The frames are referenced in the video files instead of being written to the NWB file
+        photon_series_kwargs.update(format="external", external_file=external_files, starting_frame=starting_frames)
+    else:
+        if data_chunk_iterator is None:
+            data_chunk_iterator = ImagingExtractorDataChunkIterator(imaging_extractor=imaging)
+        # H5DataIO wrap should be eventually removed
+        photon_series_kwargs.update(data=H5DataIO(data=data_chunk_iterator, compression=True))
 
     rate = calculate_regular_series_rate(timestamps)
     if rate is not None:
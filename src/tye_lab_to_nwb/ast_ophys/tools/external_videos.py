@@ -0,0 +1,97 @@
+import os
+from pathlib import Path
+from typing import List, Optional
+
+from neuroconv.utils import FilePathType, FolderPathType
+
+
+def get_external_file_paths(file_paths: List[FilePathType], folder_path: Optional[FolderPathType] = None) -> List[str]:
+    """
+    Returns the paths of the external files of a series, relative to the folder of the NWB file when it is specified.
+
+    Parameters
+    ----------
+    file_paths : list of FilePathType
+        The paths to the files.
+    folder_path : FolderPathType, optional
+        The folder of the NWB file, the default is to return the absolute paths.
+    """
+    file_paths = [Path(file_path).absolute() for file_path in file_paths]
+    if folder_path is None:
+        return [str(file_path) for file_path in file_paths]
+    return [os.path.relpath(file_path, start=Path(folder_path).absolute()) for file_path in file_paths]
+
+
+def get_video_frame_count(file_path: FilePathType) -> int:
+    """
+    Returns the number of frames of a video (.avi) file, checking that the last frame can be decoded.
+
+    The frame count of the header is verified by decoding the last frame and checking that there is no frame after
+    it, without decoding the rest of the video.
+
+    Parameters
+    ----------
+    file_path : FilePathType
+        The path to the video file.
+    """
+    try:
+        import cv2
+    except ImportError:
+        raise ImportError("To verify the external videos, install opencv: pip install opencv-python-headless")
+
+    video_capture = cv2.VideoCapture(str(file_path))
+    try:
+        if not video_capture.isOpened():
+            raise ValueError(f"Unable to open the video '{file_path}'.")
+        num_frames = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        if num_frames:
+            video_capture.set(cv2.CAP_PROP_POS_FRAMES, num_frames - 1)
+            has_last_frame, _ = video_capture.read()
+            has_extra_frame, _ = video_capture.read()
+            if not has_last_frame or has_extra_frame:
+                raise ValueError(
+                    f"The number of frames of the video '{file_path}' ({num_frames}) in its header does not match "
+                    "the number of frames that can be decoded."
+                )
+    finally:
+        video_capture.release()
+    return num_frames
+
+
+def verify_external_videos(file_paths: List[FilePathType], starting_frames: List[int], num_timestamps: int):
+    """
+    Verifies that the frames of the external videos of a series match its timestamps.
+
+    The starting frames must be the number of frames of the videos before each video, and the total number of
+    frames of the videos must be the number of timestamps.
+
+    Parameters
+    ----------
+    file_paths : list of FilePathType
+        The paths to the video files, in the order of the frames of the series.
+    starting_frames : list of int
+        The index of the first frame of each video in the series.
+    num_timestamps : int
+        The number of timestamps of the series.
+
+    Raises
+    ------
+    ValueError
+        When the number of frames of the videos does not match the starting frames or the timestamps.
+    """
+    assert len(file_paths) == len(
+        starting_frames
+    ), "The number of external files must match the length of 'starting_frames'."
+    num_frames = 0
+    for file_path, starting_frame in zip(file_paths, starting_frames):
+        if starting_frame != num_frames:
+            raise ValueError(
+                f"The starting frame of the video '{file_path}' is {starting_frame}, but the previous videos have "
+                f"{num_frames} frames."
+            )
+        num_frames += get_video_frame_count(file_path=file_path)
+    if num_frames != num_timestamps:
+        raise ValueError(
+            f"The external videos have {num_frames} frames, but there are {num_timestamps} timestamps "
+            f"(the first video is '{file_paths[0]}')."
+        )
@@ -0,0 +1,157 @@
+from contextlib import contextmanager
+from typing import List, Tuple, Union
+from warnings import warn
+
+import numpy as np
+from hdmf.backends.hdf5 import H5DataIO
+from hdmf.data_utils import DataIO
+from neuroconv import BaseDataInterface, NWBConverter
+from neuroconv.utils import FilePathType
+from pynwb import NWBFile, TimeSeries
+from pynwb.ophys import Fluorescence, ImageSegmentation, RoiResponseSeries
+from scipy.sparse import csc_matrix
+
+from tye_lab_to_nwb.tools.chunk_taps import ChunkTap, tap_chunk_iterators
+
+REEXTRACTED_SERIES_NAME = "RoiResponseSeriesReextracted"
+# The number of frames of the blocks of a chunk that are multiplied by the footprints at once
+NUM_FRAMES_PER_BLOCK = 64
+
+
+class FluorescenceReextractionTap(ChunkTap):
+    """
+    Accumulates the fluorescence of the ROIs from the written chunks of a movie (e.g. the motion corrected Miniscope
+    OnePhotonSeries) and adds the traces as the "RoiResponseSeriesReextracted" RoiResponseSeries of the
+    "Fluorescence" of the "ophys" processing module.
+
+    The fluorescence of each ROI is the mean of the pixels weighted by its footprint, computed as the product of the
+    sparse footprints and the frames of each chunk (in blocks of `NUM_FRAMES_PER_BLOCK` frames), so the movie is not
+    read a second time.
+    """
+
+    def __init__(
+        self,
+        series: TimeSeries,
+        shape: Tuple[int, ...],
+        dtype: np.dtype,
+        footprints: csc_matrix,
+        image_size: Tuple[int, int],
+    ):
+        super().__init__(series=series, shape=shape, dtype=dtype)
+        height, width = image_size
+        # The frames are written with shape (width, height), the pixels of the footprints are in (height, width) order
+        written_pixel_indices = np.arange(width * height)
+        pixel_indices = (written_pixel_indices % height) * width + written_pixel_indices // height
+        self.weights = footprints.tocsr()[pixel_indices].T.tocsr().astype(np.float32)
+        self.weight_sums = np.asarray(footprints.sum(axis=0)).ravel()
+        self.traces = np.zeros((shape[0], footprints.shape[1]), dtype=np.float64)
+
+    def update(self, data: np.ndarray, selection: Tuple[slice, ...]):
+        weights = self.weights
+        pixel_selection = tuple(selection[1:3])
+        if any(axis_selection != slice(0, length) for axis_selection, length in zip(pixel_selection, self.shape[1:3])):
+            # The chunks can cover part of the frame
+            written_pixel_indices = np.arange(np.prod(self.shape[1:3])).reshape(self.shape[1:3])
+            weights = weights[:, written_pixel_indices[pixel_selection].ravel()]
+        # The frames are converted to float32 in blocks, the write buffers are not copied at once
+        first_frame = selection[0].start or 0
+        for start in range(0, len(data), NUM_FRAMES_PER_BLOCK):
+            block = data[start : start + NUM_FRAMES_PER_BLOCK]
+            frames = np.asarray(block, dtype=np.float32).reshape(len(block), -1)
+            frame_selection = slice(first_frame + start, first_frame + start + len(block))
+            self.traces[frame_selection] += (weights @ frames.T).T
+
+    def get_traces(self) -> np.ndarray:
+        """Returns the fluorescence of each ROI with shape (number of frames, number of ROIs)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (self.traces / np.where(self.weight_sums > 0, self.weight_sums, np.nan)).astype(np.float32)
+
+    def add_to_nwbfile(self, nwbfile: NWBFile):
+        series = self.series
+        ophys_module = nwbfile.processing["ophys"]
+        image_segmentation = next(
+            data_interface
+            for data_interface in ophys_module.data_interfaces.values()
+            if isinstance(data_interface, ImageSegmentation)
+        )
+        plane_segmentation = next(iter(image_segmentation.plane_segmentations.values()))
+        traces = self.get_traces()
+        rois = plane_segmentation.create_roi_table_region(
+            region=list(range(traces.shape[1])), description="The ROIs of the CNMF-E segmentation."
+        )
+        timestamps = series.timestamps
+        if isinstance(timestamps, DataIO):
+            timestamps = timestamps.data
+        if timestamps is not None:
+            timing = dict(timestamps=H5DataIO(np.asarray(timestamps), compression="gzip"))
+        else:
+            timing = dict(starting_time=series.starting_time or 0.0, rate=series.rate)
+
+        if "Fluorescence" in ophys_module.data_interfaces:
+            fluorescence = ophys_module["Fluorescence"]
+        else:
+            fluorescence = Fluorescence(name="Fluorescence")
+            ophys_module.add(fluorescence)
+        fluorescence.add_roi_response_series(
+            RoiResponseSeries(
+                name=REEXTRACTED_SERIES_NAME,
+                description=(
+                    f"The fluorescence of the ROIs re-extracted from {series.name}, the mean of the pixels of each "
+                    "frame weighted by the CNMF-E footprint of the ROI (for the comparison with the CNMF-E traces)."
+                ),
+                data=H5DataIO(traces, compression="gzip"),
+                rois=rois,
+                unit="n.a.",
+                **timing,
+            )
+        )
+
+
+@contextmanager
+def reextract_fluorescence(
+    converter: Union[BaseDataInterface, NWBConverter],
+    nwbfile_path: FilePathType,
+    series_name: str,
+    footprints: csc_matrix,
+    image_size: Tuple[int, int],
+):
+    """
+    Computes the fluorescence of the ROIs from a movie while it is written and adds the traces to the NWB file when
+    the conversion succeeds (see `FluorescenceReextractionTap`).
+
+    The fluorescence is accumulated from the chunks of the movie as they are written
+    (see `tye_lab_to_nwb.tools.chunk_taps`). When the footprints do not have the size of the frames of the movie
+    (e.g. the segmentation was run on a different movie) the fluorescence is not computed.
+
+    Parameters
+    ----------
+    converter : NWBConverter or BaseDataInterface
+        The converter (or single data interface) that runs the conversion.
+    nwbfile_path : FilePathType
+        The path to the NWB file of the conversion.
+    series_name : str
+        The name of the OnePhotonSeries of the movie (e.g. "OnePhotonSeriesMotionCorrected").
+    footprints : csc_matrix
+        The footprints of the ROIs with shape (number of pixels, number of ROIs), the pixels are in the order of the
+        flattened (height, width) image (see `CnmfeMatlabSegmentationExtractor.get_roi_footprints`).
+    image_size : tuple of int
+        The height and width of the image of the footprints.
+    """
+
+    def create_taps(series: TimeSeries, shape: Tuple[int, ...], dtype: np.dtype) -> List[ChunkTap]:
+        if series.name != series_name or len(shape) != 3 or not shape[0]:
+            return []
+        if sorted(shape[1:]) != sorted(image_size) or footprints.shape[0] != np.prod(image_size):
+            warn(
+                f"The frames of {series_name} {shape[1:]} do not match the footprints of the ROIs {tuple(image_size)}, "
+                "the fluorescence is not re-extracted."
+            )
+            return []
+        return [
+            FluorescenceReextractionTap(
+                series=series, shape=shape, dtype=dtype, footprints=footprints, image_size=image_size
+            )
+        ]
+
+    with tap_chunk_iterators(converter=converter, nwbfile_path=nwbfile_path, create_taps=create_taps):
+        yield
@@ -0,0 +1,87 @@
+from typing import Optional, Tuple
+
+import numpy as np
+from neuroconv.tools.roiextractors.imagingextractordatachunkiterator import ImagingExtractorDataChunkIterator
+from roiextractors.imagingextractor import FrameSliceImagingExtractor
+
+from tye_lab_to_nwb.ast_ophys.extractors import MotionCorrectedMiniscopeImagingExtractor
+
+
+class MotionCorrectedMiniscopeDataChunkIterator(ImagingExtractorDataChunkIterator):
+    """
+    DataChunkIterator for the motion corrected Miniscope video that reads the frames in their stored order and in
+    blocks that are aligned to the HDF5 chunks of the "Mr_8bit" dataset.
+
+    The "Mr_8bit" dataset has the (frames, width, height) order of the OnePhotonSeries, so the frames are written
+    without being transposed. By default the chunks of the written dataset are made of whole source chunks and
+    each buffer is a whole number of them, so every source chunk is read and decompressed once.
+    """
+
+    def __init__(
+        self,
+        imaging_extractor: MotionCorrectedMiniscopeImagingExtractor,
+        buffer_gb: Optional[float] = None,
+        buffer_shape: Optional[tuple] = None,
+        chunk_mb: Optional[float] = None,
+        chunk_shape: Optional[tuple] = None,
+        display_progress: bool = False,
+        progress_bar_options: Optional[dict] = None,
+    ):
+        """
+        Initialize the iterator over the frames of the motion corrected video.
+
+        Parameters
+        ----------
+        imaging_extractor : MotionCorrectedMiniscopeImagingExtractor
+            The extractor of the video, or a frame slice of it (e.g. for the stub test).
+        buffer_gb : float, optional
+            The upper bound on size in gigabytes (GB) of each buffer, the default is 1 GB.
+        buffer_shape : tuple, optional
+            Manual specification of buffer shape, must be a multiple of chunk_shape along each axis.
+        chunk_mb : float, optional
+            The upper bound on size in megabytes (MB) of the chunks of the written dataset, the chunks are then not
+            aligned to the source chunks.
+        chunk_shape : tuple, optional
+            Manual specification of the chunk shape of the written dataset. The default is a whole number of source
+            chunks along the frames, up to about 1 MB.
+        display_progress : bool, optional
+            Display a progress bar with iteration rate and estimated completion time.
+        progress_bar_options : dict, optional
+            Dictionary of keyword arguments to be passed directly to tqdm.
+        """
+        # The frame slices of the stub test read from the video of their parent
+        self._video_extractor = imaging_extractor
+        self._frame_offset = 0
+        if isinstance(imaging_extractor, FrameSliceImagingExtractor):
+            self._video_extractor = imaging_extractor._parent_imaging
+            self._frame_offset = imaging_extractor._start_frame
+
+        if chunk_mb is None and chunk_shape is None:
+            chunk_shape = self._get_aligned_chunk_shape(imaging_extractor=imaging_extractor)
+
+        super().__init__(
+            imaging_extractor=imaging_extractor,
+            buffer_gb=buffer_gb,
+            buffer_shape=buffer_shape,
+            chunk_mb=chunk_mb,
+            chunk_shape=chunk_shape,
+            display_progress=display_progress,
+            progress_bar_options=progress_bar_options,
+        )
+
+    def _get_aligned_chunk_shape(self, imaging_extractor, target_chunk_size: float = 1e6) -> Optional[tuple]:
+        num_frames = imaging_extractor.get_num_frames()
+        source_chunk_shape = self._video_extractor.get_chunk_shape()
+        if source_chunk_shape is None:
+            return None
+        source_chunk_size = int(np.prod(source_chunk_shape)) * imaging_extractor.get_dtype().itemsize
+        num_source_chunks = max(1, int(target_chunk_size // source_chunk_size))
+        num_chunk_frames = min(source_chunk_shape[0] * num_source_chunks, num_frames)
+        return (num_chunk_frames,) + tuple(source_chunk_shape[1:])
+
+    def _get_data(self, selection: Tuple[slice]) -> np.ndarray:
+        frames = self._video_extractor.get_stored_video(
+            start_frame=self._frame_offset + selection[0].start,
+            end_frame=self._frame_offset + selection[0].stop,
+        )
+        return frames[(slice(None),) + tuple(selection[1:])]
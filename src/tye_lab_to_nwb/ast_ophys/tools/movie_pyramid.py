@@ -0,0 +1,301 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import h5py
+import numpy as np
+from hdmf.backends.hdf5 import H5DataIO
+from hdmf.data_utils import DataChunkIterator, DataIO
+from neuroconv import BaseDataInterface, NWBConverter
+from neuroconv.utils import FilePathType, FolderPathType
+from pynwb import NWBFile, TimeSeries
+from pynwb.ophys import OnePhotonSeries
+
+from tye_lab_to_nwb.tools.chunk_taps import ChunkTap, tap_chunk_iterators
+
+# The number of frames, rows and columns of each bin of the levels of the pyramid
+DEFAULT_BINNING_FACTORS = (2, 4, 8)
+# The number of frames of the blocks of a chunk that are binned at once
+NUM_FRAMES_PER_BLOCK = 32
+
+
+def _get_bin_counts(length: int, factor: int) -> np.ndarray:
+    return np.minimum(factor, length - np.arange(0, length, factor))
+
+
+def _get_level_shape(shape: Tuple[int, ...], factor: int) -> Tuple[int, ...]:
+    return tuple(-(-length // factor) for length in shape[:3]) + tuple(shape[3:])
+
+
+class MoviePyramidTap(ChunkTap):
+    """
+    Accumulates the binned means of a movie (e.g. the processed and motion corrected Miniscope OnePhotonSeries)
+    from its written chunks, and adds the levels of the pyramid to the "ophys" processing module.
+
+    Each level is a OnePhotonSeries named "<series name>_binned_<factor>" whose frames are the means of the bins of
+    `factor` frames, rows and columns of the movie (the last bin of each axis can be smaller), in the dtype of the
+    movie (the means of the integer movies are rounded half up). The chunks are binned in blocks of
+    `NUM_FRAMES_PER_BLOCK` frames, only the sums of the bins of frames that are not complete yet are kept in memory
+    (a single frame of each level when the chunks are written in order), and the complete bins are written to a
+    temporary HDF5 file next to the NWB file, from which the levels are copied when the conversion succeeds.
+    """
+
+    def __init__(
+        self,
+        series: TimeSeries,
+        shape: Tuple[int, ...],
+        dtype: np.dtype,
+        binning_factors: Tuple[int, ...] = DEFAULT_BINNING_FACTORS,
+        temporary_folder_path: Optional[FolderPathType] = None,
+    ):
+        super().__init__(series=series, shape=shape, dtype=dtype)
+        self.binning_factors = sorted(binning_factors)
+        for factor in self.binning_factors[1:]:
+            assert (
+                factor % self.binning_factors[0] == 0
+            ), f"The binning factors ({self.binning_factors}) must be multiples of the smallest factor."
+        self.base_factor = self.binning_factors[0]
+        num_values_per_bin = self.base_factor ** len(shape[:3])
+        if (
+            np.issubdtype(dtype, np.unsignedinteger)
+            and np.iinfo(dtype).max * num_values_per_bin <= np.iinfo(np.uint16).max
+        ):
+            self.sum_dtype = np.dtype("uint16")
+        elif np.issubdtype(dtype, np.integer):
+            self.sum_dtype = np.dtype("int64")
+        else:
+            self.sum_dtype = np.dtype("float64")
+        # The sums of the coarser levels are accumulated in the widest dtype
+        self.level_sum_dtype = np.dtype("int64") if np.issubdtype(dtype, np.integer) else np.dtype("float64")
+        self.num_values_per_frame = int(np.prod(shape[1:]))
+
+        # The sums and the number of summed values of the bins of frames of each level that are not complete yet
+        self.pending_sums = {factor: dict() for factor in self.binning_factors}
+        self.pending_counts = {factor: dict() for factor in self.binning_factors}
+
+        file_descriptor, temporary_file_path = tempfile.mkstemp(suffix=".h5", dir=temporary_folder_path)
+        os.close(file_descriptor)
+        self.temporary_file_path = Path(temporary_file_path)
+        self.temporary_file = h5py.File(self.temporary_file_path, mode="w")
+        self.levels = dict()
+        for factor in self.binning_factors:
+            level_shape = _get_level_shape(shape=shape, factor=factor)
+            self.levels[factor] = self.temporary_file.create_dataset(
+                name=str(factor), shape=level_shape, dtype=dtype, chunks=(1, *level_shape[1:])
+            )
+
+    def update(self, data: np.ndarray, selection: Tuple[slice, ...]):
+        first_frame = selection[0].start or 0
+        for start in range(0, len(data), NUM_FRAMES_PER_BLOCK):
+            block = data[start : start + NUM_FRAMES_PER_BLOCK]
+            frame_selection = slice(first_frame + start, first_frame + start + len(block))
+            self._update_block(data=block, selection=(frame_selection, *selection[1:]))
+
+    def _update_block(self, data: np.ndarray, selection: Tuple[slice, ...]):
+        # The chunks can start or stop in the middle of a bin along any of the binned axes
+        base_bin_indices = []
+        base_sums = data
+        for axis, axis_selection in enumerate(selection[:3]):
+            start, stop = axis_selection.start or 0, axis_selection.stop
+            first_bin, last_bin = start // self.base_factor, (stop - 1) // self.base_factor
+            bin_starts = np.arange(first_bin + 1, last_bin + 1) * self.base_factor - start
+            bin_starts = np.concatenate([[0], bin_starts])
+            base_sums = np.add.reduceat(base_sums, bin_starts, axis=axis, dtype=self.sum_dtype)
+            base_bin_indices.append(np.arange(first_bin, last_bin + 1))
+
+        frame_start, frame_stop = selection[0].start or 0, selection[0].stop
+        for factor in self.binning_factors:
+            # The bins of the coarser levels are unions of the bins of the finest level
+            level_sums = base_sums
+            level_bin_indices = [indices // (factor // self.base_factor) for indices in base_bin_indices]
+            if factor != self.base_factor:
+                for axis, indices in enumerate(level_bin_indices):
+                    group_starts = np.flatnonzero(np.diff(indices, prepend=-1))
+                    level_sums = np.add.reduceat(level_sums, group_starts, axis=axis, dtype=self.level_sum_dtype)
+                    level_bin_indices[axis] = indices[group_starts]
+            frame_bins, row_bins, column_bins = level_bin_indices
+            spatial_selection = (
+                slice(row_bins[0], row_bins[-1] + 1),
+                slice(column_bins[0], column_bins[-1] + 1),
+                *selection[3:],
+            )
+            for frame_sums, frame_bin in zip(level_sums, frame_bins):
+                frame_bin = int(frame_bin)
+                if frame_bin not in self.pending_sums[factor]:
+                    level_frame_shape = _get_level_shape(shape=self.shape, factor=factor)[1:]
+                    self.pending_sums[factor][frame_bin] = np.zeros(level_frame_shape, dtype=self.level_sum_dtype)
+                    self.pending_counts[factor][frame_bin] = 0
+                self.pending_sums[factor][frame_bin][spatial_selection] += frame_sums
+                num_frames = min(frame_stop, (frame_bin + 1) * factor) - max(frame_start, frame_bin * factor)
+                self.pending_counts[factor][frame_bin] += num_frames * int(np.prod(data.shape[1:]))
+
+                bin_num_frames = min(factor, self.shape[0] - frame_bin * factor)
+                if self.pending_counts[factor][frame_bin] == bin_num_frames * self.num_values_per_frame:
+                    self._write_frame(factor=factor, frame_bin=frame_bin)
+
+    def _write_frame(self, factor: int, frame_bin: int):
+        # The means of the integer movies are rounded half up in integer arithmetic
+        sums = self.pending_sums[factor].pop(frame_bin)
+        del self.pending_counts[factor][frame_bin]
+        row_counts, column_counts = [_get_bin_counts(length=length, factor=factor) for length in self.shape[1:3]]
+        counts = min(factor, self.shape[0] - frame_bin * factor) * np.multiply.outer(row_counts, column_counts)
+        counts = counts.reshape(*counts.shape, *(1,) * (sums.ndim - 2))
+        if np.issubdtype(self.dtype, np.integer):
+            means = (sums + counts // 2) // counts
+        else:
+            means = sums / counts
+        self.levels[factor][frame_bin] = means.astype(self.dtype)
+
+    def get_level(self, factor: int) -> np.ndarray:
+        """Returns the binned movie of a level in the dtype of the movie, the bins that are not complete are written."""
+        for frame_bin in list(self.pending_sums[factor]):
+            self._write_frame(factor=factor, frame_bin=frame_bin)
+        return self.levels[factor][()]
+
+    def add_to_nwbfile(self, nwbfile: NWBFile):
+        series = self.series
+        ophys_module = nwbfile.processing[series.parent.name]
+        written_series = ophys_module[series.name]
+        timestamps = series.timestamps
+        if isinstance(timestamps, DataIO):
+            timestamps = timestamps.data
+        for factor in self.binning_factors:
+            # The bins that are not complete (e.g. the chunks of a failed write) are divided by the full counts
+            for frame_bin in list(self.pending_sums[factor]):
+                self._write_frame(factor=factor, frame_bin=frame_bin)
+            level = self.levels[factor]
+            # The level is copied from the temporary file while it is written
+            movie = DataChunkIterator(
+                data=level, maxshape=level.shape, dtype=self.dtype, buffer_size=min(level.shape[0], 16)
+            )
+            if timestamps is not None:
+                timing = dict(timestamps=np.asarray(timestamps[::factor]))
+            else:
+                timing = dict(starting_time=series.starting_time or 0.0, rate=series.rate / factor)
+            dimension = None
+            if series.dimension is not None:
+                dimension = [-(-int(length) // factor) for length in series.dimension]
+            ophys_module.add(
+                OnePhotonSeries(
+                    name=f"{series.name}_binned_{factor}",
+                    description=(
+                        f"The means of the bins of {factor} frames, {factor} rows and {factor} columns of "
+                        f"{series.name}, the timestamps are the times of the first frame of each bin."
+                    ),
+                    data=H5DataIO(movie, compression="gzip", chunks=(min(level.shape[0], 16), *level.shape[1:])),
+                    imaging_plane=written_series.imaging_plane,
+                    unit=series.unit,
+                    dimension=dimension,
+                    binning=int(series.binning or 1) * factor,
+                    **timing,
+                )
+            )
+
+    def close(self):
+        """Closes and removes the temporary file of the levels."""
+        self.temporary_file.close()
+        self.temporary_file_path.unlink(missing_ok=True)
+
+
+@contextmanager
+def compute_movie_pyramids(
+    converter: Union[BaseDataInterface, NWBConverter],
+    nwbfile_path: FilePathType,
+    movie_pyramid: Optional[bool] = True,
+    binning_factors: Tuple[int, ...] = DEFAULT_BINNING_FACTORS,
+):
+    """
+    Computes the pyramids of the OnePhotonSeries of the "ophys" processing module (the processed and motion
+    corrected Miniscope movies) while they are written, and adds them to the module when the conversion succeeds
+    (see `MoviePyramidTap`).
+
+    The bins are accumulated from the chunks of the movies as they are written
+    (see `tye_lab_to_nwb.tools.chunk_taps`), so the movies are read once. The complete bins are kept in temporary
+    HDF5 files in the folder of the NWB file until the conversion ends. When `movie_pyramid` is False nothing is
+    computed.
+
+    Parameters
+    ----------
+    converter : NWBConverter or BaseDataInterface
+        The converter (or single data interface) that runs the conversion.
+    nwbfile_path : FilePathType
+        The path to the NWB file of the conversion.
+    movie_pyramid : bool, default: True
+        Whether to compute the pyramids.
+    binning_factors : tuple of int, default: (2, 4, 8)
+        The binning factor of each level, the factors must be multiples of the smallest one.
+    """
+    if not movie_pyramid:
+        yield
+        return
+
+    def create_taps(series: TimeSeries, shape: Tuple[int, ...], dtype: np.dtype) -> List[ChunkTap]:
+        if not isinstance(series, OnePhotonSeries) or series.parent is None or series.parent.name != "ophys":
+            return []
+        if len(shape) < 3 or not shape[0] or not np.issubdtype(dtype, np.number):
+            return []
+        return [
+            MoviePyramidTap(
+                series=series,
+                shape=shape,
+                dtype=dtype,
+                binning_factors=binning_factors,
+                temporary_folder_path=Path(nwbfile_path).parent,
+            )
+        ]
+
+    with tap_chunk_iterators(converter=converter, nwbfile_path=nwbfile_path, create_taps=create_taps):
+        yield
+
+
+def get_movie_pyramid_level(
+    nwbfile_path: FilePathType,
+    series_name: str,
+    min_image_size: Tuple[int, int],
+    min_rate: Optional[float] = None,
+) -> Tuple[str, int]:
+    """
+    Returns the coarsest level of the pyramid of a movie that has at least the requested resolution.
+
+    Parameters
+    ----------
+    nwbfile_path : FilePathType
+        The path to the NWB file.
+    series_name : str
+        The name of the OnePhotonSeries in the "ophys" processing module (e.g. "OnePhotonSeriesProcessed").
+    min_image_size : tuple of int
+        The minimum size of the frames along the second and third axes of the data (e.g. the size of a display).
+    min_rate : float, optional
+        The minimum frame rate in Hz, the default is any rate.
+
+    Returns
+    -------
+    series_name : str
+        The name of the level (or of the movie itself when no level has the requested resolution).
+    binning_factor : int
+        The number of frames, rows and columns of each bin of the level, 1 for the movie itself.
+    """
+    with h5py.File(nwbfile_path, mode="r") as file:
+        ophys_group = file["processing/ophys"]
+        series_group = ophys_group[series_name]
+        if "starting_time" in series_group:
+            rate = series_group["starting_time"].attrs["rate"]
+        else:
+            timestamps = series_group["timestamps"]
+            rate = (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+
+        level_name, level_factor = series_name, 1
+        for name, group in ophys_group.items():
+            if not name.startswith(f"{series_name}_binned_"):
+                continue
+            factor = int(name.rsplit("_", maxsplit=1)[1])
+            image_size = group["data"].shape[1:3]
+            if any(length < min_length for length, min_length in zip(image_size, min_image_size)):
+                continue
+            if min_rate is not None and rate / factor < min_rate:
+                continue
+            if factor > level_factor:
+                level_name, level_factor = name, factor
+    return level_name, level_factor
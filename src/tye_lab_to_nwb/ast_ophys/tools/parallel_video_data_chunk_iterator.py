@@ -0,0 +1,136 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+from neuroconv.tools.roiextractors.imagingextractordatachunkiterator import ImagingExtractorDataChunkIterator
+from roiextractors import ImagingExtractor
+from roiextractors.imagingextractor import FrameSliceImagingExtractor
+
+
+class ParallelVideoDataChunkIterator(ImagingExtractorDataChunkIterator):
+    """
+    DataChunkIterator that decodes the frames of a video (e.g. the processed Miniscope .avi) with several threads.
+
+    Each buffer is split into frame ranges that are decoded concurrently, every thread opening the video and seeking
+    to the start of its range (OpenCV decodes from the preceding keyframe), so the frames are identical to the frames
+    of a sequential read. The frame ranges are reassembled in order. While the writer compresses a buffer the next
+    one is decoded, so at most two buffers are in memory. The buffers cover whole frames, the decoding threads are
+    stopped when the last buffer is read or when the iteration stops early.
+    """
+
+    def __init__(
+        self,
+        imaging_extractor: ImagingExtractor,
+        num_threads: int = 4,
+        buffer_gb: Optional[float] = None,
+        buffer_shape: Optional[tuple] = None,
+        chunk_mb: Optional[float] = None,
+        chunk_shape: Optional[tuple] = None,
+        display_progress: bool = False,
+        progress_bar_options: Optional[dict] = None,
+    ):
+        """
+        Initialize the iterator over the frames of the video.
+
+        Parameters
+        ----------
+        imaging_extractor : ImagingExtractor
+            The extractor of the video, or a frame slice of it (e.g. for the stub test). The get_video of the
+            extractor must be safe to call from several threads (e.g. it opens the video on every call).
+        num_threads : int, default: 4
+            The number of threads that decode the frames. OpenCV releases the GIL while decoding.
+        buffer_gb : float, optional
+            The upper bound on size in gigabytes (GB) of each buffer, the default is 1 GB.
+        buffer_shape : tuple, optional
+            Manual specification of buffer shape, must be a multiple of chunk_shape along the first axis and cover
+            whole frames.
+        chunk_mb : float, optional
+            The upper bound on size in megabytes (MB) of the chunks of the written dataset, the default is 1 MB.
+        chunk_shape : tuple, optional
+            Manual specification of the chunk shape of the written dataset.
+        display_progress : bool, optional
+            Display a progress bar with iteration rate and estimated completion time.
+        progress_bar_options : dict, optional
+            Dictionary of keyword arguments to be passed directly to tqdm.
+        """
+        assert num_threads >= 1, f"The number of threads ({num_threads}) must be at least one."
+        self.num_threads = num_threads
+        # The frame slices of the stub test decode the video of their parent
+        self._video_extractor = imaging_extractor
+        self._frame_offset = 0
+        if isinstance(imaging_extractor, FrameSliceImagingExtractor):
+            self._video_extractor = imaging_extractor._parent_imaging
+            self._frame_offset = imaging_extractor._start_frame
+        self._executor = None
+        self._next_buffer = None
+
+        super().__init__(
+            imaging_extractor=imaging_extractor,
+            buffer_gb=buffer_gb,
+            buffer_shape=buffer_shape,
+            chunk_mb=chunk_mb,
+            chunk_shape=chunk_shape,
+            display_progress=display_progress,
+            progress_bar_options=progress_bar_options,
+        )
+        # The frames are decoded whole, so the buffers (which are prefetched by their frame range) cover whole frames
+        assert tuple(self.buffer_shape[1:]) == tuple(self.maxshape[1:]), (
+            f"The buffer shape {self.buffer_shape} must cover whole frames {tuple(self.maxshape[1:])}, "
+            "only the number of frames of the buffers can be specified."
+        )
+
+    def _submit_buffer(self, start_frame: int, end_frame: int) -> List[Future]:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.num_threads)
+        num_frames_per_range = -(-(end_frame - start_frame) // self.num_threads)
+        return [
+            self._executor.submit(
+                self._video_extractor.get_video,
+                start_frame=self._frame_offset + range_start_frame,
+                end_frame=self._frame_offset + min(range_start_frame + num_frames_per_range, end_frame),
+            )
+            for range_start_frame in range(start_frame, end_frame, num_frames_per_range)
+        ]
+
+    def _cancel_next_buffer(self):
+        if self._next_buffer is not None:
+            for frame_range in self._next_buffer[1]:
+                frame_range.cancel()
+            self._next_buffer = None
+
+    def _shutdown_executor(self):
+        self._cancel_next_buffer()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def __del__(self):
+        # The iteration can stop before the last buffer (e.g. when the write fails)
+        self._shutdown_executor()
+
+    def _get_data(self, selection: Tuple[slice]) -> np.ndarray:
+        start_frame, end_frame = selection[0].start, selection[0].stop
+        if self._next_buffer is not None and self._next_buffer[0] == (start_frame, end_frame):
+            frame_ranges = self._next_buffer[1]
+            self._next_buffer = None
+        else:
+            # The buffers are requested in order while writing, any other request is decoded on demand
+            self._cancel_next_buffer()
+            frame_ranges = self._submit_buffer(start_frame=start_frame, end_frame=end_frame)
+
+        num_frames = self.maxshape[0]
+        if end_frame < num_frames:
+            next_end_frame = min(end_frame + self.buffer_shape[0], num_frames)
+            next_frame_ranges = self._submit_buffer(start_frame=end_frame, end_frame=next_end_frame)
+            self._next_buffer = ((end_frame, next_end_frame), next_frame_ranges)
+
+        try:
+            video = np.concatenate([frame_range.result() for frame_range in frame_ranges])
+        except BaseException:
+            self._shutdown_executor()
+            raise
+        if self._next_buffer is None:
+            self._shutdown_executor()
+
+        transpose_axes = (0, 2, 1) if len(video.shape) == 3 else (0, 2, 1, 3)
+        return video.transpose(transpose_axes)[(slice(None),) + tuple(selection[1:])]
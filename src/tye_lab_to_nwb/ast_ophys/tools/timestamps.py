@@ -1,8 +1,90 @@
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
 from neuroconv.utils import FilePathType
 from pymatreader import read_mat
 
+# The columns of "timestampsMsAllCumul" that are used (0-based): the trial number (starting from 1), the frame number
+# within the session (starting from 1) and the kept time in the trial (NaN for the frames that were deleted)
+TRIAL_NUMBER_COLUMN = 2
+FRAME_NUMBER_COLUMN = 4
+KEPT_TIME_COLUMN = 5
+
+# The parsed timestamps by the resolved path, the modification time and the size of the .mat file
+_session_timestamps: Dict[Tuple[str, int, int], "MiniscopeSessionTimestamps"] = dict()
+
 
 def load_timestamps_from_mat(file_path: FilePathType):
     mat_file = read_mat(str(file_path))
     assert "timestampsMsAllCumul" in mat_file, f"Unable to find the expected 'timestampsMsAllCumul' in {file_path}"
     return mat_file["timestampsMsAllCumul"]
+
+
+class MiniscopeSessionTimestamps:
+    """
+    The frames of a session from the "timestampsMsAllCumul" .mat file, shared by the interfaces of the session.
+
+    Only the trial number, the frame index (shifted to start from zero) and whether the frame was kept (the first
+    three frames of each trial are deleted from the processed and motion corrected videos) are kept from the matrix.
+    The timestamps and the trial boundaries of the kept frames are computed once.
+    """
+
+    def __init__(self, timestamps_arr: np.ndarray):
+        timestamps_arr = np.asarray(timestamps_arr)
+        self.trial_numbers = timestamps_arr[:, TRIAL_NUMBER_COLUMN].astype(np.uint16)
+        # shift frame indices to zero because matlab starts from 1
+        self.frame_indices = (timestamps_arr[:, FRAME_NUMBER_COLUMN] - 1).astype(np.uint32)
+        self.is_kept = ~np.isnan(timestamps_arr[:, KEPT_TIME_COLUMN])
+
+        self.kept_frame_indices = self.frame_indices[self.is_kept]
+        # get the first and last kept frame of each trial, in the order of the trial numbers
+        kept_trial_numbers = self.trial_numbers[self.is_kept]
+        trial_order = np.argsort(kept_trial_numbers, kind="stable")
+        sorted_frame_indices = self.kept_frame_indices[trial_order]
+        _, trial_starts = np.unique(kept_trial_numbers[trial_order], return_index=True)
+        if len(trial_starts):
+            self.trial_frame_indices = np.stack(
+                [
+                    np.minimum.reduceat(sorted_frame_indices, trial_starts),
+                    np.maximum.reduceat(sorted_frame_indices, trial_starts),
+                ],
+                axis=1,
+            )
+        else:
+            self.trial_frame_indices = np.empty((0, 2), dtype=np.uint32)
+        self._timestamps: Dict[float, np.ndarray] = dict()
+
+    def get_timestamps(self, sampling_frequency: float) -> np.ndarray:
+        """Returns the timestamps of the kept frames, the arrays are shared and must not be modified."""
+        if sampling_frequency not in self._timestamps:
+            timestamps = self.kept_frame_indices / sampling_frequency
+            timestamps.flags.writeable = False
+            self._timestamps[sampling_frequency] = timestamps
+        return self._timestamps[sampling_frequency]
+
+    def get_trial_times(self, sampling_frequency: float) -> np.ndarray:
+        """Returns the times of the first and last kept frame of each trial with shape (number of trials, 2)."""
+        return self.trial_frame_indices / sampling_frequency
+
+
+def get_session_timestamps(file_path: FilePathType) -> MiniscopeSessionTimestamps:
+    """
+    Returns the timestamps of a session from the "timestampsMsAllCumul" .mat file, which is parsed only once.
+
+    The parsed file is reused by every interface that is given the same file, until the file is modified.
+
+    Parameters
+    ----------
+    file_path : FilePathType
+        The path that points to the .mat file with the "timestampsMsAllCumul" matrix.
+    """
+    file_path = Path(file_path).resolve()
+    file_stat = file_path.stat()
+    key = (str(file_path), file_stat.st_mtime_ns, file_stat.st_size)
+    if key not in _session_timestamps:
+        # The previous versions of the file are not used anymore
+        for previous_key in [previous_key for previous_key in _session_timestamps if previous_key[0] == key[0]]:
+            del _session_timestamps[previous_key]
+        _session_timestamps[key] = MiniscopeSessionTimestamps(load_timestamps_from_mat(file_path=file_path))
+    return _session_timestamps[key]
@@ -0,0 +1,2 @@
+from .run_benchmarks import run_benchmarks, compare_benchmark_results
+from .time_intervals_benchmark import benchmark_time_intervals
@@ -0,0 +1,309 @@
+"""Runs each conversion pipeline on synthetic data and records the throughput, the peak memory and the output size."""
+
+import importlib
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+from neuroconv.utils import FilePathType, FolderPathType
+
+from tye_lab_to_nwb.benchmarks.synthetic_data import (
+    generate_cnmfe_neuron_mat,
+    generate_deeplabcut_csv,
+    generate_discrimination_events_mat,
+    generate_miniscope_avi,
+    generate_motion_corrected_mat,
+    generate_openephys_legacy_folder,
+    generate_phy_folder,
+    generate_photometry_csv,
+    generate_plexon_like_sorting_mat,
+    generate_spikeglx_files,
+    generate_tiff_stack,
+    generate_timestamps_mat,
+)
+
+
+def generate_ast_ecephys_session(folder_path: Path, size_factor: float) -> Tuple[dict, List[Path]]:
+    duration = 60.0 * size_factor
+    ecephys_folder_path = generate_openephys_legacy_folder(folder_path=folder_path / "openephys", duration=duration)
+    # The units with less than 1000 spikes are filtered out by the AStSortingExtractor
+    group_mat_file_path = generate_plexon_like_sorting_mat(
+        file_path=folder_path / "units.mat", duration=duration, firing_rate=max(150.0, 2000.0 / duration)
+    )
+    events_file_path = generate_discrimination_events_mat(file_path=folder_path / "events.mat", duration=duration)
+    session_kwargs = dict(
+        ecephys_recording_folder_path=ecephys_folder_path,
+        group_mat_file_path=group_mat_file_path,
+        events_file_path=events_file_path,
+    )
+    return session_kwargs, [ecephys_folder_path, group_mat_file_path, events_file_path]
+
+
+def generate_ast_neuropixels_session(folder_path: Path, size_factor: float) -> Tuple[dict, List[Path]]:
+    duration = 5.0 * size_factor
+    ap_bin_file_path = generate_spikeglx_files(folder_path=folder_path, duration=duration)
+    phy_folder_path = generate_phy_folder(folder_path=folder_path / "phy", duration=duration)
+    histology_image_file_path = generate_tiff_stack(file_path=folder_path / "histology.tif", rgb=True)
+    session_kwargs = dict(
+        neuropixels_file_path=ap_bin_file_path,
+        phy_sorting_folder_path=phy_folder_path,
+        histology_image_file_path=histology_image_file_path,
+    )
+    return session_kwargs, [ap_bin_file_path.parent, phy_folder_path, histology_image_file_path]
+
+
+def generate_ast_ophys_session(folder_path: Path, size_factor: float) -> Tuple[dict, List[Path]]:
+    num_trials = max(1, int(10 * size_factor))
+    frames_per_trial = 103
+    # The first three frames of each trial were deleted from the processed movies
+    num_frames = num_trials * (frames_per_trial - 3)
+    timestamps_mat_file_path = generate_timestamps_mat(
+        file_path=folder_path / "timestamps.mat", num_trials=num_trials, frames_per_trial=frames_per_trial
+    )
+    processed_miniscope_avi_file_path = generate_miniscope_avi(
+        file_path=folder_path / "synthetic_disc1_msCamAll_ffd.avi", num_frames=num_frames
+    )
+    motion_corrected_mat_file_path = generate_motion_corrected_mat(
+        file_path=folder_path / "motion_corrected.mat", num_frames=num_frames
+    )
+    segmentation_mat_file_path = generate_cnmfe_neuron_mat(file_path=folder_path / "neuron.mat", num_frames=num_frames)
+    session_kwargs = dict(
+        processed_miniscope_avi_file_path=processed_miniscope_avi_file_path,
+        motion_corrected_mat_file_path=motion_corrected_mat_file_path,
+        timestamps_mat_file_path=timestamps_mat_file_path,
+        segmentation_mat_file_path=segmentation_mat_file_path,
+        session_start_time="2023-08-21T15:30:00",
+    )
+    return session_kwargs, [
+        timestamps_mat_file_path,
+        processed_miniscope_avi_file_path,
+        motion_corrected_mat_file_path,
+        segmentation_mat_file_path,
+    ]
+
+
+def generate_fiber_photometry_session(folder_path: Path, size_factor: float) -> Tuple[dict, List[Path]]:
+    data_file_path = generate_photometry_csv(file_path=folder_path / "photometry.csv", duration=600.0 * size_factor)
+    session_kwargs = dict(data_file_path=data_file_path, session_start_time="2023-08-21T15:30:00")
+    return session_kwargs, [data_file_path]
+
+
+def generate_neurotensin_valence_session(folder_path: Path, size_factor: float) -> Tuple[dict, List[Path]]:
+    duration = 60.0 * size_factor
+    ecephys_folder_path = generate_openephys_legacy_folder(folder_path=folder_path / "openephys", duration=duration)
+    events_file_path = generate_discrimination_events_mat(file_path=folder_path / "events.mat", duration=duration)
+    pose_estimation_file_path = generate_deeplabcut_csv(
+        file_path=folder_path / "pose_estimation.csv", num_frames=int(30 * duration)
+    )
+    session_kwargs = dict(
+        ecephys_recording_folder_path=ecephys_folder_path,
+        events_file_path=events_file_path,
+        pose_estimation_file_path=pose_estimation_file_path,
+        pose_estimation_sampling_rate=30.0,
+    )
+    return session_kwargs, [ecephys_folder_path, events_file_path, pose_estimation_file_path]
+
+
+# The module of the session_to_nwb function and the generator of the synthetic session for each pipeline
+BENCHMARK_SESSIONS: Dict[str, Tuple[str, Callable]] = dict(
+    ast_ecephys=("tye_lab_to_nwb.ast_ecephys.convert_session", generate_ast_ecephys_session),
+    ast_neuropixels=("tye_lab_to_nwb.ast_neuropixels.convert_session", generate_ast_neuropixels_session),
+    ast_ophys=("tye_lab_to_nwb.ast_ophys.convert_session", generate_ast_ophys_session),
+    fiber_photometry=("tye_lab_to_nwb.fiber_photometry.convert_session", generate_fiber_photometry_session),
+    neurotensin_valence=(
+        "tye_lab_to_nwb.neurotensin_valence.neurotensin_valence_convert_session",
+        generate_neurotensin_valence_session,
+    ),
+)
+
+
+def _get_size(path: Path) -> int:
+    path = Path(path)
+    if path.is_dir():
+        return sum(file_path.stat().st_size for file_path in path.rglob("*") if file_path.is_file())
+    return path.stat().st_size
+
+
+def _get_peak_memory() -> int:
+    # The maximum resident set size is reported in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _get_error_summary(traceback_text: str) -> str:
+    # The exception is the last line of the traceback that is not indented
+    lines = [line for line in traceback_text.strip().splitlines() if line and not line[0].isspace()]
+    return lines[-1] if lines else ""
+
+
+def _run_session(module_name: str, session_kwargs: dict, result_queue: multiprocessing.Queue):
+    session_to_nwb = importlib.import_module(module_name).session_to_nwb
+    baseline_memory = _get_peak_memory()
+    start_time = time.perf_counter()
+    try:
+        session_to_nwb(**session_kwargs)
+    except Exception:
+        # The sources are read before the conversion is started, errors there are raised instead of logged
+        result_queue.put(dict(error=_get_error_summary(traceback.format_exc())))
+        return
+    seconds = time.perf_counter() - start_time
+    result_queue.put(dict(seconds=seconds, baseline_memory_bytes=baseline_memory, peak_memory_bytes=_get_peak_memory()))
+
+
+def _get_git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def run_benchmarks(
+    folder_path: FolderPathType,
+    pipelines: Optional[List[str]] = None,
+    size_factor: float = 1.0,
+    session_kwargs: Optional[dict] = None,
+) -> Path:
+    """
+    Converts a synthetic session with each pipeline and saves the measurements to a JSON file.
+
+    Each conversion runs in a fresh process so that the peak memory is measured for that conversion alone.
+    The synthetic source data is generated once for each size factor and reused by later runs.
+
+    Parameters
+    ----------
+    folder_path : FolderPathType
+        The folder where the synthetic data, the NWB files and the results are written.
+    pipelines : list of str, optional
+        The pipelines to benchmark (the keys of `BENCHMARK_SESSIONS`), the default is to benchmark all of them.
+    size_factor : float, default: 1.0
+        Scales the duration (or the number of frames) of the synthetic sessions.
+    session_kwargs : dict, optional
+        Additional keyword arguments for every session_to_nwb call (e.g. dict(repack=True)).
+
+    Returns
+    -------
+    results_file_path : Path
+        The path to the JSON file with the throughput (MB/s of source data), the peak memory and the output size
+        of each pipeline, together with the git commit of the repository.
+    """
+    folder_path = Path(folder_path)
+    pipelines = pipelines or list(BENCHMARK_SESSIONS)
+    data_folder_path = folder_path / "synthetic_data" / f"size_factor_{size_factor}"
+    nwbfiles_folder_path = folder_path / "nwbfiles"
+    nwbfiles_folder_path.mkdir(parents=True, exist_ok=True)
+
+    # Spawned processes do not inherit the state (e.g. imported modules) of this process
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for pipeline in pipelines:
+        module_name, generate_session = BENCHMARK_SESSIONS[pipeline]
+        pipeline_data_folder_path = data_folder_path / pipeline
+        generated_marker_file_path = pipeline_data_folder_path / ".generated.json"
+        if generated_marker_file_path.exists():
+            pipeline_session_kwargs, input_paths = json.loads(generated_marker_file_path.read_text())
+        else:
+            pipeline_data_folder_path.mkdir(parents=True, exist_ok=True)
+            pipeline_session_kwargs, input_paths = generate_session(
+                folder_path=pipeline_data_folder_path, size_factor=size_factor
+            )
+            pipeline_session_kwargs = {key: str(value) for key, value in pipeline_session_kwargs.items()}
+            input_paths = [str(input_path) for input_path in input_paths]
+            generated_marker_file_path.write_text(json.dumps([pipeline_session_kwargs, input_paths]))
+
+        nwbfile_path = nwbfiles_folder_path / f"{pipeline}.nwb"
+        error_log_file_path = nwbfiles_folder_path / f"{pipeline}_error_log.txt"
+        for file_path in [nwbfile_path, error_log_file_path]:
+            file_path.unlink(missing_ok=True)
+
+        result_queue = context.Queue()
+        process = context.Process(
+            target=_run_session,
+            kwargs=dict(
+                module_name=module_name,
+                session_kwargs=dict(
+                    nwbfile_path=str(nwbfile_path),
+                    subject_metadata=dict(subject_id="synthetic", sex="U"),
+                    **pipeline_session_kwargs,
+                    **(session_kwargs or {}),
+                ),
+                result_queue=result_queue,
+            ),
+        )
+        process.start()
+        process.join()
+        measurements = result_queue.get() if not result_queue.empty() else dict()
+
+        input_size = sum(_get_size(input_path) for input_path in input_paths)
+        result = dict(pipeline=pipeline, input_size_bytes=input_size)
+        # The session_to_nwb functions do not raise, the errors are written to the error log next to the NWB file
+        if process.exitcode != 0 or "seconds" not in measurements or error_log_file_path.exists():
+            result.update(status="failed", error=measurements.get("error", f"exit code {process.exitcode}"))
+            if error_log_file_path.exists():
+                result.update(error=_get_error_summary(error_log_file_path.read_text()))
+        else:
+            result.update(
+                status="succeeded",
+                **measurements,
+                output_size_bytes=nwbfile_path.stat().st_size,
+                throughput_mb_per_second=input_size / 1e6 / measurements["seconds"],
+            )
+        results.append(result)
+
+    commit = _get_git_commit()
+    benchmark = dict(
+        commit=commit,
+        created=datetime.now().isoformat(timespec="seconds"),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        size_factor=size_factor,
+        results=results,
+    )
+    results_file_path = folder_path / f"benchmark_{(commit or 'unknown')[:8]}_{datetime.now():%Y%m%d%H%M%S}.json"
+    results_file_path.write_text(json.dumps(benchmark, indent=2))
+    return results_file_path
+
+
+def compare_benchmark_results(
+    baseline_results_file_path: FilePathType,
+    results_file_path: FilePathType,
+) -> pd.DataFrame:
+    """
+    Compares the measurements of two benchmark runs (e.g. of two commits) for each pipeline.
+
+    Returns
+    -------
+    comparison : pandas.DataFrame
+        The throughput, peak memory and output size of both runs and their ratios (current / baseline).
+    """
+    columns = ["throughput_mb_per_second", "peak_memory_bytes", "output_size_bytes"]
+    benchmarks = []
+    for file_path in [baseline_results_file_path, results_file_path]:
+        benchmark = json.loads(Path(file_path).read_text())
+        benchmarks.append(pd.DataFrame(benchmark["results"]).set_index("pipeline").reindex(columns=columns))
+
+    comparison = benchmarks[0].join(benchmarks[1], lsuffix="_baseline", rsuffix="_current", how="outer")
+    for column in columns:
+        comparison[f"{column}_ratio"] = comparison[f"{column}_current"] / comparison[f"{column}_baseline"]
+    return comparison
+
+
+if __name__ == "__main__":
+    # The folder where the synthetic data, the NWB files and the benchmark results are written
+    folder_path = Path("/Volumes/t7-ssd/benchmarks")
+
+    # Scales the size of the synthetic sessions (1.0 is about a minute of ecephys recording)
+    size_factor = 1.0
+
+    results_file_path = run_benchmarks(folder_path=folder_path, size_factor=size_factor)
+    print(json.dumps(json.loads(results_file_path.read_text()), indent=2))
@@ -0,0 +1,654 @@
+"""Generators of synthetic source data in the formats that are read by the conversion pipelines."""
+
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import h5py
+import numpy as np
+import pandas as pd
+from neuroconv.utils import FilePathType, FolderPathType
+from scipy.io import savemat
+from scipy.sparse import csc_matrix
+
+from tye_lab_to_nwb.tools.follow import OPENEPHYS_CONTINUOUS_DTYPE, OPENEPHYS_HEADER_SIZE, OPENEPHYS_RECORD_SIZE
+
+OPENEPHYS_EVENTS_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        ("sample_pos", "<i2"),
+        ("event_type", "u1"),
+        ("processor_id", "u1"),
+        ("event_id", "u1"),
+        ("chan_id", "u1"),
+        ("record_num", "<u2"),
+    ]
+)
+
+# The body parts of the DeepLabCut output in the Neurotensin experiment
+DEEPLABCUT_BODY_PARTS = [
+    "TopLeft",
+    "BotLeft",
+    "TopRight",
+    "BotRight",
+    "Port",
+    "Head",
+    "Electrode",
+    "LeftEar",
+    "RightEar",
+    "MouseTail",
+]
+
+
+def _get_spike_trains(num_units: int, duration: float, firing_rate: float, seed: int) -> List[np.ndarray]:
+    """Returns sorted Poisson spike times (in seconds) with a different firing rate for each unit."""
+    random_number_generator = np.random.default_rng(seed)
+    spike_trains = []
+    for _ in range(num_units):
+        unit_firing_rate = firing_rate * random_number_generator.uniform(0.5, 2.0)
+        num_spikes = random_number_generator.poisson(unit_firing_rate * duration)
+        spike_trains.append(np.sort(random_number_generator.uniform(0, duration, size=num_spikes)))
+    return spike_trains
+
+
+def _get_traces(num_samples: int, num_channels: int, seed: int) -> np.ndarray:
+    """Returns int16 traces of band-limited noise, which compress similarly to real extracellular recordings."""
+    random_number_generator = np.random.default_rng(seed)
+    noise = random_number_generator.normal(scale=40.0, size=(num_samples, num_channels))
+    # A short moving average removes the highest frequencies
+    kernel = np.ones(4) / 4
+    for channel_index in range(num_channels):
+        noise[:, channel_index] = np.convolve(noise[:, channel_index], kernel, mode="same")
+    return noise.astype(np.int16)
+
+
+def _get_movie(num_frames: int, height: int, width: int, seed: int) -> np.ndarray:
+    """Returns uint8 frames (frames x height x width) of a static background with blinking neurons and shot noise."""
+    random_number_generator = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    background = 60 + 40 * np.exp(-(((y - height / 2) / height) ** 2 + ((x - width / 2) / width) ** 2) * 4)
+
+    # The footprints of the neurons are small Gaussian patches, stored sparse (pixels x neurons)
+    num_neurons = max(1, height * width // 400)
+    patch_y, patch_x = np.mgrid[-6:7, -6:7]
+    patch = np.exp(-(patch_y**2 + patch_x**2) / 8.0).ravel()
+    center_y = random_number_generator.integers(0, height, size=num_neurons)
+    center_x = random_number_generator.integers(0, width, size=num_neurons)
+    pixel_y = (center_y[:, None] + patch_y.ravel()).clip(0, height - 1)
+    pixel_x = (center_x[:, None] + patch_x.ravel()).clip(0, width - 1)
+    footprints = csc_matrix(
+        (
+            np.tile(patch, num_neurons),
+            ((pixel_y * width + pixel_x).ravel(), np.repeat(np.arange(num_neurons), patch.size)),
+        ),
+        shape=(height * width, num_neurons),
+    )
+
+    activity = random_number_generator.exponential(scale=20.0, size=(num_frames, num_neurons))
+    movie = np.empty((num_frames, height, width), dtype=np.uint8)
+    for frame_index in range(num_frames):
+        frame = background + (footprints @ activity[frame_index]).reshape(height, width)
+        frame += random_number_generator.normal(scale=3.0, size=frame.shape)
+        movie[frame_index] = np.clip(frame, 0, 255)
+    return movie
+
+
+def _get_openephys_header(
+    channel: str, channel_type: str, sampling_frequency: float, session_start_time: datetime
+) -> bytes:
+    header = (
+        "header.format = 'Open Ephys Data Format'; \n"
+        "header.version = 0.4;\n"
+        f"header.header_bytes = {OPENEPHYS_HEADER_SIZE};\n"
+        "header.description = 'each record contains one 64-bit timestamp, one 16-bit sample count (N), "
+        "1 uint16 recordingNumber, N 16-bit samples, and one 10-byte record marker (0 1 2 3 4 5 6 7 8 255)'; \n"
+        f"header.date_created = '{session_start_time.strftime('%d-%b-%Y %H%M%S')}';\n"
+        f"header.channel = '{channel}';\n"
+        f"header.channelType = '{channel_type}';\n"
+        f"header.sampleRate = {int(sampling_frequency)};\n"
+        f"header.blockLength = {OPENEPHYS_RECORD_SIZE};\n"
+        f"header.bufferSize = {OPENEPHYS_RECORD_SIZE};\n"
+        "header.bitVolts = 0.195;\n"
+    )
+    return header.encode("ascii").ljust(OPENEPHYS_HEADER_SIZE, b" ")
+
+
+def _get_openephys_records(first_record_index: int, num_records: int) -> np.ndarray:
+    records = np.zeros(num_records, dtype=OPENEPHYS_CONTINUOUS_DTYPE)
+    records["timestamp"] = np.arange(first_record_index, first_record_index + num_records) * OPENEPHYS_RECORD_SIZE
+    records["nb_sample"] = OPENEPHYS_RECORD_SIZE
+    records["markers"] = [0, 1, 2, 3, 4, 5, 6, 7, 8, 255]
+    return records
+
+
+def generate_openephys_legacy_folder(
+    folder_path: FolderPathType,
+    num_channels: int = 16,
+    duration: float = 10.0,
+    sampling_frequency: float = 30000.0,
+    session_start_time: Optional[datetime] = None,
+    seed: int = 0,
+) -> Path:
+    """
+    Writes a recording in the legacy OpenEphys format (one "100_CH<n>.continuous" file per channel).
+
+    Parameters
+    ----------
+    folder_path : FolderPathType
+        The folder where the .continuous and the "all_channels.events" files are written.
+    num_channels : int, default: 16
+        The number of channels.
+    duration : float, default: 10.0
+        The duration of the recording in seconds, rounded up to a whole number of records (1024 samples).
+    sampling_frequency : float, default: 30000.0
+        The sampling frequency in Hz.
+    session_start_time : datetime, optional
+        The start time written to the headers, the default is the current time.
+    seed : int, default: 0
+        The seed of the random number generator.
+    """
+    folder_path = Path(folder_path)
+    folder_path.mkdir(parents=True, exist_ok=True)
+    session_start_time = session_start_time or datetime.now()
+
+    num_records = int(np.ceil(duration * sampling_frequency / OPENEPHYS_RECORD_SIZE))
+    traces = _get_traces(num_samples=num_records * OPENEPHYS_RECORD_SIZE, num_channels=num_channels, seed=seed)
+
+    records = _get_openephys_records(first_record_index=0, num_records=num_records)
+    for channel_index in range(num_channels):
+        records["samples"] = traces[:, channel_index].reshape(num_records, OPENEPHYS_RECORD_SIZE)
+        with open(folder_path / f"100_CH{channel_index + 1}.continuous", "wb") as file:
+            file.write(
+                _get_openephys_header(
+                    channel=f"CH{channel_index + 1}",
+                    channel_type="Continuous",
+                    sampling_frequency=sampling_frequency,
+                    session_start_time=session_start_time,
+                )
+            )
+            file.write(records.tobytes())
+
+    events = np.zeros(0, dtype=OPENEPHYS_EVENTS_DTYPE)
+    with open(folder_path / "all_channels.events", "wb") as file:
+        file.write(
+            _get_openephys_header(
+                channel="all_channels",
+                channel_type="Event",
+                sampling_frequency=sampling_frequency,
+                session_start_time=session_start_time,
+            )
+        )
+        file.write(events.tobytes())
+
+    return folder_path
+
+
+def generate_spikeglx_files(
+    folder_path: FolderPathType,
+    duration: float = 2.0,
+    session_name: str = "synthetic_g0",
+    session_start_time: Optional[datetime] = None,
+    seed: int = 0,
+) -> Path:
+    """
+    Writes a Neuropixels 1.0 recording in the SpikeGLX format (".ap.bin", ".lf.bin" and their ".meta" files).
+
+    Both streams have 384 channels and a sync channel, the AP band is sampled at 30 kHz and the LF band at 2.5 kHz.
+
+    Returns
+    -------
+    ap_bin_file_path : Path
+        The path to the ".ap.bin" file.
+    """
+    folder_path = Path(folder_path) / f"{session_name}_imec0"
+    folder_path.mkdir(parents=True, exist_ok=True)
+    session_start_time = session_start_time or datetime.now()
+    num_channels = 384
+
+    imro_table = "(0,384)" + "".join(f"({channel} 0 0 500 250 1)" for channel in range(num_channels))
+    shank_map = "(1,2,480)" + "".join(f"(0:{channel % 2}:{channel // 2}:1)" for channel in range(num_channels))
+
+    for stream_kind, sampling_frequency, channel_prefix, sns_ap_lf_sy in [
+        ("ap", 30000.0, "AP", "384,0,1"),
+        ("lf", 2500.0, "LF", "0,384,1"),
+    ]:
+        num_samples = int(duration * sampling_frequency)
+        traces = _get_traces(num_samples=num_samples, num_channels=num_channels + 1, seed=seed)
+        traces[:, -1] = (np.arange(num_samples) // int(sampling_frequency / 2)) % 2  # 1 Hz sync square wave
+        bin_file_path = folder_path / f"{session_name}_t0.imec0.{stream_kind}.bin"
+        traces.tofile(bin_file_path)
+
+        channel_map = f"(384,384,1)" + "".join(
+            f"({channel_prefix}{channel};{channel}:{channel})" for channel in range(num_channels)
+        )
+        channel_map += f"(SY0;{num_channels}:{num_channels})"
+        meta = dict(
+            acqApLfSy="384,384,1",
+            appVersion="20201103",
+            fileCreateTime=session_start_time.strftime("%Y-%m-%dT%H:%M:%S"),
+            fileName=str(bin_file_path),
+            fileSizeBytes=traces.nbytes,
+            fileTimeSecs=num_samples / sampling_frequency,
+            firstSample=0,
+            imAiRangeMax=0.6,
+            imAiRangeMin=-0.6,
+            imDatPrb_pn="PRB_1_4_0480_1_C",
+            imDatPrb_port=1,
+            imDatPrb_slot=2,
+            imDatPrb_sn=0,
+            imDatPrb_type=0,
+            imMaxInt=512,
+            imSampRate=sampling_frequency,
+            nSavedChans=num_channels + 1,
+            snsApLfSy=sns_ap_lf_sy,
+            snsSaveChanSubset="all",
+            typeThis="imec",
+        )
+        meta_lines = [f"{key}={value}" for key, value in meta.items()]
+        meta_lines += [f"~imroTbl={imro_table}", f"~snsChanMap={channel_map}", f"~snsShankMap={shank_map}"]
+        bin_file_path.with_suffix(".meta").write_text("\n".join(meta_lines) + "\n")
+
+    return folder_path / f"{session_name}_t0.imec0.ap.bin"
+
+
+def generate_phy_folder(
+    folder_path: FolderPathType,
+    num_units: int = 50,
+    duration: float = 2.0,
+    sampling_frequency: float = 30000.0,
+    firing_rate: float = 5.0,
+    seed: int = 0,
+) -> Path:
+    """Writes the spike times, spike clusters and cluster tables of a Phy sorting output folder."""
+    folder_path = Path(folder_path)
+    folder_path.mkdir(parents=True, exist_ok=True)
+
+    spike_trains = _get_spike_trains(num_units=num_units, duration=duration, firing_rate=firing_rate, seed=seed)
+    spike_frames = np.concatenate(
+        [(spike_train * sampling_frequency).astype(np.uint64) for spike_train in spike_trains]
+    )
+    spike_clusters = np.concatenate(
+        [np.full(len(spike_train), unit_id, dtype=np.int32) for unit_id, spike_train in enumerate(spike_trains)]
+    )
+    order = np.argsort(spike_frames, kind="stable")
+    np.save(folder_path / "spike_times.npy", spike_frames[order])
+    np.save(folder_path / "spike_clusters.npy", spike_clusters[order])
+
+    (folder_path / "params.py").write_text(
+        "dat_path = 'recording.bin'\n"
+        "n_channels_dat = 385\n"
+        "dtype = 'int16'\n"
+        "offset = 0\n"
+        f"sample_rate = {sampling_frequency}\n"
+        "hp_filtered = False\n"
+    )
+
+    random_number_generator = np.random.default_rng(seed)
+    qualities = random_number_generator.choice(["good", "mua", "noise"], size=num_units, p=[0.6, 0.3, 0.1])
+    pd.DataFrame(dict(cluster_id=np.arange(num_units), group=qualities)).to_csv(
+        folder_path / "cluster_group.tsv", sep="\t", index=False
+    )
+    pd.DataFrame(
+        dict(
+            cluster_id=np.arange(num_units),
+            Amplitude=random_number_generator.uniform(20, 200, size=num_units).round(1),
+            ContamPct=random_number_generator.uniform(0, 100, size=num_units).round(1),
+            KSLabel=np.where(qualities == "good", "good", "mua"),
+            depth=random_number_generator.uniform(0, 3840, size=num_units).round(1),
+            n_spikes=[len(spike_train) for spike_train in spike_trains],
+            quality=qualities,
+        )
+    ).to_csv(folder_path / "cluster_info.tsv", sep="\t", index=False)
+
+    return folder_path
+
+
+def generate_plexon_like_sorting_mat(
+    file_path: FilePathType,
+    num_units: int = 20,
+    duration: float = 10.0,
+    sampling_frequency: float = 40000.0,
+    firing_rate: float = 150.0,
+    seed: int = 0,
+) -> Path:
+    """
+    Writes the manually clustered units exported from the offline Plexon sorter (the "u" and "info" structs).
+
+    The firing rate is high enough for most units to pass the filter of the `AStSortingExtractor`
+    (at least 1000 spikes) for the default duration.
+    """
+    spike_trains = _get_spike_trains(num_units=num_units, duration=duration, firing_rate=firing_rate, seed=seed)
+    random_number_generator = np.random.default_rng(seed)
+
+    spike_times = np.empty(num_units, dtype=object)
+    spike_times[:] = [spike_train[:, np.newaxis] for spike_train in spike_trains]
+    unit_names = np.empty(num_units, dtype=object)
+    unit_names[:] = [f"sig{unit_index // 4 + 1:03d}{'abcd'[unit_index % 4]}" for unit_index in range(num_units)]
+    units = dict(
+        spikeTimes=spike_times,
+        unitName=unit_names,
+        peakMin=random_number_generator.uniform(-200, -20, size=num_units),
+        peakMax=random_number_generator.uniform(20, 200, size=num_units),
+        nSpikes=np.array([len(spike_train) for spike_train in spike_trains], dtype=float),
+        qualManual=random_number_generator.integers(1, 6, size=num_units).astype(float),
+        xCorrDisc_wq=(random_number_generator.uniform(size=num_units) < 0.1).astype(float),
+    )
+    info = dict(header=dict(sampleRate=sampling_frequency))
+    savemat(file_path, dict(u=units, info=info))
+    return Path(file_path)
+
+
+def generate_discrimination_events_mat(
+    file_path: FilePathType,
+    num_events_per_type: int = 30,
+    duration: float = 10.0,
+    num_event_types: int = 7,
+    seed: int = 0,
+) -> Path:
+    """Writes the "ev" struct array with the onset and offset times of each event type."""
+    random_number_generator = np.random.default_rng(seed)
+    events = np.empty(num_event_types, dtype=[("onset", object), ("offset", object)])
+    for event_type in range(num_event_types):
+        onsets = np.sort(random_number_generator.uniform(0, duration * 0.95, size=num_events_per_type))
+        events[event_type] = (onsets, onsets + random_number_generator.uniform(0.01, duration * 0.05))
+    savemat(file_path, dict(ev=events))
+    return Path(file_path)
+
+
+def generate_motion_corrected_mat(
+    file_path: FilePathType,
+    num_frames: int = 1000,
+    height: int = 240,
+    width: int = 376,
+    seed: int = 0,
+) -> Path:
+    """
+    Writes the motion corrected movie as the "Mr_8bit" variable of a MATLAB v7.3 (HDF5) file.
+
+    MATLAB stores arrays in column-major order, so the dataset has the shape (frames, width, height).
+    """
+    movie = _get_movie(num_frames=num_frames, height=height, width=width, seed=seed)
+    with h5py.File(file_path, mode="w", userblock_size=512) as file:
+        file.create_dataset("Mr_8bit", data=movie.transpose(0, 2, 1), chunks=(1, width, height))
+    # The MATLAB header in the user block
+    header = (
+        f"MATLAB 7.3 MAT-file, Platform: GLNXA64, Created on: {datetime.now():%a %b %d %H:%M:%S %Y} HDF5 schema 1.00 ."
+    )
+    with open(file_path, "r+b") as file:
+        file.write(header.encode("ascii").ljust(116, b" ") + b"\x00" * 8 + b"\x00\x02IM")
+    return Path(file_path)
+
+
+def generate_timestamps_mat(
+    file_path: FilePathType,
+    num_trials: int = 10,
+    frames_per_trial: int = 103,
+    sampling_frequency: float = 15.0,
+    seed: int = 0,
+) -> Path:
+    """
+    Writes the "timestampsMsAllCumul" matrix of the Miniscope trials.
+
+    The columns are the cumulative time (ms), the frame number within the trial, the trial number, the time within
+    the trial (ms), the cumulative frame number and the time of the frames that were kept (ms). The first three
+    frames of each trial were deleted from the processed movies, so their time is NaN in the last column and the
+    number of frames of the processed movies is `num_trials * (frames_per_trial - 3)`.
+    """
+    random_number_generator = np.random.default_rng(seed)
+    frame_number = np.tile(np.arange(1, frames_per_trial + 1), num_trials)
+    trial_number = np.repeat(np.arange(1, num_trials + 1), frames_per_trial)
+    frame_interval_ms = 1000.0 / sampling_frequency
+    trial_time_ms = (frame_number - 1) * frame_interval_ms + random_number_generator.normal(
+        scale=0.5, size=frame_number.shape
+    ).clip(-frame_interval_ms / 4, frame_interval_ms / 4)
+    cumulative_frame_number = np.arange(1, num_trials * frames_per_trial + 1)
+    cumulative_time_ms = (cumulative_frame_number - 1) * frame_interval_ms
+    kept_time_ms = np.where(frame_number > 3, trial_time_ms, np.nan)
+    timestamps = np.column_stack(
+        [cumulative_time_ms, frame_number, trial_number, trial_time_ms, cumulative_frame_number, kept_time_ms]
+    )
+    savemat(file_path, dict(timestampsMsAllCumul=timestamps))
+    return Path(file_path)
+
+
+def generate_cnmfe_neuron_mat(
+    file_path: FilePathType,
+    num_rois: int = 100,
+    num_frames: int = 1000,
+    height: int = 240,
+    width: int = 376,
+    sampling_frequency: float = 15.0,
+    seed: int = 0,
+) -> Path:
+    """Writes the contents of the CNMF-E "neuron" struct (A, C, S, Cn, Fs, options and P) to a .mat file."""
+    random_number_generator = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    centers = random_number_generator.uniform(0, 1, size=(num_rois, 2)) * [height, width]
+
+    # The spatial footprints are sparse (pixels x rois) in column-major (MATLAB) pixel order
+    footprints = []
+    for center_y, center_x in centers:
+        footprint = np.exp(-((y - center_y) ** 2 + (x - center_x) ** 2) / 18.0)
+        footprint[footprint < 0.05] = 0
+        footprints.append(footprint.ravel(order="F"))
+    image_masks = csc_matrix(np.column_stack(footprints))
+
+    spikes = (
+        random_number_generator.uniform(size=(num_rois, num_frames)) < 0.01
+    ) * random_number_generator.exponential(scale=5.0, size=(num_rois, num_frames))
+    decay = np.exp(-1 / (0.5 * sampling_frequency))
+    traces = np.zeros_like(spikes)
+    for frame_index in range(num_frames):
+        traces[:, frame_index] = spikes[:, frame_index] + (decay * traces[:, frame_index - 1] if frame_index else 0)
+
+    correlation_image = random_number_generator.uniform(0, 0.3, size=(height, width))
+    savemat(
+        file_path,
+        dict(
+            A=image_masks,
+            C=traces,
+            S=csc_matrix(spikes),
+            Cn=correlation_image,
+            Fs=float(sampling_frequency),
+            options=dict(d1=height, d2=width),
+            P=dict(numFrames=num_frames),
+        ),
+        do_compression=True,
+    )
+    return Path(file_path)
+
+
+def _get_photometry_dataframe(duration: float, sampling_frequency: float, seed: int) -> pd.DataFrame:
+    random_number_generator = np.random.default_rng(seed)
+    num_frames = int(duration * sampling_frequency)
+    flags = np.where(np.arange(num_frames) % 2, 18, 17)
+    cue = (np.arange(num_frames) // int(10 * sampling_frequency)) % 3 == 1
+    lick = random_number_generator.uniform(size=num_frames) < 0.05
+    flags = flags + 256 * cue + 512 * lick
+    intensity = 0.02 + 0.001 * np.cumsum(random_number_generator.normal(size=num_frames)) / np.sqrt(num_frames)
+    return pd.DataFrame(
+        dict(
+            FrameCounter=np.arange(num_frames),
+            Timestamp=np.round(1000.0 + np.arange(num_frames) / sampling_frequency, 4),
+            Flags=flags,
+            Region0G=intensity + random_number_generator.normal(scale=1e-4, size=num_frames),
+        )
+    )
+
+
+def generate_photometry_csv(
+    file_path: FilePathType,
+    duration: float = 600.0,
+    sampling_frequency: float = 40.0,
+    seed: int = 0,
+) -> Path:
+    """
+    Writes the photometry intensity values in the CSV format of the Neurophotometrics software.
+
+    The frames alternate between the LED415 (flag 17) and the LED470 (flag 18) excitation, the cue and the lick
+    states add 256 and 512 to the flags.
+    """
+    photometry = _get_photometry_dataframe(duration=duration, sampling_frequency=sampling_frequency, seed=seed)
+    photometry.to_csv(file_path, index=False)
+    return Path(file_path)
+
+
+def generate_deeplabcut_csv(
+    file_path: FilePathType,
+    num_frames: int = 18000,
+    body_parts: Optional[List[str]] = None,
+    scorer: str = "DLC_resnet50_synthetic",
+    seed: int = 0,
+) -> Path:
+    """Writes the DeepLabCut output as a CSV with the three-level (scorer, body parts, coordinates) header."""
+    random_number_generator = np.random.default_rng(seed)
+    body_parts = body_parts or DEEPLABCUT_BODY_PARTS
+    columns = pd.MultiIndex.from_product(
+        [[scorer], body_parts, ["x", "y", "likelihood"]], names=["scorer", "bodyparts", "coords"]
+    )
+    data = np.empty((num_frames, len(columns)))
+    for body_part_index in range(len(body_parts)):
+        position = np.cumsum(random_number_generator.normal(scale=2.0, size=(num_frames, 2)), axis=0) + 300
+        data[:, 3 * body_part_index : 3 * body_part_index + 2] = position
+        data[:, 3 * body_part_index + 2] = random_number_generator.beta(8, 1, size=num_frames)
+    pd.DataFrame(data, columns=columns).to_csv(file_path)
+    return Path(file_path)
+
+
+def generate_tiff_stack(
+    file_path: FilePathType,
+    num_frames: int = 1,
+    height: int = 1024,
+    width: int = 1024,
+    rgb: bool = False,
+    seed: int = 0,
+) -> Path:
+    """Writes a TIFF stack of uint8 frames (or a single RGB image when `rgb` is True and `num_frames` is 1)."""
+    import tifffile
+
+    movie = _get_movie(num_frames=num_frames * (3 if rgb else 1), height=height, width=width, seed=seed)
+    if rgb:
+        movie = movie.reshape(num_frames, 3, height, width).transpose(0, 2, 3, 1)
+    tifffile.imwrite(file_path, movie[0] if num_frames == 1 else movie, photometric="rgb" if rgb else "minisblack")
+    return Path(file_path)
+
+
+def generate_miniscope_avi(
+    file_path: FilePathType,
+    num_frames: int = 1000,
+    height: int = 240,
+    width: int = 376,
+    frame_rate: float = 30.0,
+    seed: int = 0,
+) -> Path:
+    """Writes a grayscale movie with the lossless FFV1 codec to an .avi file, like the processed Miniscope movies."""
+    import cv2
+
+    movie = _get_movie(num_frames=num_frames, height=height, width=width, seed=seed)
+    writer = cv2.VideoWriter(str(file_path), cv2.VideoWriter_fourcc(*"FFV1"), frame_rate, (width, height), False)
+    for frame in movie:
+        writer.write(frame)
+    writer.release()
+    return Path(file_path)
+
+
+def simulate_openephys_recording(
+    folder_path: FolderPathType,
+    num_channels: int = 16,
+    duration: float = 60.0,
+    sampling_frequency: float = 30000.0,
+    poll_interval: float = 0.1,
+    seed: int = 0,
+):
+    """
+    Writes a legacy OpenEphys recording in real time, as the acquisition software does, to test the follow mode.
+
+    The records are appended to the channel files one after the other, so the files are briefly out of step.
+
+    Parameters
+    ----------
+    folder_path : FolderPathType
+        The folder where the .continuous files are written.
+    num_channels : int, default: 16
+        The number of channels.
+    duration : float, default: 60.0
+        The duration of the recording in seconds.
+    sampling_frequency : float, default: 30000.0
+        The sampling frequency in Hz.
+    poll_interval : float, default: 0.1
+        The number of seconds between the writes.
+    seed : int, default: 0
+        The seed of the random number generator.
+    """
+    folder_path = Path(folder_path)
+    folder_path.mkdir(parents=True, exist_ok=True)
+    session_start_time = datetime.now()
+    channel_file_paths = [
+        folder_path / f"100_CH{channel_index + 1}.continuous" for channel_index in range(num_channels)
+    ]
+    for channel_index, file_path in enumerate(channel_file_paths):
+        file_path.write_bytes(
+            _get_openephys_header(
+                channel=f"CH{channel_index + 1}",
+                channel_type="Continuous",
+                sampling_frequency=sampling_frequency,
+                session_start_time=session_start_time,
+            )
+        )
+
+    num_records = int(np.ceil(duration * sampling_frequency / OPENEPHYS_RECORD_SIZE))
+    num_records_written = 0
+    start_time = time.monotonic()
+    while num_records_written < num_records:
+        time.sleep(poll_interval)
+        elapsed_num_records = int((time.monotonic() - start_time) * sampling_frequency / OPENEPHYS_RECORD_SIZE)
+        num_new_records = min(elapsed_num_records, num_records) - num_records_written
+        if num_new_records <= 0:
+            continue
+        records = _get_openephys_records(first_record_index=num_records_written, num_records=num_new_records)
+        traces = _get_traces(
+            num_samples=num_new_records * OPENEPHYS_RECORD_SIZE,
+            num_channels=num_channels,
+            seed=seed + num_records_written,
+        )
+        for channel_index, file_path in enumerate(channel_file_paths):
+            records["samples"] = traces[:, channel_index].reshape(num_new_records, OPENEPHYS_RECORD_SIZE)
+            with open(file_path, "ab") as file:
+                file.write(records.tobytes())
+        num_records_written += num_new_records
+
+
+def simulate_photometry_recording(
+    file_path: FilePathType,
+    duration: float = 60.0,
+    sampling_frequency: float = 40.0,
+    poll_interval: float = 0.1,
+    seed: int = 0,
+):
+    """
+    Writes the photometry CSV in real time, as the Neurophotometrics software does, to test the follow mode.
+
+    Parameters
+    ----------
+    file_path : FilePathType
+        The path of the CSV file.
+    duration : float, default: 60.0
+        The duration of the recording in seconds.
+    sampling_frequency : float, default: 40.0
+        The sampling frequency in Hz.
+    poll_interval : float, default: 0.1
+        The number of seconds between the writes.
+    seed : int, default: 0
+        The seed of the random number generator.
+    """
+    photometry = _get_photometry_dataframe(duration=duration, sampling_frequency=sampling_frequency, seed=seed)
+    photometry.iloc[:0].to_csv(file_path, index=False)
+
+    num_rows_written = 0
+    start_time = time.monotonic()
+    while num_rows_written < len(photometry):
+        time.sleep(poll_interval)
+        num_rows = min(int((time.monotonic() - start_time) * sampling_frequency), len(photometry))
+        photometry.iloc[num_rows_written:num_rows].to_csv(file_path, mode="a", header=False, index=False)
+        num_rows_written = num_rows
@@ -0,0 +1,76 @@
+"""Measures the time to build the TimeIntervals table of the discrimination task events row by row and by columns."""
+
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from neuroconv.tools.text import convert_df_to_time_intervals
+
+from tye_lab_to_nwb.benchmarks.synthetic_data import generate_discrimination_events_mat
+from tye_lab_to_nwb.general_interfaces import DiscriminationTaskEventsInterface
+from tye_lab_to_nwb.tools import build_time_intervals_from_dataframe
+
+
+def benchmark_time_intervals(num_events: int = 100_000, num_event_types: int = 7, num_repeats: int = 3) -> dict:
+    """
+    Measures the time to read synthetic discrimination task events and to build their TimeIntervals table, with the
+    row by row `neuroconv.tools.text.convert_df_to_time_intervals` and with `build_time_intervals_from_dataframe`.
+
+    Parameters
+    ----------
+    num_events : int, default: 100_000
+        The total number of events (divided evenly between the event types).
+    num_event_types : int, default: 7
+        The number of event types.
+    num_repeats : int, default: 3
+        The number of times to repeat the measurements of the columnar builder, the fastest is reported.
+        The row by row builder is measured once.
+
+    Returns
+    -------
+    timings : dict
+        The number of events, the time to read the events file ("read_seconds"), and the time to build the table
+        row by row ("row_by_row_seconds") and by columns ("columnar_seconds").
+    """
+    column_name_mapping = dict(onset="start_time", offset="stop_time")
+    with tempfile.TemporaryDirectory() as folder_path:
+        events_file_path = generate_discrimination_events_mat(
+            file_path=Path(folder_path) / "events.mat",
+            num_events_per_type=num_events // num_event_types,
+            duration=num_events / 10.0,
+            num_event_types=num_event_types,
+        )
+        start_time = time.perf_counter()
+        interface = DiscriminationTaskEventsInterface(file_path=str(events_file_path), verbose=False)
+        read_seconds = time.perf_counter() - start_time
+
+    columnar_seconds = []
+    for _ in range(num_repeats):
+        start_time = time.perf_counter()
+        columnar_time_intervals = build_time_intervals_from_dataframe(
+            interface.dataframe, column_name_mapping=column_name_mapping
+        )
+        columnar_seconds.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    row_by_row_time_intervals = convert_df_to_time_intervals(
+        interface.dataframe.copy(), column_name_mapping=column_name_mapping
+    )
+    row_by_row_seconds = time.perf_counter() - start_time
+
+    for column_name in ["start_time", "stop_time", "trial_type"]:
+        assert np.array_equal(
+            columnar_time_intervals[column_name].data, row_by_row_time_intervals[column_name].data
+        ), f"The '{column_name}' column of the columnar table does not match the row by row table."
+
+    return dict(
+        num_events=len(interface.dataframe),
+        read_seconds=read_seconds,
+        row_by_row_seconds=row_by_row_seconds,
+        columnar_seconds=min(columnar_seconds),
+    )
+
+
+if __name__ == "__main__":
+    print(benchmark_time_intervals())
@@ -1,8 +1,8 @@
 import ast
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
-from neuroconv.utils import FilePathType
+from neuroconv.utils import FilePathType, FolderPathType
 from tye_lab_to_nwb.fiber_photometry.convert_session import session_to_nwb
 from tye_lab_to_nwb.tools import read_session_config, parallel_execute
 
@@ -10,6 +10,12 @@ from tye_lab_to_nwb.tools import read_session_config, parallel_execute
 def parallel_convert_sessions(
     excel_file_path: FilePathType,
     num_parallel_jobs: Optional[int] = 1,
+    profile: Optional[bool] = False,
+    catalog_file_path: Optional[FilePathType] = None,
+    parquet_folder_path: Optional[FolderPathType] = None,
+    peri_event_window: Optional[Tuple[float, float]] = None,
+    peri_event_bin_size: Optional[float] = 0.05,
+    summary_statistics: Optional[bool] = False,
 ):
     """
     Parallel converts NWB files.
@@ -26,6 +32,24 @@ def parallel_convert_sessions(
     stub_test: bool, optional
         For testing purposes, when stub_test=True only writes a subset of ecephys and plexon data.
         Default is to write the whole ecephys recording and plexon data to the file.
+    profile: bool, optional
+        Whether to record a timeline of the conversion for each session (saved next to the NWB file as
+        '<nwbfile name>_trace.json'). When the Excel file has a 'profile' column, it enables profiling per session.
+        Default is to not profile the conversions.
+    catalog_file_path: FilePathType, optional
+        The path to the SQLite catalog where each converted session is added (see `tye_lab_to_nwb.tools.catalog`).
+        Default is to not catalog the sessions.
+    parquet_folder_path: FolderPathType, optional
+        The folder where the trials, events, units and pose estimation tables of each session are written as Parquet
+        files partitioned by subject and session. Default is to not write the sidecars.
+    peri_event_window: tuple of float, optional
+        The start and stop time (in seconds) of the window around the events for the binned responses that are stored
+        in each NWB file. Default is to not compute the responses.
+    peri_event_bin_size: float, optional
+        The width of the bins of the peri-event responses in seconds, the default is 0.05.
+    summary_statistics: bool, optional
+        Whether to store the summary statistics of the photometry signals in each NWB file. Default is to not compute
+        the statistics.
     """
 
     config = read_session_config(excel_file_path=excel_file_path)
@@ -42,6 +66,12 @@ def parallel_convert_sessions(
                 data_file_path=row["data_file_path"],
                 session_start_time=row["session_start_time"],
                 subject_metadata=subject_metadata,
+                profile=bool(row["profile"]) if "profile" in config.columns else profile,
+                catalog_file_path=catalog_file_path,
+                parquet_folder_path=parquet_folder_path,
+                summary_statistics=summary_statistics,
+                peri_event_window=peri_event_window,
+                peri_event_bin_size=peri_event_bin_size,
             )
         )
     parallel_execute(
@@ -1,17 +1,29 @@
+import traceback
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 from uuid import uuid4
+from warnings import warn
 from zoneinfo import ZoneInfo
 
 from dateutil import tz
 from dateutil.parser import parse
 
-from neuroconv.utils import FilePathType, load_dict_from_file, dict_deep_update
+from neuroconv.utils import FilePathType, FolderPathType, load_dict_from_file, dict_deep_update
 from nwbinspector import inspect_nwbfile
 from nwbinspector.inspector_tools import save_report, format_messages
 
 from tye_lab_to_nwb.fiber_photometry import FiberPhotometryInterface
+from tye_lab_to_nwb.fiber_photometry.tools import follow_photometry_csv
+from tye_lab_to_nwb.tools import (
+    repack_nwbfile,
+    verify_nwbfile,
+    profile_conversion,
+    update_catalog,
+    export_parquet_sidecars,
+    compute_summary_statistics,
+    add_peri_event_responses,
+)
 
 
 def session_to_nwb(
@@ -19,6 +31,15 @@ def session_to_nwb(
     data_file_path: FilePathType,
     session_start_time: str,
     subject_metadata: Optional[dict] = None,
+    repack: Optional[bool] = False,
+    verification_sample_fraction: Optional[float] = None,
+    profile: Optional[bool] = False,
+    follow: Optional[bool] = False,
+    catalog_file_path: Optional[FilePathType] = None,
+    parquet_folder_path: Optional[FolderPathType] = None,
+    peri_event_window: Optional[Tuple[float, float]] = None,
+    peri_event_bin_size: Optional[float] = 0.05,
+    summary_statistics: Optional[bool] = False,
 ):
     """
     Converts a single session to NWB.
@@ -31,10 +52,46 @@ def session_to_nwb(
         The path that points to the .csv file containing the photometry intensity values.
     session_start_time: str
         The recording start time for the photometry session in YYYY-MM-DDTHH:MM:SS format (e.g. 2023-08-21T15:30:00).
+    subject_metadata: dict, optional
+        The optional metadata for the experimental subject.
+    repack: bool, optional
+        Whether to rewrite the NWB file with the HDF5 paged file-space strategy after the conversion.
+        Repacked files open with far fewer small reads over the network. Default is to not repack the file.
+    verification_sample_fraction: float, optional
+        The fraction of chunks of each written dataset that is compared against the source data after the conversion.
+        A mismatch fails the session and the error log points to the dataset and the chunk. Default is to not verify.
+    profile: bool, optional
+        Whether to record a timeline of the conversion (interfaces, chunk reads and chunk writes) in the Chrome trace
+        format. The trace is saved next to the NWB file as '<nwbfile name>_trace.json'. Default is to not profile.
+        The conversion is not profiled in follow mode.
+    follow: bool, optional
+        Whether to convert the session while the CSV file is still being written (the file does not have to exist
+        yet). The rows are appended to the NWB file as they arrive and the file is finalized when the CSV file did not
+        grow for 30 seconds. The profile, the Parquet sidecars and the summary statistics are recorded while the
+        interface adds its data to the in-memory file, which a followed session does not do, so they are skipped with
+        a warning. Default is to convert the CSV file as it is.
+    catalog_file_path: FilePathType, optional
+        The path to the SQLite catalog of the converted sessions (see `tye_lab_to_nwb.tools.catalog`).
+        When specified, the metadata, streams and counts of the NWB file are added to the catalog after the conversion.
+        Default is to not catalog the session.
+    parquet_folder_path: FolderPathType, optional
+        The folder of the Parquet sidecars of the batch (see `tye_lab_to_nwb.tools.parquet_sidecars`). When specified,
+        the trials, events, units and pose estimation tables are also written as Parquet files partitioned by subject
+        and session. The sidecars are not written in follow mode. Default is to not write the sidecars.
+    peri_event_window: tuple of float, optional
+        The start and stop time (in seconds) of the window around the events for the binned responses of the units
+        and of the ROI traces, which are stored in the "peri_event_responses" processing module
+        (see `tye_lab_to_nwb.tools.peri_event_responses`). Default is to not compute the responses.
+    peri_event_bin_size: float, optional
+        The width of the bins of the peri-event responses in seconds, the default is 0.05.
+    summary_statistics: bool, optional
+        Whether to compute the summary statistics of the photometry signals while they are written, which are stored in
+        the "summary_statistics" processing module (see `tye_lab_to_nwb.tools.summary_statistics`). They are not
+        computed in follow mode. Default is to not compute the statistics.
     """
     nwbfile_path = Path(nwbfile_path)
 
-    # Initalize interface with photometry source data
+    # Initalize interface with photometry source data (the CSV file is only read when the rows are used)
     interface = FiberPhotometryInterface(file_path=str(data_file_path))
     # Update metadata from interface
     metadata = interface.get_metadata()
@@ -63,8 +120,44 @@ def session_to_nwb(
     if "session_id" not in metadata["NWBFile"]:
         metadata["NWBFile"].update(session_id=nwbfile_path.stem)
 
+    if follow:
+        # These wrap the add_to_nwbfile of the interface, which is not called when the session is followed
+        skipped_options = [
+            option_name
+            for option_name, option in dict(
+                profile=profile, parquet_folder_path=parquet_folder_path, summary_statistics=summary_statistics
+            ).items()
+            if option
+        ]
+        if skipped_options:
+            warn(f"The options {skipped_options} are not supported in follow mode and are skipped for {nwbfile_path}.")
+        profile, parquet_folder_path, summary_statistics = False, None, False
+
     try:
-        interface.run_conversion(nwbfile_path=str(nwbfile_path), metadata=metadata, overwrite=True)
+        trace_file_path = nwbfile_path.parent / f"{nwbfile_path.stem}_trace.json" if profile else None
+        with profile_conversion(converter=interface, trace_file_path=trace_file_path), export_parquet_sidecars(
+            converter=interface, sidecar_folder_path=parquet_folder_path
+        ), compute_summary_statistics(
+            converter=interface, nwbfile_path=nwbfile_path, summary_statistics=summary_statistics
+        ):
+            if follow:
+                follow_photometry_csv(file_path=data_file_path, nwbfile_path=nwbfile_path, metadata=metadata)
+            else:
+                interface.run_conversion(nwbfile_path=str(nwbfile_path), metadata=metadata, overwrite=True)
+
+        if peri_event_window:
+            add_peri_event_responses(nwbfile_path=nwbfile_path, window=peri_event_window, bin_size=peri_event_bin_size)
+
+        if repack:
+            repack_nwbfile(nwbfile_path=nwbfile_path)
+
+        if verification_sample_fraction:
+            verify_nwbfile(
+                nwbfile_path=nwbfile_path,
+                data_interfaces=dict(FiberPhotometry=interface),
+                metadata=metadata,
+                sample_fraction=verification_sample_fraction,
+            )
 
         # Run inspection for nwbfile
         results = list(inspect_nwbfile(nwbfile_path=nwbfile_path))
@@ -77,6 +170,13 @@ def session_to_nwb(
             ),
             overwrite=True,
         )
+
+        if catalog_file_path:
+            update_catalog(
+                catalog_file_path=catalog_file_path,
+                nwbfile_path=nwbfile_path,
+                source_data=dict(FiberPhotometry=dict(file_path=str(data_file_path))),
+            )
     except Exception as e:
         with open(f"{nwbfile_path.parent}/{nwbfile_path.stem}_error_log.txt", "w") as f:
             f.write(traceback.format_exc())
@@ -3,6 +3,7 @@
 from pathlib import Path
 from typing import Optional
 
+import h5py
 import numpy as np
 import pandas as pd
 from neuroconv.basedatainterface import BaseDataInterface
@@ -14,6 +15,7 @@ from tye_lab_to_nwb.fiber_photometry.tools import (
     add_photometry,
     add_events_from_photometry,
 )
+from tye_lab_to_nwb.tools.verify_nwbfile import verify_array
 
 
 class FiberPhotometryInterface(BaseDataInterface):
@@ -36,7 +38,14 @@ class FiberPhotometryInterface(BaseDataInterface):
         """
         self.verbose = verbose
         super().__init__(file_path=file_path)
-        self.photometry_dataframe = self._read_file()
+        # The CSV file is read when the rows are first used (it does not exist yet when a session is followed)
+        self._photometry_dataframe = None
+
+    @property
+    def photometry_dataframe(self) -> pd.DataFrame:
+        if self._photometry_dataframe is None:
+            self._photometry_dataframe = self._read_file()
+        return self._photometry_dataframe
 
     def get_metadata(self) -> dict:
         metadata = super().get_metadata()
@@ -97,3 +106,28 @@ class FiberPhotometryInterface(BaseDataInterface):
     ):
         add_events_from_photometry(photometry_dataframe=self.photometry_dataframe, nwbfile=nwbfile, metadata=metadata)
         add_photometry(photometry_dataframe=self.photometry_dataframe, nwbfile=nwbfile, metadata=metadata)
+
+    def verify_written_data(self, nwbfile: h5py.File, metadata: dict, sample_fraction: float = 0.01, seed: int = 0):
+        """
+        Compares randomly sampled chunks of the written photometry columns against the CSV file.
+
+        Parameters
+        ----------
+        nwbfile : h5py.File
+            The NWB file that was written, opened with h5py.
+        metadata : dict
+            The metadata that was used for the conversion.
+        sample_fraction : float, default: 0.01
+            The fraction of chunks to compare.
+        seed : int, default: 0
+            The seed of the random number generator.
+        """
+        for photometry_metadata in metadata["RoiResponseSeries"]:
+            roi_response_series = nwbfile["acquisition"][photometry_metadata["name"]]
+            for dataset_name, column in [("data", photometry_metadata["region"]), ("timestamps", "Timestamp")]:
+                verify_array(
+                    dataset=roi_response_series[dataset_name],
+                    array=self.photometry_dataframe[column].values,
+                    sample_fraction=sample_fraction,
+                    seed=seed,
+                )
@@ -1 +1 @@
-from .photometry import add_photometry, add_events_from_photometry
+from .photometry import add_photometry, add_events_from_photometry, follow_photometry_csv
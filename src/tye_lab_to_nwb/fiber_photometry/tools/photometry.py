@@ -5,11 +5,23 @@ from hdmf.backends.hdf5 import H5DataIO
 from hdmf.common import DynamicTableRegion
 from ndx_events import AnnotatedEventsTable
 from ndx_photometry import FibersTable, FiberPhotometry, ExcitationSourcesTable, PhotodetectorsTable, FluorophoresTable
-from pynwb import NWBFile
+from neuroconv.tools.nwb_helpers import make_nwbfile_from_metadata
+from neuroconv.utils import FilePathType
+from pynwb import NWBFile, NWBHDF5IO
 from pynwb.ophys import RoiResponseSeries
 
+from tye_lab_to_nwb.tools.follow import CsvFileTail, follow_source, wait_for_data, write_nwbfile_to_follow
 
-def add_photometry(photometry_dataframe: pd.DataFrame, nwbfile: NWBFile, metadata: Optional[dict]):
+# The number of rows of the chunks of the datasets that grow while the CSV file is followed
+FOLLOW_CHUNK_NUM_ROWS = 10000
+
+
+def add_photometry(
+    photometry_dataframe: pd.DataFrame,
+    nwbfile: NWBFile,
+    metadata: Optional[dict],
+    data_io_kwargs: Optional[dict] = None,
+):
     # Create the ExcitationSourcesTable that holds metadata for the LED sources
     excitation_sources_table = ExcitationSourcesTable(description="The metadata for the excitation sources.")
     for source_metadata in metadata["ExcitationSourcesTable"]:
@@ -66,9 +78,11 @@ def add_photometry(photometry_dataframe: pd.DataFrame, nwbfile: NWBFile, metadat
         roi_response_series = RoiResponseSeries(
             name=roi_response_series_name,
             description=photometry_metadata["description"],
-            data=H5DataIO(photometry_dataframe[column].values, compression=True),
+            data=H5DataIO(photometry_dataframe[column].values, compression=True, **(data_io_kwargs or dict())),
             unit=photometry_metadata["unit"],
-            timestamps=H5DataIO(photometry_dataframe["Timestamp"].values, compression=True),
+            timestamps=H5DataIO(
+                photometry_dataframe["Timestamp"].values, compression=True, **(data_io_kwargs or dict())
+            ),
             rois=rois,
         )
 
@@ -88,3 +102,76 @@ def add_events_from_photometry(photometry_dataframe: pd.DataFrame, nwbfile: NWBF
         )
 
     nwbfile.add_acquisition(annotated_events)
+
+
+def follow_photometry_csv(
+    file_path: FilePathType,
+    nwbfile_path: FilePathType,
+    metadata: dict,
+    poll_interval: float = 1.0,
+    idle_timeout: float = 30.0,
+):
+    """
+    Converts the photometry data while the CSV file is being written by the acquisition software.
+
+    The conversion starts from the path of the CSV file, which does not have to exist yet. The NWB file is created
+    as soon as the first rows are written and the rows that arrive later are appended to the RoiResponseSeries,
+    reading at most 64 MiB of the CSV file per poll. The file can be read in SWMR mode while it is being written.
+    When the CSV file did not grow for `idle_timeout` seconds the events are added from the flags and the file is
+    closed.
+
+    Parameters
+    ----------
+    file_path : FilePathType
+        The path to the CSV file that is being written.
+    nwbfile_path : FilePathType
+        The file path to the NWB file that will be created.
+    metadata : dict
+        The metadata for the conversion (e.g. from `FiberPhotometryInterface.get_metadata`).
+    poll_interval : float, default: 1.0
+        The number of seconds to wait between the polls of the CSV file.
+    idle_timeout : float, default: 30.0
+        The number of seconds without new rows after which the recording is considered complete.
+    """
+    csv_tail = CsvFileTail(file_path=file_path)
+    photometry_dataframe = wait_for_data(
+        read_new_data=lambda: dict(rows=csv_tail.read_new_rows()),
+        poll_interval=poll_interval,
+        idle_timeout=idle_timeout,
+    )["rows"]
+
+    nwbfile = make_nwbfile_from_metadata(metadata=metadata)
+    add_photometry(
+        photometry_dataframe=photometry_dataframe,
+        nwbfile=nwbfile,
+        metadata=metadata,
+        data_io_kwargs=dict(maxshape=(None,), chunks=(FOLLOW_CHUNK_NUM_ROWS,)),
+    )
+    write_nwbfile_to_follow(nwbfile=nwbfile, nwbfile_path=nwbfile_path)
+
+    def read_new_data():
+        new_rows = csv_tail.read_new_rows()
+        new_data = dict()
+        for photometry_metadata in metadata["RoiResponseSeries"]:
+            roi_response_series_path = f"/acquisition/{photometry_metadata['name']}"
+            new_data[f"{roi_response_series_path}/data"] = new_rows[photometry_metadata["region"]].values
+            new_data[f"{roi_response_series_path}/timestamps"] = new_rows["Timestamp"].values
+        return new_data
+
+    follow_source(
+        nwbfile_path=nwbfile_path,
+        read_new_data=read_new_data,
+        poll_interval=poll_interval,
+        idle_timeout=idle_timeout,
+    )
+
+    # Only the rows of the flags that are events are kept in memory
+    event_flags = list(metadata["Events"]["labels"])
+    event_rows = pd.concat(
+        chunk[chunk["Flags"].isin(event_flags)]
+        for chunk in pd.read_csv(file_path, usecols=["Timestamp", "Flags"], chunksize=FOLLOW_CHUNK_NUM_ROWS)
+    )
+    with NWBHDF5IO(path=str(nwbfile_path), mode="a") as io:
+        nwbfile = io.read()
+        add_events_from_photometry(photometry_dataframe=event_rows, nwbfile=nwbfile, metadata=metadata)
+        io.write(nwbfile)
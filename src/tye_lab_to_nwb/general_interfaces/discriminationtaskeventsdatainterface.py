@@ -1,11 +1,15 @@
-from typing import Optional
+from typing import Dict, Optional
 
+import numpy as np
 import pandas as pd
+from pynwb import NWBFile
 from scipy.io import loadmat
 
 from neuroconv.datainterfaces.text.timeintervalsinterface import TimeIntervalsInterface
 from neuroconv.utils import FilePathType
 
+from tye_lab_to_nwb.tools import add_time_intervals, build_time_intervals_from_dataframe
+
 
 class DiscriminationTaskEventsInterface(TimeIntervalsInterface):
     def __init__(
@@ -29,21 +33,61 @@ class DiscriminationTaskEventsInterface(TimeIntervalsInterface):
     def _read_file(self, file_path: FilePathType, **read_kwargs):
         mat = loadmat(file_path, struct_as_record=True, squeeze_me=True)
         assert "ev" in mat, "The events struct is not in the file."
-        events = pd.DataFrame(mat["ev"])[["onset", "offset"]]
-        events.index.name = "trial_type"
-        events = events.reset_index()
+        events_struct = np.atleast_1d(mat["ev"])
+
+        # unpack the onset and offset times of each event type (a scalar for the types with a single event)
+        onsets = [np.atleast_1d(np.asarray(onset, dtype=float)).ravel() for onset in events_struct["onset"]]
+        offsets = [np.atleast_1d(np.asarray(offset, dtype=float)).ravel() for offset in events_struct["offset"]]
+        num_events = [len(onset) for onset in onsets]
+        for event_type, (onset, offset) in enumerate(zip(onsets, offsets)):
+            if len(onset) != len(offset):
+                raise ValueError(f"The number of onset and offset times of the event type {event_type} do not match.")
+        onsets, offsets = np.concatenate(onsets), np.concatenate(offsets)
+        trial_types = np.repeat(np.arange(len(events_struct)), num_events)
+        events = pd.DataFrame(dict(trial_type=trial_types, onset=onsets, offset=offsets))
 
         if "event_names_mapping" in read_kwargs:
             event_names_mapping = read_kwargs["event_names_mapping"]
             events["trial_type"] = events["trial_type"].map(event_names_mapping)
 
-        # unpack list of lists in onset and offset columns
-        events = events.explode(column=["onset", "offset"])
+        # drop empty events (and the event types that are not in the mapping)
+        is_valid = events.notna().all(axis=1).to_numpy()
 
         # sort timestamps in ascending order
-        events = events.sort_values(by="onset", ascending=True)
+        order = np.argsort(onsets[is_valid], kind="stable")
+        return events[is_valid].iloc[order].reset_index(drop=True)
+
+    def add_to_nwbfile(
+        self,
+        nwbfile: NWBFile,
+        metadata: Optional[dict] = None,
+        tag: str = "trials",
+        column_name_mapping: Dict[str, str] = None,
+        column_descriptions: Dict[str, str] = None,
+    ) -> NWBFile:
+        """
+        Adds the events as a TimeIntervals table, which is built from the columns of the events at once.
 
-        # drop empty events
-        events = events.dropna(axis=0)
+        Parameters
+        ----------
+        nwbfile : NWBFile
+            An in-memory NWBFile object to write to the location.
+        metadata : dict, optional
+            Metadata dictionary with information used to create the NWBFile when one does not exist or overwrite=True.
+        tag : str, default: "trials"
+        column_name_mapping: dict, optional
+            If passed, rename subset of columns from key to value.
+        column_descriptions: dict, optional
+            Keys are the names of the columns (after renaming) and values are the descriptions. If not passed,
+            the names of the columns are used as descriptions.
+        """
+        metadata = metadata or self.get_metadata()
+        self.time_intervals = build_time_intervals_from_dataframe(
+            self.dataframe,
+            column_name_mapping=column_name_mapping,
+            column_descriptions=column_descriptions,
+            **metadata["TimeIntervals"][tag],
+        )
+        add_time_intervals(nwbfile=nwbfile, time_intervals=self.time_intervals)
 
-        return events
+        return nwbfile
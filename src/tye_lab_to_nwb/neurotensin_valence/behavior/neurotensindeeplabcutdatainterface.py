@@ -4,6 +4,7 @@ import pickle
 from pathlib import Path
 from typing import Optional
 
+import h5py
 import numpy as np
 import pandas as pd
 from ndx_pose import PoseEstimationSeries, PoseEstimation
@@ -18,6 +19,8 @@ from pynwb.file import NWBFile
 
 from neuroconv.basedatainterface import BaseDataInterface
 
+from tye_lab_to_nwb.tools.verify_nwbfile import verify_array
+
 
 class NeurotensinDeepLabCutInterface(BaseDataInterface):
     """Behavior interface for converting DeepLabCut data in legacy format for the Neurotensin experiment."""
@@ -131,3 +134,35 @@ class NeurotensinDeepLabCutInterface(BaseDataInterface):
 
         behavior = get_module(nwbfile, "behavior", "Processed behavior data.")
         behavior.add(pose_estimation)
+
+    def verify_written_data(self, nwbfile: h5py.File, metadata: dict, sample_fraction: float = 0.01, seed: int = 0):
+        """
+        Compares randomly sampled chunks of the written pose estimation series against the CSV file.
+
+        Parameters
+        ----------
+        nwbfile : h5py.File
+            The NWB file that was written, opened with h5py.
+        metadata : dict
+            The metadata that was used for the conversion.
+        sample_fraction : float, default: 0.01
+            The fraction of chunks to compare.
+        seed : int, default: 0
+            The seed of the random number generator.
+        """
+        pose_estimation_data = self._load_source_data()
+        pose_estimation_metadata = metadata["PoseEstimation"]
+        pose_estimation = nwbfile["processing"]["behavior"]["PoseEstimation"]
+        for column_name in pose_estimation_metadata:
+            pose_estimation_series = pose_estimation[pose_estimation_metadata[column_name]["name"]]
+            pose_estimation_series_data = pose_estimation_data[column_name]
+            for dataset_name, source_data in [
+                ("data", pose_estimation_series_data[["x", "y"]].values),
+                ("confidence", pose_estimation_series_data["likelihood"].values),
+            ]:
+                verify_array(
+                    dataset=pose_estimation_series[dataset_name],
+                    array=source_data,
+                    sample_fraction=sample_fraction,
+                    seed=seed,
+                )
@@ -1,5 +1,6 @@
 import re
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 from typing import Optional
 
@@ -7,13 +8,15 @@ import numpy as np
 from hdmf.backends.hdf5 import H5DataIO
 from neuroconv.basedatainterface import BaseDataInterface
 from neuroconv.tools.nwb_helpers import make_or_load_nwbfile
-from neuroconv.utils import FilePathType, dict_deep_update
+from neuroconv.utils import FilePathType, OptionalFolderPathType, dict_deep_update
 from oiffile import OifFile, SettingsFile
 from pynwb import NWBFile
 from pynwb.base import Images
 from pynwb.image import GrayscaleImage
 from tifffile import tifffile
 
+from tye_lab_to_nwb.tools import get_shared_datasets
+
 
 class NeurotensinConfocalImagesInterface(BaseDataInterface):
     """Primary interface for converting confocal images for the Neurotensin experiment."""
@@ -119,18 +122,52 @@ class NeurotensinConfocalImagesInterface(BaseDataInterface):
         metadata: Optional[dict] = None,
         conversion_options: Optional[dict] = None,
         overwrite: bool = False,
+        shared_assets_folder_path: OptionalFolderPathType = None,
     ):
+        """
+        Adds the confocal images to the NWBFile.
+
+        Parameters
+        ----------
+        shared_assets_folder_path : FolderPathType, optional
+            The folder of the assets that are shared by the sessions of a batch. When specified, the confocal images
+            (and the composite images) are written once into a shared asset file and the NWB file links to them,
+            otherwise the images are copied into the NWB file.
+        """
+        shared_datasets = None
+        if shared_assets_folder_path:
+            # The OIF file and the image files in its storage folder, sorted to make the hash reproducible
+            file_paths = [
+                Path(self.source_data["file_path"]).parent / file_name
+                for file_name in sorted(self.oif.filesystem.files())
+            ]
+            if self.composite_images is not None:
+                file_paths.append(self.source_data["composite_tif_file_path"])
+            shared_datasets = get_shared_datasets(
+                shared_assets_folder_path=shared_assets_folder_path,
+                file_paths=file_paths,
+                create_container=partial(self._create_images, metadata=metadata),
+            )
+
+        images = self._create_images(metadata=metadata, shared_datasets=shared_datasets)
+        nwbfile.add_acquisition(images)
+
+    def _create_images(self, metadata: dict, shared_datasets: Optional[dict] = None) -> Images:
         images = Images(name=metadata["Images"]["name"], description=metadata["Images"]["description"])
         file_list = list(self.oif.series[0])
 
         for file_ind, file in enumerate(file_list):
-            image = self.oif.series[0].imread(file)
             image_metadata = metadata["Images"]["images"][file_ind]
+            if shared_datasets is not None:
+                image_data = shared_datasets[image_metadata["name"]]
+            else:
+                image = self.oif.series[0].imread(file)
+                image_data = H5DataIO(image.T, compression=True)
 
             images.add_image(
                 GrayscaleImage(
                     name=image_metadata["name"],
-                    data=H5DataIO(image.T, compression=True),
+                    data=image_data,
                     description=image_metadata["description"],
                 )
             )
@@ -139,12 +176,16 @@ class NeurotensinConfocalImagesInterface(BaseDataInterface):
         if self.composite_images is not None:
             for image_ind in range(self.composite_images.shape[0]):
                 image_metadata = metadata["Images"]["images"][len(file_list) + image_ind]
+                if shared_datasets is not None:
+                    image_data = shared_datasets[image_metadata["name"]]
+                else:
+                    image_data = H5DataIO(self.composite_images[image_ind].T, compression=True)
                 images.add_image(
                     GrayscaleImage(
                         name=image_metadata["name"],
-                        data=H5DataIO(self.composite_images[image_ind].T, compression=True),
+                        data=image_data,
                         description=image_metadata["description"],
                     )
                 )
 
-        nwbfile.add_acquisition(images)
+        return images
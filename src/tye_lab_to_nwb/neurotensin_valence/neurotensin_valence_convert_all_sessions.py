@@ -1,11 +1,11 @@
 import os
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 import numpy as np
 import pandas as pd
-from neuroconv.utils import FilePathType
+from neuroconv.utils import FilePathType, FolderPathType, OptionalFolderPathType
 from nwbinspector.utils import calculate_number_of_cpu
 from pynwb.file import Subject
 from tqdm import tqdm
@@ -16,6 +16,12 @@ from tye_lab_to_nwb.neurotensin_valence.neurotensin_valence_convert_session impo
 def parallel_convert_sessions(
     excel_file_path: FilePathType,
     num_parallel_jobs: Optional[int] = 1,
+    profile: Optional[bool] = False,
+    shared_assets_folder_path: OptionalFolderPathType = None,
+    catalog_file_path: Optional[FilePathType] = None,
+    parquet_folder_path: Optional[FolderPathType] = None,
+    peri_event_window: Optional[Tuple[float, float]] = None,
+    peri_event_bin_size: Optional[float] = 0.05,
 ):
     """
     Parallel converts NWB files.
@@ -29,7 +35,24 @@ def parallel_convert_sessions(
     num_parallel_jobs: int, optional
         The number of parallel converted sessions. The default is to convert one session at a time.
         When not specified (num_parallel_jobs=None) it is set to use all available CPUs.
-
+    profile: bool, optional
+        Whether to record a timeline of the conversion for each session (saved next to the NWB file as
+        '<nwbfile name>_trace.json'). When the Excel file has a 'profile' column, it enables profiling per session.
+        Default is to not profile the conversions.
+    shared_assets_folder_path: FolderPathType, optional
+        The folder of the assets that are shared by the sessions, e.g. the confocal images of a subject. Each unique asset is written once
+        into this folder and linked from the NWB files. Default is to copy the assets into each NWB file.
+    catalog_file_path: FilePathType, optional
+        The path to the SQLite catalog where each converted session is added (see `tye_lab_to_nwb.tools.catalog`).
+        Default is to not catalog the sessions.
+    parquet_folder_path: FolderPathType, optional
+        The folder where the trials, events, units and pose estimation tables of each session are written as Parquet
+        files partitioned by subject and session. Default is to not write the sidecars.
+    peri_event_window: tuple of float, optional
+        The start and stop time (in seconds) of the window around the events for the binned responses that are stored
+        in each NWB file. Default is to not compute the responses.
+    peri_event_bin_size: float, optional
+        The width of the bins of the peri-event responses in seconds, the default is 0.05.
     """
 
     sessions_config_file_path = Path(excel_file_path)
@@ -77,6 +100,12 @@ def parallel_convert_sessions(
                         confocal_images_oif_file_path=row["confocal_images_oif_file_path"],
                         confocal_images_composite_tif_file_path=row["confocal_images_composite_tif_file_path"],
                         stub_test=False,
+                        profile=bool(row["profile"]) if "profile" in config.columns else profile,
+                        catalog_file_path=catalog_file_path,
+                        parquet_folder_path=parquet_folder_path,
+                        peri_event_window=peri_event_window,
+                        peri_event_bin_size=peri_event_bin_size,
+                        shared_assets_folder_path=shared_assets_folder_path,
                     )
                 )
             for future in as_completed(futures):
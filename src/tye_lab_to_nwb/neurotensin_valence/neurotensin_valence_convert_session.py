@@ -2,7 +2,7 @@
 
 import traceback
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from warnings import warn
 
 from dateutil import parser
@@ -17,6 +17,15 @@ from nwbinspector import inspect_nwbfile
 from nwbinspector.inspector_tools import save_report, format_messages
 
 from tye_lab_to_nwb.neurotensin_valence import NeurotensinValenceNWBConverter
+from tye_lab_to_nwb.tools import (
+    repack_nwbfile,
+    verify_nwbfile,
+    profile_conversion,
+    update_catalog,
+    export_parquet_sidecars,
+    add_peri_event_responses,
+    close_shared_asset_files,
+)
 
 
 def session_to_nwb(
@@ -34,6 +43,14 @@ def session_to_nwb(
     confocal_images_oif_file_path: Optional[FilePathType] = None,
     confocal_images_composite_tif_file_path: Optional[FilePathType] = None,
     stub_test: bool = False,
+    repack: bool = False,
+    verification_sample_fraction: Optional[float] = None,
+    profile: Optional[bool] = False,
+    shared_assets_folder_path: Optional[FolderPathType] = None,
+    catalog_file_path: Optional[FilePathType] = None,
+    parquet_folder_path: Optional[FolderPathType] = None,
+    peri_event_window: Optional[Tuple[float, float]] = None,
+    peri_event_bin_size: Optional[float] = 0.05,
 ):
     """
     Converts a single session to NWB.
@@ -65,6 +82,33 @@ def session_to_nwb(
     stub_test: bool, optional
         For testing purposes, when stub_test=True only writes a subset of ecephys and plexon data.
         Default is to write the whole ecephys recording and plexon data to the file.
+    repack: bool, optional
+        Whether to rewrite the NWB file with the HDF5 paged file-space strategy after the conversion.
+        Repacked files open with far fewer small reads over the network. Default is to not repack the file.
+    verification_sample_fraction: float, optional
+        The fraction of chunks of each written dataset that is compared against the source data after the conversion.
+        A mismatch fails the session and the error log points to the dataset and the chunk. Default is to not verify.
+    profile: bool, optional
+        Whether to record a timeline of the conversion (interfaces, chunk reads and chunk writes) in the Chrome trace
+        format. The trace is saved next to the NWB file as '<nwbfile name>_trace.json'. Default is to not profile.
+    shared_assets_folder_path: FolderPathType, optional
+        The folder of the assets that are shared by the sessions of a batch, identified by the hash of their contents.
+        When specified, the confocal images (OIF and composite TIF) are written once into this folder and linked from the NWB file with an HDF5 external link.
+        The folder must be kept next to the NWB files. Default is to copy the images into each NWB file.
+    catalog_file_path: FilePathType, optional
+        The path to the SQLite catalog of the converted sessions (see `tye_lab_to_nwb.tools.catalog`).
+        When specified, the metadata, streams and counts of the NWB file are added to the catalog after the conversion.
+        Default is to not catalog the session.
+    parquet_folder_path: FolderPathType, optional
+        The folder of the Parquet sidecars of the batch (see `tye_lab_to_nwb.tools.parquet_sidecars`). When specified,
+        the trials, events, units and pose estimation tables are also written as Parquet files partitioned by subject
+        and session. Default is to not write the sidecars.
+    peri_event_window: tuple of float, optional
+        The start and stop time (in seconds) of the window around the events for the binned responses of the units
+        and of the ROI traces, which are stored in the "peri_event_responses" processing module
+        (see `tye_lab_to_nwb.tools.peri_event_responses`). Default is to not compute the responses.
+    peri_event_bin_size: float, optional
+        The width of the bins of the peri-event responses in seconds, the default is 0.05.
     """
 
     source_data = dict()
@@ -142,6 +186,8 @@ def session_to_nwb(
             images_source_data.update(composite_tif_file_path=str(confocal_images_composite_tif_file_path))
 
         source_data.update(dict(Images=images_source_data))
+        if shared_assets_folder_path:
+            conversion_options.update(dict(Images=dict(shared_assets_folder_path=str(shared_assets_folder_path))))
 
     converter = NeurotensinValenceNWBConverter(source_data=source_data)
 
@@ -180,9 +226,28 @@ def session_to_nwb(
     nwbfile_path = Path(nwbfile_path)
     try:
         # Run conversion
-        converter.run_conversion(
-            nwbfile_path=str(nwbfile_path), metadata=metadata, conversion_options=conversion_options
-        )
+        trace_file_path = nwbfile_path.parent / f"{nwbfile_path.stem}_trace.json" if profile else None
+        with profile_conversion(converter=converter, trace_file_path=trace_file_path), export_parquet_sidecars(
+            converter=converter, sidecar_folder_path=parquet_folder_path
+        ):
+            converter.run_conversion(
+                nwbfile_path=str(nwbfile_path), metadata=metadata, conversion_options=conversion_options
+            )
+
+        if peri_event_window:
+            add_peri_event_responses(nwbfile_path=nwbfile_path, window=peri_event_window, bin_size=peri_event_bin_size)
+
+        if repack:
+            repack_nwbfile(nwbfile_path=nwbfile_path)
+
+        if verification_sample_fraction:
+            verify_nwbfile(
+                nwbfile_path=nwbfile_path,
+                data_interfaces=converter.data_interface_objects,
+                metadata=metadata,
+                conversion_options=conversion_options,
+                sample_fraction=verification_sample_fraction,
+            )
 
         # Run inspection for nwbfile
         results = list(inspect_nwbfile(nwbfile_path=nwbfile_path))
@@ -194,10 +259,16 @@ def session_to_nwb(
                 levels=["importance", "file_path"],
             ),
         )
+
+        if catalog_file_path:
+            update_catalog(catalog_file_path=catalog_file_path, nwbfile_path=nwbfile_path, source_data=source_data)
     except Exception as e:
         with open(f"{nwbfile_path.parent}/{nwbfile_path.stem}_error_log.txt", "w") as f:
             f.write(traceback.format_exc())
         warn(f"There was an error during the conversion of {nwbfile_path}. The full traceback: {e}")
+    finally:
+        # The shared assets are linked to the NWB file, they are not read after the conversion
+        close_shared_asset_files()
 
 
 if __name__ == "__main__":
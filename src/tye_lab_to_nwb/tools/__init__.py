@@ -1,2 +1,15 @@
 from .read_session_config import read_session_config
 from .parallel_execute import parallel_execute
+from .repack_nwbfile import repack_nwbfile, benchmark_read_latency
+from .verify_nwbfile import verify_nwbfile
+from .storage_report import get_storage_report, summarize_storage_report
+from .profiling import profile_conversion, trace_span
+from .shared_assets import get_content_hash, get_shared_datasets, close_shared_asset_files
+from .watch_folders import watch_folders
+from .catalog import update_catalog, index_nwbfiles, query_catalog
+from .parquet_sidecars import export_parquet_sidecars, get_sidecar_tables, write_sidecar_tables
+from .lazy_reader import read_nwbfile_series, read_sessions_series, close_files
+from .peri_event_responses import add_peri_event_responses, get_peri_event_responses
+from .envelope_pyramid import compute_envelope_pyramids, get_envelope
+from .summary_statistics import compute_summary_statistics
+from .time_intervals import build_time_intervals, build_time_intervals_from_dataframe, add_time_intervals
@@ -0,0 +1,339 @@
+import hashlib
+import json
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+from warnings import warn
+
+import h5py
+from neuroconv.utils import FilePathType, FolderPathType
+from tqdm import tqdm
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    nwbfile_path TEXT PRIMARY KEY,
+    identifier TEXT,
+    session_id TEXT,
+    session_description TEXT,
+    session_start_time TEXT,
+    subject_id TEXT,
+    species TEXT,
+    sex TEXT,
+    age TEXT,
+    genotype TEXT,
+    strain TEXT,
+    num_units INTEGER,
+    num_trials INTEGER,
+    num_events INTEGER,
+    file_size INTEGER,
+    source_fingerprints TEXT,
+    indexed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS streams (
+    nwbfile_path TEXT REFERENCES sessions(nwbfile_path) ON DELETE CASCADE,
+    name TEXT,
+    neurodata_type TEXT,
+    shape TEXT,
+    sampling_rate REAL,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_subject_id ON sessions(subject_id);
+CREATE INDEX IF NOT EXISTS streams_nwbfile_path ON streams(nwbfile_path);
+CREATE INDEX IF NOT EXISTS streams_neurodata_type ON streams(neurodata_type);
+"""
+
+SUBJECT_FIELDS = ["subject_id", "species", "sex", "age", "genotype", "strain"]
+
+
+def _decode(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _read_scalar(file: h5py.File, name: str) -> Optional[str]:
+    return _decode(file[name][()]) if name in file else None
+
+
+def get_source_fingerprints(source_data: dict) -> dict:
+    """
+    Computes a fingerprint of the source files of each interface from the sizes and modification times of the files.
+
+    The contents are not read, so the fingerprints are cheap to compute for large recordings but they only detect
+    that a source file was rewritten, not how.
+
+    Parameters
+    ----------
+    source_data : dict
+        The source data of the converter, the values of the "file_path", "file_paths" and "folder_path" keys are
+        fingerprinted. The folders are fingerprinted from all the files they contain.
+
+    Returns
+    -------
+    source_fingerprints : dict
+        The fingerprint of each source path.
+    """
+    source_fingerprints = dict()
+    for interface_source_data in source_data.values():
+        for key, source_paths in interface_source_data.items():
+            if not key.endswith(("file_path", "file_paths", "folder_path")) or not source_paths:
+                continue
+            for source_path in map(Path, source_paths if isinstance(source_paths, list) else [source_paths]):
+                file_paths = sorted(source_path.rglob("*")) if source_path.is_dir() else [source_path]
+                fingerprint = hashlib.sha1()
+                for file_path in filter(Path.is_file, file_paths):
+                    stat = file_path.stat()
+                    fingerprint.update(
+                        f"{file_path.relative_to(source_path.parent)}:{stat.st_size}:{stat.st_mtime_ns};".encode()
+                    )
+                source_fingerprints[str(source_path)] = fingerprint.hexdigest()
+    return source_fingerprints
+
+
+def get_nwbfile_summary(nwbfile_path: FilePathType) -> dict:
+    """
+    Collects the session and subject metadata, the streams, and the unit, trial and event counts of an NWB file.
+
+    Only the HDF5 metadata and the scalar datasets are read, with the exception of the first and last timestamps
+    of the streams that have no sampling rate.
+
+    Parameters
+    ----------
+    nwbfile_path : FilePathType
+        The path to the NWB file.
+
+    Returns
+    -------
+    summary : dict
+        The columns of the "sessions" table with the list of the rows of the "streams" table under "streams".
+    """
+    nwbfile_path = Path(nwbfile_path)
+    streams = []
+    num_events = 0
+
+    def collect_stream(name: str, obj):
+        nonlocal num_events
+        if not isinstance(obj, h5py.Group) or name.startswith(("general", "specifications", "units", "intervals")):
+            return
+        neurodata_type = _decode(obj.attrs.get("neurodata_type"))
+        if neurodata_type == "AnnotatedEventsTable" and "event_times" in obj:
+            num_events += obj["event_times"].shape[0]
+        if not isinstance(obj.get("data"), h5py.Dataset):
+            return
+
+        shape = obj["data"].shape
+        sampling_rate, duration = None, None
+        if "starting_time" in obj:
+            sampling_rate = float(obj["starting_time"].attrs["rate"])
+            duration = shape[0] / sampling_rate if shape else None
+        elif "timestamps" in obj and obj["timestamps"].shape and obj["timestamps"].shape[0]:
+            timestamps = obj["timestamps"]
+            duration = float(timestamps[-1] - timestamps[0])
+        streams.append(
+            dict(
+                name=obj.name,
+                neurodata_type=neurodata_type,
+                shape=json.dumps(shape),
+                sampling_rate=sampling_rate,
+                duration=duration,
+            )
+        )
+
+    with h5py.File(nwbfile_path, mode="r") as file:
+        file.visititems(collect_stream)
+        summary = dict(
+            nwbfile_path=str(nwbfile_path.resolve()),
+            identifier=_read_scalar(file, "identifier"),
+            session_id=_read_scalar(file, "general/session_id"),
+            session_description=_read_scalar(file, "session_description"),
+            session_start_time=_read_scalar(file, "session_start_time"),
+            **{field: _read_scalar(file, f"general/subject/{field}") for field in SUBJECT_FIELDS},
+            num_units=file["units/id"].shape[0] if "units/id" in file else 0,
+            num_trials=file["intervals/trials/id"].shape[0] if "intervals/trials/id" in file else 0,
+        )
+        for intervals_name, intervals in file.get("intervals", dict()).items():
+            if intervals_name != "trials" and "id" in intervals:
+                num_events += intervals["id"].shape[0]
+
+    summary.update(
+        num_events=num_events,
+        file_size=os.path.getsize(nwbfile_path),
+        streams=streams,
+    )
+    return summary
+
+
+def _connect(catalog_file_path: FilePathType) -> sqlite3.Connection:
+    # The sessions of a batch are converted in parallel, concurrent writers wait for the lock
+    connection = sqlite3.connect(str(catalog_file_path), timeout=60.0)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA foreign_keys=ON")
+    connection.executescript(CATALOG_SCHEMA)
+    return connection
+
+
+def _upsert_summary(connection: sqlite3.Connection, summary: dict, source_fingerprints: Optional[dict] = None):
+    summary = dict(summary)
+    streams = summary.pop("streams")
+    if source_fingerprints is None:
+        # Keep the fingerprints recorded at the conversion when the file is indexed again
+        row = connection.execute(
+            "SELECT source_fingerprints FROM sessions WHERE nwbfile_path = ?", (summary["nwbfile_path"],)
+        ).fetchone()
+        summary.update(source_fingerprints=row[0] if row else None)
+    else:
+        summary.update(source_fingerprints=json.dumps(source_fingerprints))
+    summary.update(indexed_at=datetime.now().isoformat(timespec="seconds"))
+
+    connection.execute("DELETE FROM sessions WHERE nwbfile_path = ?", (summary["nwbfile_path"],))
+    connection.execute(
+        f"INSERT INTO sessions ({', '.join(summary)}) VALUES ({', '.join('?' * len(summary))})",
+        list(summary.values()),
+    )
+    connection.executemany(
+        "INSERT INTO streams VALUES (:nwbfile_path, :name, :neurodata_type, :shape, :sampling_rate, :duration)",
+        [dict(nwbfile_path=summary["nwbfile_path"], **stream) for stream in streams],
+    )
+
+
+def update_catalog(
+    catalog_file_path: FilePathType,
+    nwbfile_path: FilePathType,
+    source_data: Optional[dict] = None,
+):
+    """
+    Adds (or replaces) the row of an NWB file in the catalog of converted sessions.
+
+    Parameters
+    ----------
+    catalog_file_path : FilePathType
+        The path to the SQLite catalog, it is created when it does not exist.
+    nwbfile_path : FilePathType
+        The path to the NWB file.
+    source_data : dict, optional
+        The source data of the converter, used to fingerprint the source files of the session.
+    """
+    summary = get_nwbfile_summary(nwbfile_path=nwbfile_path)
+    source_fingerprints = get_source_fingerprints(source_data=source_data) if source_data else None
+    with _connect(catalog_file_path=catalog_file_path) as connection:
+        _upsert_summary(connection=connection, summary=summary, source_fingerprints=source_fingerprints)
+    connection.close()
+
+
+def index_nwbfiles(
+    catalog_file_path: FilePathType,
+    nwbfile_folder_path: FolderPathType,
+    num_parallel_jobs: Optional[int] = 1,
+):
+    """
+    Adds the existing NWB files of a folder (searched recursively) to the catalog of converted sessions.
+
+    The files are read in parallel, only the HDF5 metadata is read (see `get_nwbfile_summary`).
+    The files that can not be read are skipped with a warning.
+
+    Parameters
+    ----------
+    catalog_file_path : FilePathType
+        The path to the SQLite catalog, it is created when it does not exist.
+    nwbfile_folder_path : FolderPathType
+        The folder of the NWB files.
+    num_parallel_jobs : int, optional
+        The number of files that are read in parallel. The default is to read one file at a time.
+        When not specified (num_parallel_jobs=None) it is set to use all available CPUs.
+    """
+    nwbfile_paths = sorted(Path(nwbfile_folder_path).rglob("*.nwb"))
+    with ProcessPoolExecutor(max_workers=num_parallel_jobs) as executor, _connect(catalog_file_path) as connection:
+        futures = {
+            executor.submit(get_nwbfile_summary, nwbfile_path=nwbfile_path): nwbfile_path
+            for nwbfile_path in nwbfile_paths
+        }
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            try:
+                _upsert_summary(connection=connection, summary=future.result())
+            except Exception as e:
+                warn(f"Skipping {futures[future]}, the file can not be read: {e}")
+    connection.close()
+
+
+def query_catalog(
+    catalog_file_path: FilePathType,
+    subject_id: Optional[str] = None,
+    neurodata_types: Optional[List[str]] = None,
+    min_num_units: Optional[int] = None,
+    min_num_trials: Optional[int] = None,
+) -> List[dict]:
+    """
+    Returns the sessions of the catalog that match all of the given criteria.
+
+    Parameters
+    ----------
+    catalog_file_path : FilePathType
+        The path to the SQLite catalog.
+    subject_id : str, optional
+        The identifier of the subject.
+    neurodata_types : list of str, optional
+        The neurodata types of the streams that must be in the session (e.g. ["ElectricalSeries", "PoseEstimation"]).
+        Container types (e.g. "PoseEstimation") match through their series (e.g. "PoseEstimationSeries") as well.
+    min_num_units : int, optional
+        The minimum number of units, e.g. 1 for the sessions with sorting data.
+    min_num_trials : int, optional
+        The minimum number of trials.
+
+    Returns
+    -------
+    sessions : list of dict
+        The rows of the "sessions" table, with the list of the streams of each session under "streams".
+    """
+    conditions, parameters = [], []
+    if subject_id is not None:
+        conditions.append("subject_id = ?")
+        parameters.append(subject_id)
+    if min_num_units is not None:
+        conditions.append("num_units >= ?")
+        parameters.append(min_num_units)
+    if min_num_trials is not None:
+        conditions.append("num_trials >= ?")
+        parameters.append(min_num_trials)
+    for neurodata_type in neurodata_types or []:
+        conditions.append(
+            "EXISTS (SELECT 1 FROM streams WHERE streams.nwbfile_path = sessions.nwbfile_path "
+            "AND streams.neurodata_type LIKE ?)"
+        )
+        parameters.append(f"{neurodata_type}%")
+
+    connection = _connect(catalog_file_path=catalog_file_path)
+    connection.row_factory = sqlite3.Row
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    sessions = [
+        dict(row) for row in connection.execute(f"SELECT * FROM sessions{where} ORDER BY nwbfile_path", parameters)
+    ]
+    for session in sessions:
+        session.update(
+            streams=[
+                dict(row)
+                for row in connection.execute(
+                    "SELECT name, neurodata_type, shape, sampling_rate, duration FROM streams WHERE nwbfile_path = ?",
+                    (session["nwbfile_path"],),
+                )
+            ]
+        )
+    connection.close()
+    return sessions
+
+
+if __name__ == "__main__":
+    # The path to the catalog of the converted sessions
+    catalog_file_path = Path("/Volumes/t7-ssd/Hao_NWB/nwbfiles/catalog.sqlite")
+
+    # Index the NWB files that were converted before the catalog existed
+    index_nwbfiles(
+        catalog_file_path=catalog_file_path,
+        nwbfile_folder_path=Path("/Volumes/t7-ssd/Hao_NWB/nwbfiles"),
+        num_parallel_jobs=8,
+    )
+
+    for session in query_catalog(catalog_file_path=catalog_file_path, min_num_units=1):
+        print(session["nwbfile_path"], session["subject_id"], session["num_units"])
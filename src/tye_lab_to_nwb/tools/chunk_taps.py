@@ -0,0 +1,113 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple, Union
+
+import numpy as np
+from hdmf.data_utils import AbstractDataChunkIterator, DataIO, GenericDataChunkIterator
+from neuroconv import BaseDataInterface, NWBConverter
+from neuroconv.utils import FilePathType
+from pynwb import NWBHDF5IO, NWBFile, TimeSeries
+
+from .method_wrappers import wrap_add_to_nwbfile
+
+
+class ChunkTap(ABC):
+    """
+    Receives the chunks of the data of a series while they are written and adds its results to the NWB file.
+
+    The chunks can arrive in any order and can cover part of the trailing (channel or pixel) dimensions.
+    """
+
+    def __init__(self, series: TimeSeries, shape: Tuple[int, ...], dtype: np.dtype):
+        self.series = series
+        self.shape = shape
+        self.dtype = dtype
+
+    @abstractmethod
+    def update(self, data: np.ndarray, selection: Tuple[slice, ...]):
+        """Accumulates a chunk of the data, `selection` is the location of the chunk in the dataset."""
+        pass
+
+    @abstractmethod
+    def add_to_nwbfile(self, nwbfile: NWBFile):
+        """Adds the results to the NWB file, which is open in append mode after the conversion."""
+        pass
+
+    def close(self):
+        """Releases the resources of the tap (e.g. temporary files), after the NWB file is written or on failure."""
+        pass
+
+
+def _get_series_data(series: TimeSeries):
+    data = series.data
+    return data.data if isinstance(data, DataIO) else data
+
+
+@contextmanager
+def tap_chunk_iterators(
+    converter: Union[BaseDataInterface, NWBConverter],
+    nwbfile_path: FilePathType,
+    create_taps: Callable[[TimeSeries, Tuple[int, ...], np.dtype], List[ChunkTap]],
+):
+    """
+    Streams the data of the series of a conversion through taps while it is written, in a single pass.
+
+    Once the data interfaces have added their series to the in-memory NWB file, `create_taps` is called for each
+    series. The data written with a GenericDataChunkIterator (e.g. the recordings and the Miniscope movies) is
+    passed to the taps chunk by chunk as the HDF5 writer pulls it from the iterator. The data that is already in
+    memory (e.g. the photometry signals) is passed at once. When the conversion succeeds, the NWB file is opened in
+    append mode and each tap adds its results. The iterators are tapped only while the context is active, and the
+    taps are closed when the context exits (whether the conversion succeeds or not).
+
+    Parameters
+    ----------
+    converter : NWBConverter or BaseDataInterface
+        The converter (or single data interface) that runs the conversion.
+    nwbfile_path : FilePathType
+        The path to the NWB file of the conversion.
+    create_taps : callable
+        Returns the taps of a series from the series, the shape and the dtype of its data (an empty list to skip it).
+    """
+    taps: Dict[int, List[ChunkTap]] = dict()
+    in_memory_taps: List[ChunkTap] = []
+    original_next = GenericDataChunkIterator.__next__
+
+    def create_taps_of_series(nwbfile: NWBFile):
+        for neurodata_object in nwbfile.all_children():
+            if not isinstance(neurodata_object, TimeSeries):
+                continue
+            data = _get_series_data(series=neurodata_object)
+            if isinstance(data, GenericDataChunkIterator):
+                series_taps = create_taps(neurodata_object, data.maxshape, data.dtype)
+                taps.setdefault(id(data), []).extend(series_taps)
+            elif not isinstance(data, AbstractDataChunkIterator) and data is not None:
+                data = np.asarray(data)
+                series_taps = create_taps(neurodata_object, data.shape, data.dtype)
+                for tap in series_taps:
+                    tap.update(data=data, selection=tuple(slice(0, length) for length in data.shape))
+                in_memory_taps.extend(series_taps)
+
+    def tapped_next(self):
+        data_chunk = original_next(self)
+        for tap in taps.get(id(self), []):
+            tap.update(data=data_chunk.data, selection=data_chunk.selection)
+        return data_chunk
+
+    GenericDataChunkIterator.__next__ = tapped_next
+    try:
+        try:
+            with wrap_add_to_nwbfile(converter=converter, after=create_taps_of_series):
+                yield
+        finally:
+            GenericDataChunkIterator.__next__ = original_next
+
+        all_taps = [tap for series_taps in taps.values() for tap in series_taps] + in_memory_taps
+        if all_taps:
+            with NWBHDF5IO(path=str(nwbfile_path), mode="a", load_namespaces=True) as io:
+                nwbfile = io.read()
+                for tap in all_taps:
+                    tap.add_to_nwbfile(nwbfile=nwbfile)
+                io.write(nwbfile)
+    finally:
+        for tap in [tap for series_taps in taps.values() for tap in series_taps] + in_memory_taps:
+            tap.close()
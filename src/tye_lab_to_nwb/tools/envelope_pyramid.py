@@ -0,0 +1,217 @@
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple, Union
+
+import h5py
+import numpy as np
+from hdmf.backends.hdf5 import H5DataIO
+from hdmf.data_utils import DataIO
+from neuroconv import BaseDataInterface, NWBConverter
+from neuroconv.utils import FilePathType
+from pynwb import NWBFile, TimeSeries
+from pynwb.ecephys import ElectricalSeries
+
+from .chunk_taps import ChunkTap, tap_chunk_iterators
+
+ENVELOPE_MODULE_NAME = "ecephys_envelopes"
+# The number of samples of each bin of the finest level, the finer views are read from the raw data
+DEFAULT_BASE_DECIMATION = 256
+# Each level has this many times fewer bins than the previous one
+LEVEL_DECIMATION = 4
+# The coarsest level has at least this many bins (a screen width)
+MIN_NUM_BINS = 2048
+
+
+class EnvelopePyramidTap(ChunkTap):
+    """
+    Accumulates the per-channel minimum and maximum of the bins of an electrical series from its written chunks,
+    and adds the envelope pyramid to the "ecephys_envelopes" processing module.
+
+    Each level is a TimeSeries named "<series name>_envelope_<decimation>" with the rate (or the timestamps) of its
+    bins, and the data of shape (number of bins, number of channels, 2) with the minimum and maximum of each channel.
+    The channels are in the order of the series and the values are in the unit (and conversion) of the series.
+    """
+
+    def __init__(self, series: TimeSeries, shape: Tuple[int, ...], dtype: np.dtype, decimation: int):
+        super().__init__(series=series, shape=shape, dtype=dtype)
+        self.decimation = decimation
+        num_bins = -(-shape[0] // decimation)
+        num_channels = int(np.prod(shape[1:]))
+        info = np.iinfo(dtype) if np.issubdtype(dtype, np.integer) else np.finfo(dtype)
+        self.mins = np.full((num_bins, num_channels), info.max, dtype=dtype)
+        self.maxs = np.full((num_bins, num_channels), info.min, dtype=dtype)
+
+    def update(self, data: np.ndarray, selection: Tuple[slice, ...]):
+        # The chunks can start or stop in the middle of a bin
+        start_sample, stop_sample = selection[0].start or 0, selection[0].stop
+        channel_selection = selection[1] if len(selection) > 1 else slice(None)
+        first_bin, last_bin = start_sample // self.decimation, (stop_sample - 1) // self.decimation
+        bin_starts = np.arange(first_bin + 1, last_bin + 1) * self.decimation - start_sample
+        bin_starts = np.concatenate([[0], bin_starts])
+
+        data = data.reshape(len(data), -1)
+        bin_selection = (slice(first_bin, last_bin + 1), channel_selection)
+        self.mins[bin_selection] = np.minimum(self.mins[bin_selection], np.minimum.reduceat(data, bin_starts, axis=0))
+        self.maxs[bin_selection] = np.maximum(self.maxs[bin_selection], np.maximum.reduceat(data, bin_starts, axis=0))
+
+    def get_levels(self, min_num_bins: int = MIN_NUM_BINS) -> Dict[int, np.ndarray]:
+        """
+        Returns the envelope of each level of the pyramid by its decimation (the number of samples per bin).
+
+        The envelopes have shape (number of bins, number of channels, 2), the last axis is the minimum and maximum.
+        """
+        envelope = np.stack([self.mins, self.maxs], axis=-1)
+        decimation = self.decimation
+        levels = {decimation: envelope}
+        while len(envelope) > min_num_bins * LEVEL_DECIMATION:
+            num_bins = -(-len(envelope) // LEVEL_DECIMATION)
+            padding = num_bins * LEVEL_DECIMATION - len(envelope)
+            # The padding repeats the last bin, which does not change the minimum or maximum
+            padded = np.concatenate([envelope, np.repeat(envelope[-1:], padding, axis=0)])
+            padded = padded.reshape(num_bins, LEVEL_DECIMATION, *envelope.shape[1:])
+            envelope = np.stack([padded[..., 0].min(axis=1), padded[..., 1].max(axis=1)], axis=-1)
+            decimation *= LEVEL_DECIMATION
+            levels[decimation] = envelope
+        return levels
+
+    def add_to_nwbfile(self, nwbfile: NWBFile):
+        series = self.series
+        if ENVELOPE_MODULE_NAME in nwbfile.processing:
+            envelope_module = nwbfile.processing[ENVELOPE_MODULE_NAME]
+        else:
+            envelope_module = nwbfile.create_processing_module(
+                name=ENVELOPE_MODULE_NAME,
+                description="The per-channel minimum and maximum of the electrical series at decimating resolutions.",
+            )
+        # The timestamps can be linked from another series or wrapped for the compression
+        timestamps = getattr(series.timestamps, "timestamps", series.timestamps)
+        if isinstance(timestamps, DataIO):
+            timestamps = timestamps.data
+        for decimation, envelope in self.get_levels().items():
+            if timestamps is not None:
+                timing = dict(timestamps=np.asarray(timestamps[::decimation]))
+            else:
+                timing = dict(starting_time=series.starting_time or 0.0, rate=series.rate / decimation)
+            envelope_module.add(
+                TimeSeries(
+                    name=f"{series.name}_envelope_{decimation}",
+                    description=(
+                        f"The minimum and maximum of each channel of {series.name} over bins of {decimation} samples, "
+                        "the last axis is (minimum, maximum)."
+                    ),
+                    data=H5DataIO(envelope, compression="gzip", chunks=(min(len(envelope), 4096), *envelope.shape[1:])),
+                    unit=series.unit,
+                    conversion=series.conversion,
+                    offset=series.offset,
+                    **timing,
+                )
+            )
+
+
+@contextmanager
+def compute_envelope_pyramids(
+    converter: Union[BaseDataInterface, NWBConverter],
+    nwbfile_path: FilePathType,
+    base_decimation: Optional[int] = DEFAULT_BASE_DECIMATION,
+):
+    """
+    Computes the envelope pyramids of the electrical series while their raw data is written and adds them to the
+    NWB file when the conversion succeeds (see `EnvelopePyramidTap`).
+
+    The minimum and maximum are accumulated from the chunks of the electrical series as they are written
+    (see `tye_lab_to_nwb.tools.chunk_taps`), so the source is read only once. The finest level has
+    `base_decimation` samples per bin and is kept in memory until the end of the conversion (2 values per bin and
+    channel). When `base_decimation` is None nothing is computed.
+
+    Parameters
+    ----------
+    converter : NWBConverter or BaseDataInterface
+        The converter (or single data interface) that runs the conversion.
+    nwbfile_path : FilePathType
+        The path to the NWB file of the conversion.
+    base_decimation : int, optional
+        The number of samples of each bin of the finest level, the default is 256.
+    """
+    if base_decimation is None:
+        yield
+        return
+
+    def create_taps(series: TimeSeries, shape: Tuple[int, ...], dtype: np.dtype) -> List[ChunkTap]:
+        if not isinstance(series, ElectricalSeries):
+            return []
+        return [EnvelopePyramidTap(series=series, shape=shape, dtype=dtype, decimation=base_decimation)]
+
+    with tap_chunk_iterators(converter=converter, nwbfile_path=nwbfile_path, create_taps=create_taps):
+        yield
+
+
+def get_envelope(
+    nwbfile_path: FilePathType,
+    series_name: str,
+    start_time: float,
+    stop_time: float,
+    num_pixels: int,
+    channel_indices: Optional[List[int]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reads the envelope of an electrical series for a time window at the resolution of a display.
+
+    The coarsest level with at least one bin per pixel is read. When the window is so short that there are fewer
+    samples than `base_decimation` per pixel, the raw samples are read instead (as both the minimum and maximum).
+
+    Parameters
+    ----------
+    nwbfile_path : FilePathType
+        The path to the NWB file.
+    series_name : str
+        The name of the electrical series in the acquisition (e.g. "ElectricalSeriesAP").
+    start_time : float
+        The start of the window in seconds.
+    stop_time : float
+        The end of the window in seconds.
+    num_pixels : int
+        The width of the display in pixels.
+    channel_indices : list of int, optional
+        The indices of the channels, the default is all the channels.
+
+    Returns
+    -------
+    times : numpy.ndarray
+        The start time of each bin (or sample).
+    envelope : numpy.ndarray
+        The values with shape (number of bins, number of channels, 2), the last axis is (minimum, maximum).
+        The values are not scaled with the conversion of the series.
+    """
+    channel_selection = slice(None) if channel_indices is None else sorted(channel_indices)
+    with h5py.File(nwbfile_path, mode="r") as file:
+        series_group = file[f"acquisition/{series_name}"]
+        if "starting_time" in series_group:
+            rate = series_group["starting_time"].attrs["rate"]
+            starting_time = series_group["starting_time"][()]
+        else:
+            timestamps = series_group["timestamps"]
+            rate = (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+            starting_time = timestamps[0]
+        samples_per_pixel = (stop_time - start_time) * rate / num_pixels
+
+        levels = dict()
+        if ENVELOPE_MODULE_NAME in file.get("processing", dict()):
+            for name, group in file[f"processing/{ENVELOPE_MODULE_NAME}"].items():
+                if name.startswith(f"{series_name}_envelope_"):
+                    levels[int(name.rsplit("_", maxsplit=1)[1])] = group
+        decimations = [decimation for decimation in levels if decimation <= samples_per_pixel]
+
+        if decimations:
+            decimation = max(decimations)
+            data = levels[decimation]["data"]
+        else:
+            decimation = 1
+            data = series_group["data"]
+
+        bin_rate = rate / decimation
+        start_bin = max(0, int(np.floor((start_time - starting_time) * bin_rate)))
+        stop_bin = min(len(data), int(np.ceil((stop_time - starting_time) * bin_rate)))
+        values = data[start_bin:stop_bin, channel_selection]
+        envelope = values if decimation > 1 else np.stack([values, values], axis=-1)
+
+    times = starting_time + np.arange(start_bin, start_bin + len(envelope)) / bin_rate
+    return times, envelope
@@ -0,0 +1,305 @@
+"""Live conversion of sources that are still being written by the acquisition software."""
+
+import io
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+import h5py
+import numpy as np
+import pandas as pd
+from hdmf.backends.hdf5 import H5DataIO
+from neuroconv.tools.nwb_helpers import make_nwbfile_from_metadata
+from neuroconv.tools.spikeinterface import add_devices, add_electrode_groups, add_electrodes
+from neuroconv.utils import FilePathType, FolderPathType
+from pynwb import NWBFile, NWBHDF5IO
+from pynwb.ecephys import ElectricalSeries
+
+# The size of the text header of the legacy OpenEphys files
+OPENEPHYS_HEADER_SIZE = 1024
+# The number of samples in a record of the legacy OpenEphys .continuous files
+OPENEPHYS_RECORD_SIZE = 1024
+OPENEPHYS_CONTINUOUS_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        ("nb_sample", "<u2"),
+        ("rec_num", "<u2"),
+        ("samples", ">i2", OPENEPHYS_RECORD_SIZE),
+        ("markers", "u1", 10),
+    ]
+)
+
+# The maximum number of bytes read from a source in one poll, which bounds the memory used while following
+DEFAULT_MAX_BYTES_PER_POLL = 64 * 1024 * 1024
+
+
+class CsvFileTail:
+    """Reads the rows that were appended to a CSV file since the last read, ignoring a partially written last row."""
+
+    def __init__(self, file_path: FilePathType, max_bytes_per_poll: int = DEFAULT_MAX_BYTES_PER_POLL):
+        self.file_path = Path(file_path)
+        self.max_bytes_per_poll = max_bytes_per_poll
+        self.columns = None
+        self._offset = 0
+
+    def read_new_rows(self) -> pd.DataFrame:
+        if not self.file_path.is_file():
+            return pd.DataFrame(columns=self.columns)
+        with open(self.file_path, "rb") as file:
+            file.seek(self._offset)
+            block = file.read(self.max_bytes_per_poll)
+        # Only the complete lines are read, the rest is read by the next poll
+        block = block[: block.rfind(b"\n") + 1]
+        self._offset += len(block)
+        if self.columns is None:
+            header, _, block = block.partition(b"\n")
+            if not header:
+                return pd.DataFrame()
+            self.columns = header.decode().strip().split(",")
+        if not block.strip():
+            return pd.DataFrame(columns=self.columns)
+        return pd.read_csv(io.BytesIO(block), header=None, names=self.columns)
+
+
+def read_openephys_header(file_path: FilePathType) -> dict:
+    """Parses the text header ("header.<key> = <value>;") of a legacy OpenEphys file."""
+    with open(file_path, "rb") as file:
+        header_text = file.read(OPENEPHYS_HEADER_SIZE).decode("ascii", errors="replace")
+    header = dict()
+    for key, value in re.findall(r"header\.(\w+)\s*=\s*(.*?);", header_text):
+        header[key] = value.strip().strip("'")
+    return header
+
+
+class OpenEphysContinuousTail:
+    """
+    Reads the records that were appended to the legacy OpenEphys .continuous files of a stream since the last read.
+
+    Only the records that are complete in all channel files are read, so the traces of the channels stay aligned.
+    """
+
+    def __init__(
+        self,
+        folder_path: FolderPathType,
+        channel_prefix: str = "CH",
+        max_bytes_per_poll: int = DEFAULT_MAX_BYTES_PER_POLL,
+    ):
+        self.folder_path = Path(folder_path)
+        # e.g. "100_CH1.continuous", sorted by the channel number
+        file_name_pattern = re.compile(rf"\d+_{channel_prefix}(\d+)\.continuous$")
+        channel_file_paths = [
+            (int(match.group(1)), file_path)
+            for file_path in self.folder_path.glob("*.continuous")
+            if (match := file_name_pattern.match(file_path.name))
+        ]
+        assert channel_file_paths, f"There are no '{channel_prefix}' .continuous files in '{folder_path}'."
+        self.channel_file_paths = [file_path for _, file_path in sorted(channel_file_paths)]
+        self.max_records_per_poll = max(1, max_bytes_per_poll // (OPENEPHYS_CONTINUOUS_DTYPE.itemsize * len(self)))
+        self._num_records_read = 0
+
+    def __len__(self) -> int:
+        return len(self.channel_file_paths)
+
+    def get_num_complete_records(self) -> int:
+        file_sizes = [file_path.stat().st_size for file_path in self.channel_file_paths]
+        return max(0, (min(file_sizes) - OPENEPHYS_HEADER_SIZE) // OPENEPHYS_CONTINUOUS_DTYPE.itemsize)
+
+    def read_new_records(self) -> np.ndarray:
+        num_records = min(self.get_num_complete_records() - self._num_records_read, self.max_records_per_poll)
+        traces = np.empty((num_records * OPENEPHYS_RECORD_SIZE, len(self)), dtype=np.int16)
+        if num_records == 0:
+            return traces
+        offset = OPENEPHYS_HEADER_SIZE + self._num_records_read * OPENEPHYS_CONTINUOUS_DTYPE.itemsize
+        for channel_index, file_path in enumerate(self.channel_file_paths):
+            records = np.fromfile(file_path, dtype=OPENEPHYS_CONTINUOUS_DTYPE, count=num_records, offset=offset)
+            traces[:, channel_index] = records["samples"].ravel()
+        self._num_records_read += num_records
+        return traces
+
+
+def wait_for_data(read_new_data: Callable[[], Dict[str, np.ndarray]], poll_interval: float, idle_timeout: float):
+    """Polls the source until the first data arrives, raises a TimeoutError when nothing arrives in time."""
+    start_time = time.monotonic()
+    while True:
+        new_data = read_new_data()
+        if any(len(data) for data in new_data.values()):
+            return new_data
+        if time.monotonic() - start_time > idle_timeout:
+            raise TimeoutError(f"No data arrived in {idle_timeout} seconds.")
+        time.sleep(poll_interval)
+
+
+def append_to_dataset(dataset: h5py.Dataset, data: np.ndarray):
+    """Appends the data along the first axis of a resizable (maxshape=(None, ...)) dataset."""
+    num_rows = dataset.shape[0]
+    dataset.resize(num_rows + data.shape[0], axis=0)
+    dataset[num_rows:] = data
+
+
+def write_nwbfile_to_follow(nwbfile: NWBFile, nwbfile_path: FilePathType):
+    """Writes the in-memory NWBFile with the latest HDF5 file format, which is required for SWMR writing."""
+    with NWBHDF5IO(path=str(nwbfile_path), mode="w", file=h5py.File(nwbfile_path, mode="w", libver="latest")) as io:
+        io.write(nwbfile)
+
+
+def follow_source(
+    nwbfile_path: FilePathType,
+    read_new_data: Callable[[], Dict[str, np.ndarray]],
+    poll_interval: float = 1.0,
+    idle_timeout: float = 30.0,
+) -> int:
+    """
+    Appends the data that arrives from a growing source to the resizable datasets of an NWB file.
+
+    The file is opened in single-writer multiple-reader (SWMR) mode, so it can be read with
+    h5py.File(nwbfile_path, mode="r", swmr=True) while the source is being followed.
+
+    Parameters
+    ----------
+    nwbfile_path : FilePathType
+        The path to the NWB file with the resizable datasets.
+    read_new_data : callable
+        Returns the new data of each dataset (by path in the file) since the previous call.
+    poll_interval : float, default: 1.0
+        The number of seconds to wait between the polls of the source when no new data arrived.
+    idle_timeout : float, default: 30.0
+        The source is considered complete when no data arrived for this number of seconds.
+
+    Returns
+    -------
+    num_polls : int
+        The number of polls that appended data.
+    """
+    num_polls = 0
+    with h5py.File(nwbfile_path, mode="a", libver="latest") as file:
+        file.swmr_mode = True
+        last_data_time = time.monotonic()
+        while time.monotonic() - last_data_time < idle_timeout:
+            new_data = read_new_data()
+            if not any(len(data) for data in new_data.values()):
+                time.sleep(poll_interval)
+                continue
+            for dataset_path, data in new_data.items():
+                append_to_dataset(dataset=file[dataset_path], data=data)
+                file[dataset_path].flush()
+            num_polls += 1
+            last_data_time = time.monotonic()
+    return num_polls
+
+
+def follow_openephys_recording(
+    folder_path: FolderPathType,
+    nwbfile_path: FilePathType,
+    metadata: dict,
+    channel_prefix: str = "CH",
+    poll_interval: float = 1.0,
+    idle_timeout: float = 30.0,
+    es_key: str = "ElectricalSeries",
+):
+    """
+    Converts a legacy OpenEphys recording while it is being recorded.
+
+    The NWB file is created as soon as the first records are written and the records that arrive later are appended
+    to the ElectricalSeries, reading at most 64 MiB per poll. The conversion finishes when the recording did not grow
+    for `idle_timeout` seconds.
+
+    Parameters
+    ----------
+    folder_path : FolderPathType
+        The folder where the .continuous files are being written.
+    nwbfile_path : FilePathType
+        The file path to the NWB file that will be created.
+    metadata : dict
+        The metadata of the session (e.g. from the "general_metadata.yaml" of the pipeline), must contain the
+        session_start_time. The Ecephys metadata is used for the devices, electrode groups and ElectricalSeries.
+    channel_prefix : str, default: "CH"
+        The prefix of the channel names of the stream (e.g. "CH" for the "Signals CH" stream).
+    poll_interval : float, default: 1.0
+        The number of seconds to wait between the polls of the recording.
+    idle_timeout : float, default: 30.0
+        The number of seconds without new records after which the recording is considered complete.
+    es_key : str, default: "ElectricalSeries"
+        The key of the ElectricalSeries metadata.
+    """
+    from spikeinterface.core import NumpyRecording
+
+    wait_for_data(
+        read_new_data=lambda: dict(files=list(Path(folder_path).glob(f"*_{channel_prefix}*.continuous"))),
+        poll_interval=poll_interval,
+        idle_timeout=idle_timeout,
+    )
+    recording_tail = OpenEphysContinuousTail(folder_path=folder_path, channel_prefix=channel_prefix)
+    traces = wait_for_data(
+        read_new_data=lambda: dict(traces=recording_tail.read_new_records()),
+        poll_interval=poll_interval,
+        idle_timeout=idle_timeout,
+    )["traces"]
+
+    headers = [read_openephys_header(file_path) for file_path in recording_tail.channel_file_paths]
+    sampling_frequency = float(headers[0]["sampleRate"])
+    # The recording of the first records is only used for the electrode metadata
+    recording = NumpyRecording(
+        traces_list=[traces],
+        sampling_frequency=sampling_frequency,
+        channel_ids=[header["channel"] for header in headers],
+    )
+    recording.set_channel_gains([float(header["bitVolts"]) for header in headers])
+    recording.set_channel_offsets(0.0)
+
+    nwbfile = make_nwbfile_from_metadata(metadata=metadata)
+    add_devices(nwbfile=nwbfile, metadata=metadata)
+    add_electrode_groups(recording=recording, nwbfile=nwbfile, metadata=metadata)
+    add_electrodes(recording=recording, nwbfile=nwbfile, metadata=metadata)
+
+    es_metadata = metadata.get("Ecephys", dict()).get(es_key, dict())
+    chunk_num_samples = max(OPENEPHYS_RECORD_SIZE, 2**20 // (traces.itemsize * len(recording_tail)))
+    electrical_series = ElectricalSeries(
+        name=es_metadata.get("name", es_key),
+        description=es_metadata.get("description", "Acquisition traces for the ElectricalSeries."),
+        data=H5DataIO(
+            traces,
+            maxshape=(None, len(recording_tail)),
+            chunks=(chunk_num_samples, len(recording_tail)),
+            compression=True,
+        ),
+        electrodes=nwbfile.create_electrode_table_region(
+            region=list(range(len(recording_tail))), description="electrode_table_region"
+        ),
+        starting_time=0.0,
+        rate=sampling_frequency,
+        conversion=float(headers[0]["bitVolts"]) * 1e-6,
+    )
+    nwbfile.add_acquisition(electrical_series)
+    write_nwbfile_to_follow(nwbfile=nwbfile, nwbfile_path=nwbfile_path)
+
+    follow_source(
+        nwbfile_path=nwbfile_path,
+        read_new_data=lambda: {f"/acquisition/{electrical_series.name}/data": recording_tail.read_new_records()},
+        poll_interval=poll_interval,
+        idle_timeout=idle_timeout,
+    )
+
+
+if __name__ == "__main__":
+    # Follows a synthetic OpenEphys recording that is written in real time by another process
+    from multiprocessing import Process
+
+    from neuroconv.utils import load_dict_from_file
+    from tye_lab_to_nwb.benchmarks.synthetic_data import simulate_openephys_recording
+
+    # The folder where the recording is written
+    folder_path = Path("/Volumes/t7-ssd/follow/openephys")
+    # The file path where the NWB file will be created
+    nwbfile_path = Path("/Volumes/t7-ssd/follow/openephys.nwb")
+
+    recording_process = Process(
+        target=simulate_openephys_recording, kwargs=dict(folder_path=folder_path, duration=60.0)
+    )
+    recording_process.start()
+
+    metadata = load_dict_from_file(Path(__file__).parent.parent / "ast_ecephys" / "metadata" / "general_metadata.yaml")
+    metadata["NWBFile"].update(session_start_time=pd.Timestamp.now(tz="US/Pacific").to_pydatetime())
+    metadata["Subject"].update(subject_id="synthetic", sex="U")
+    follow_openephys_recording(folder_path=folder_path, nwbfile_path=nwbfile_path, metadata=metadata, idle_timeout=5.0)
+    recording_process.join()
@@ -0,0 +1,231 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import h5py
+import numpy as np
+from neuroconv.utils import FilePathType
+
+# The neurodata types of the series that are read lazily, with the labels of their dimensions after the time
+SERIES_DIMS = dict(
+    ElectricalSeries=("channel",),
+    OnePhotonSeries=("x", "y"),
+    TwoPhotonSeries=("x", "y"),
+    RoiResponseSeries=("roi",),
+    PoseEstimationSeries=("coordinate",),
+)
+
+# The target size of the dask chunks, each dask chunk is made of whole HDF5 chunks
+DASK_CHUNK_SIZE = 64 * 1024 * 1024
+
+# The NWB files that are open in this process, the lazy arrays are only valid while their file is open
+_open_files: Dict[Path, h5py.File] = dict()
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _open_file(nwbfile_path: FilePathType) -> h5py.File:
+    nwbfile_path = Path(nwbfile_path).resolve()
+    if nwbfile_path not in _open_files or not _open_files[nwbfile_path].id.valid:
+        _open_files[nwbfile_path] = h5py.File(nwbfile_path, mode="r")
+    return _open_files[nwbfile_path]
+
+
+def close_files():
+    """Closes the NWB files opened by the lazy reader, the arrays read from them can not be computed anymore."""
+    for file in _open_files.values():
+        file.close()
+    _open_files.clear()
+
+
+def get_dask_chunks(dataset: h5py.Dataset, chunk_size: int = DASK_CHUNK_SIZE) -> Tuple[int, ...]:
+    """
+    Returns the chunk shape of the dask array of a dataset, made of whole HDF5 chunks along the first (time) axis.
+
+    Each HDF5 chunk is read (and decompressed) by exactly one dask task.
+
+    Parameters
+    ----------
+    dataset : h5py.Dataset
+        The dataset.
+    chunk_size : int, default: 64 MiB
+        The target size of the dask chunks in bytes.
+
+    Returns
+    -------
+    dask_chunks : tuple of int
+        The shape of the dask chunks.
+    """
+    if not dataset.shape:
+        return ()
+    # The contiguous datasets are split along the first axis only
+    hdf5_chunks = dataset.chunks or (1,) + dataset.shape[1:]
+    hdf5_chunk_size = int(np.prod(hdf5_chunks)) * dataset.dtype.itemsize
+    num_hdf5_chunks = max(1, chunk_size // max(hdf5_chunk_size, 1))
+    return (min(hdf5_chunks[0] * num_hdf5_chunks, dataset.shape[0]),) + tuple(hdf5_chunks[1:])
+
+
+def _get_time_coordinate(series_group: h5py.Group, num_frames: int, dask_chunks: Tuple[int, ...]):
+    import dask.array as da
+
+    if "timestamps" in series_group:
+        timestamps = series_group["timestamps"]
+        return da.from_array(timestamps, chunks=dask_chunks[:1], lock=True)
+    starting_time = series_group["starting_time"]
+    rate = float(starting_time.attrs["rate"])
+    return float(starting_time[()]) + da.arange(num_frames, chunks=dask_chunks[:1]) / rate
+
+
+def _get_labels(series_group: h5py.Group, neurodata_type: str, data: h5py.Dataset) -> dict:
+    # The labels are read from the (small) region datasets and tables, never from the data
+    if neurodata_type == "ElectricalSeries" and "electrodes" in series_group:
+        electrode_indices = series_group["electrodes"][:]
+        labels = dict(channel=electrode_indices)
+        electrodes = series_group["electrodes"].attrs["table"]
+        electrodes_table = series_group.file[electrodes]
+        if "channel_name" in electrodes_table:
+            channel_names = electrodes_table["channel_name"].asstr()[:]
+            labels.update(channel_name=("channel", channel_names[electrode_indices]))
+        return labels
+    if neurodata_type == "RoiResponseSeries" and data.ndim > 1 and "rois" in series_group:
+        roi_indices = series_group["rois"][:]
+        plane_segmentation = series_group.file[series_group["rois"].attrs["table"]]
+        return dict(roi=plane_segmentation["id"][:][roi_indices])
+    if neurodata_type == "PoseEstimationSeries":
+        return dict(coordinate=["x", "y", "z"][: data.shape[1]])
+    return dict()
+
+
+def read_series(series_group: h5py.Group):
+    """
+    Returns the data of a series as a lazy xarray.DataArray with labeled time and channel (or ROI) coordinates.
+
+    The data is a dask array made of whole HDF5 chunks (see `get_dask_chunks`), nothing is read until it is
+    computed. The "timestamps" coordinate is lazy as well (from the timestamps dataset or from the starting time
+    and the rate), the channel and ROI labels are read. The conversion, offset and unit of the series are in the
+    attributes, the values are not scaled.
+
+    Parameters
+    ----------
+    series_group : h5py.Group
+        The group of the series in an open NWB file.
+
+    Returns
+    -------
+    series : xarray.DataArray
+        The dimensions are "time" followed by the labels of `SERIES_DIMS`.
+    """
+    try:
+        import dask.array as da
+        import xarray as xr
+    except ImportError:
+        raise ImportError(
+            "The lazy reader requires dask and xarray, install them with 'pip install tye-lab-to-nwb[lazy]'."
+        )
+
+    neurodata_type = _decode(series_group.attrs["neurodata_type"])
+    data = series_group["data"]
+    dask_chunks = get_dask_chunks(dataset=data)
+    dims = ("time",) + SERIES_DIMS[neurodata_type][: data.ndim - 1]
+    coords = dict(timestamps=("time", _get_time_coordinate(series_group, data.shape[0], dask_chunks)))
+    coords.update(_get_labels(series_group=series_group, neurodata_type=neurodata_type, data=data))
+    if neurodata_type == "PoseEstimationSeries" and "confidence" in series_group:
+        confidence = series_group["confidence"]
+        coords.update(confidence=("time", da.from_array(confidence, chunks=dask_chunks[:1], lock=True)))
+
+    attrs = dict(neurodata_type=neurodata_type, nwbfile_path=series_group.file.filename)
+    attrs.update({key: data.attrs[key] for key in ["conversion", "offset", "resolution"] if key in data.attrs})
+    if "unit" in data.attrs:
+        attrs.update(unit=_decode(data.attrs["unit"]))
+    return xr.DataArray(
+        da.from_array(data, chunks=dask_chunks, lock=True),
+        dims=dims,
+        coords=coords,
+        name=series_group.name.split("/")[-1],
+        attrs=attrs,
+    )
+
+
+def read_nwbfile_series(
+    nwbfile_path: FilePathType,
+    neurodata_types: Optional[List[str]] = None,
+    series_names: Optional[List[str]] = None,
+) -> Dict[str, "xarray.DataArray"]:
+    """
+    Returns the acquired and processed series of an NWB file as lazy arrays (see `read_series`).
+
+    The file stays open until `close_files` is called. Only the groups under "acquisition" and "processing" are
+    visited and only the metadata of their datasets is read. The series that are written to external files
+    (e.g. the movies that stay in their .avi files) have no data in the NWB file and are skipped.
+
+    Parameters
+    ----------
+    nwbfile_path : FilePathType
+        The path to the NWB file.
+    neurodata_types : list of str, optional
+        The neurodata types of the series (e.g. ["ElectricalSeries"]), the default is all the types of `SERIES_DIMS`.
+    series_names : list of str, optional
+        The names of the series (e.g. ["ElectricalSeriesAP"]), the default is all the series.
+
+    Returns
+    -------
+    series : dict of xarray.DataArray
+        The series by their path in the file (e.g. "/acquisition/ElectricalSeriesAP").
+    """
+    neurodata_types = neurodata_types or list(SERIES_DIMS)
+    file = _open_file(nwbfile_path=nwbfile_path)
+    series_groups = []
+
+    def collect_series(name: str, obj):
+        if not isinstance(obj, h5py.Group) or _decode(obj.attrs.get("neurodata_type", "")) not in neurodata_types:
+            return
+        if series_names is not None and name.split("/")[-1] not in series_names:
+            return
+        if isinstance(obj.get("data"), h5py.Dataset) and obj["data"].size:
+            series_groups.append(obj)
+
+    for group_name in ["acquisition", "processing"]:
+        if group_name in file:
+            file[group_name].visititems(collect_series)
+    return {series_group.name: read_series(series_group=series_group) for series_group in series_groups}
+
+
+def read_sessions_series(
+    nwbfile_paths: List[Union[FilePathType, dict]],
+    series_name: str,
+) -> Dict[str, "xarray.DataArray"]:
+    """
+    Returns the series with the same name from many NWB files as lazy arrays, for out-of-core computations across
+    sessions (e.g. dask.compute over the mean of each session).
+
+    Parameters
+    ----------
+    nwbfile_paths : list of FilePathType or dict
+        The paths to the NWB files, or the sessions returned by `tye_lab_to_nwb.tools.catalog.query_catalog`.
+    series_name : str
+        The name of the series (e.g. "ElectricalSeriesAP" or "RoiResponseSeries").
+
+    Returns
+    -------
+    series : dict of xarray.DataArray
+        The series by the path of their NWB file, the files without the series are left out.
+    """
+    sessions_series = dict()
+    for nwbfile_path in nwbfile_paths:
+        nwbfile_path = nwbfile_path["nwbfile_path"] if isinstance(nwbfile_path, dict) else str(nwbfile_path)
+        series = read_nwbfile_series(nwbfile_path=nwbfile_path, series_names=[series_name])
+        if series:
+            sessions_series[nwbfile_path] = next(iter(series.values()))
+    return sessions_series
+
+
+if __name__ == "__main__":
+    # The NWB files of the converted sessions
+    nwbfile_paths = sorted(Path("/Volumes/t7-ssd/Hao_NWB/nwbfiles/ast_neuropixels").glob("*.nwb"))
+
+    sessions_series = read_sessions_series(nwbfile_paths=nwbfile_paths, series_name="ElectricalSeriesLF")
+    for nwbfile_path, series in sessions_series.items():
+        # Only the chunks of the first minute are read
+        first_minute = series.isel(time=slice(0, int(60 * 2500)))
+        print(nwbfile_path, first_minute.std(dim="time").compute().values[:5])
@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Union
+
+from neuroconv import BaseDataInterface, NWBConverter
+from pynwb import NWBFile
+
+
+@contextmanager
+def wrap_method(obj, method_name: str, create_wrapper: Callable[[Callable], Callable]):
+    """
+    Shadows a method of an object with a wrapper while the context is active.
+
+    The wrapper is set on the instance and wraps the current method, which can itself be the wrapper of an enclosing
+    stage (e.g. the profiler, the Parquet sidecars and the chunk taps all wrap `add_to_nwbfile`). When the context
+    exits the previous attribute of the instance is restored, or the attribute is deleted to restore the method of
+    the class, so the stages can be nested in any order as long as they exit in reverse order.
+
+    Parameters
+    ----------
+    obj : object
+        The object whose method is wrapped (e.g. a converter or a data interface).
+    method_name : str
+        The name of the method.
+    create_wrapper : callable
+        Returns the wrapper from the current (bound) method.
+    """
+    instance_method = obj.__dict__.get(method_name)
+    setattr(obj, method_name, create_wrapper(getattr(obj, method_name)))
+    try:
+        yield
+    finally:
+        if instance_method is None:
+            delattr(obj, method_name)
+        else:
+            setattr(obj, method_name, instance_method)
+
+
+@contextmanager
+def wrap_add_to_nwbfile(converter: Union[BaseDataInterface, NWBConverter], after: Callable[[NWBFile], None]):
+    """
+    Calls `after` with the in-memory NWB file each time the `add_to_nwbfile` of the converter returns, while the
+    context is active (see `wrap_method`).
+
+    Parameters
+    ----------
+    converter : NWBConverter or BaseDataInterface
+        The converter (or single data interface) that runs the conversion.
+    after : callable
+        Called with the NWB file once the data interfaces have added their data, before the file is written.
+    """
+
+    def create_wrapper(add_to_nwbfile: Callable) -> Callable:
+        @wraps(add_to_nwbfile)
+        def wrapped_add_to_nwbfile(nwbfile: NWBFile, *args, **kwargs):
+            add_to_nwbfile(nwbfile, *args, **kwargs)
+            after(nwbfile)
+
+        return wrapped_add_to_nwbfile
+
+    with wrap_method(obj=converter, method_name="add_to_nwbfile", create_wrapper=create_wrapper):
+        yield
@@ -0,0 +1,180 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Union
+from warnings import warn
+
+import numpy as np
+import pandas as pd
+from hdmf.data_utils import AbstractDataChunkIterator, DataIO
+from neuroconv import BaseDataInterface, NWBConverter
+from neuroconv.utils import FolderPathType
+from pynwb import NWBFile
+from pynwb.epoch import TimeIntervals
+from pynwb.misc import Units
+
+from .method_wrappers import wrap_add_to_nwbfile
+
+
+def _get_array(data) -> Optional[np.ndarray]:
+    if isinstance(data, DataIO):
+        data = data.data
+    # The data that is written chunk by chunk is not in memory
+    if isinstance(data, AbstractDataChunkIterator):
+        return None
+    return np.asarray(data)
+
+
+def _get_table_dataframe(table) -> pd.DataFrame:
+    # The regions (e.g. the electrodes of the units) are kept as indices instead of nested tables
+    dataframe = table.to_dataframe(index=True).reset_index()
+    for column in dataframe.columns:
+        if dataframe[column].dtype == object:
+            # Arrow only converts one-dimensional arrays, the ragged and multidimensional cells are stored as lists
+            dataframe[column] = [
+                value.tolist() if isinstance(value, np.ndarray) else value for value in dataframe[column]
+            ]
+    return dataframe
+
+
+def _get_annotated_events_dataframe(annotated_events) -> pd.DataFrame:
+    events = _get_table_dataframe(table=annotated_events).explode(column="event_times")
+    events = events.rename(columns=dict(event_times="event_time")).dropna(subset=["event_time"])
+    return events.astype(dict(event_time=float)).sort_values(by="event_time", ignore_index=True)
+
+
+def _get_pose_estimation_dataframe(pose_estimation) -> Optional[pd.DataFrame]:
+    pose_estimation_dataframes = []
+    for name, pose_estimation_series in pose_estimation.pose_estimation_series.items():
+        data = _get_array(pose_estimation_series.data)
+        if data is None:
+            return None
+        if pose_estimation_series.timestamps is not None:
+            # The timestamps can be linked to the timestamps of another series
+            timestamps = pose_estimation_series.timestamps
+            timestamps = _get_array(getattr(timestamps, "timestamps", timestamps))
+        else:
+            timestamps = pose_estimation_series.starting_time + np.arange(len(data)) / pose_estimation_series.rate
+        pose_estimation_dataframe = pd.DataFrame(data, columns=["x", "y", "z"][: data.shape[1]])
+        pose_estimation_dataframe.insert(0, "timestamp", timestamps)
+        pose_estimation_dataframe.insert(0, "bodypart", name)
+        if pose_estimation_series.confidence is not None:
+            pose_estimation_dataframe["confidence"] = _get_array(pose_estimation_series.confidence)
+        pose_estimation_dataframes.append(pose_estimation_dataframe)
+    return pd.concat(pose_estimation_dataframes, ignore_index=True) if pose_estimation_dataframes else None
+
+
+def get_sidecar_tables(nwbfile: NWBFile) -> Dict[str, pd.DataFrame]:
+    """
+    Collects the tables of an in-memory NWB file that are exported to the Parquet sidecars.
+
+    The tables are the trials and the other time intervals (e.g. the discrimination task events), the units with
+    their properties, the annotated events (e.g. the photometry events) with one row per event and the pose
+    estimation with one row per body part and frame.
+
+    Parameters
+    ----------
+    nwbfile : NWBFile
+        The in-memory NWB file, before it is written.
+
+    Returns
+    -------
+    tables : dict of pandas.DataFrame
+        The tables by the name of their container.
+    """
+    tables = dict()
+    for neurodata_object in nwbfile.all_children():
+        neurodata_type = neurodata_object.neurodata_type
+        if isinstance(neurodata_object, (TimeIntervals, Units)):
+            table = _get_table_dataframe(table=neurodata_object)
+        elif neurodata_type == "AnnotatedEventsTable":
+            table = _get_annotated_events_dataframe(annotated_events=neurodata_object)
+        elif neurodata_type == "PoseEstimation":
+            table = _get_pose_estimation_dataframe(pose_estimation=neurodata_object)
+        else:
+            continue
+
+        if table is None:
+            warn(f"The '{neurodata_object.name}' {neurodata_type} is not in memory and is not exported.")
+            continue
+        tables[neurodata_object.name] = table
+    return tables
+
+
+def write_sidecar_tables(
+    tables: Dict[str, pd.DataFrame],
+    sidecar_folder_path: FolderPathType,
+    subject_id: str,
+    session_id: str,
+):
+    """
+    Writes the tables of a session as Parquet files partitioned by subject and session.
+
+    Each table is written to "<table name>/subject_id=<subject_id>/session_id=<session_id>/data.parquet", so the
+    sessions of a cohort can be scanned together with pyarrow.dataset.dataset(<folder>/<table name>,
+    partitioning="hive"). The file of a session is replaced when the session is converted again.
+
+    Parameters
+    ----------
+    tables : dict of pandas.DataFrame
+        The tables by name (see `get_sidecar_tables`).
+    sidecar_folder_path : FolderPathType
+        The folder of the Parquet sidecars, usually next to the NWB files of the batch.
+    subject_id : str
+        The identifier of the subject.
+    session_id : str
+        The identifier of the session.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            "The Parquet sidecars require pyarrow, install it with 'pip install tye-lab-to-nwb[parquet]'."
+        )
+
+    for table_name, table in tables.items():
+        partition_folder_path = (
+            Path(sidecar_folder_path) / table_name / f"subject_id={subject_id}" / f"session_id={session_id}"
+        )
+        partition_folder_path.mkdir(parents=True, exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(table, preserve_index=False), partition_folder_path / "data.parquet")
+
+
+@contextmanager
+def export_parquet_sidecars(
+    converter: Union[BaseDataInterface, NWBConverter],
+    sidecar_folder_path: Optional[FolderPathType] = None,
+):
+    """
+    Exports the tables of the conversion to Parquet sidecars (see `write_sidecar_tables`).
+
+    The tables are collected from the in-memory NWB file once all the data interfaces have added their data and
+    before the file is written, so the source files are not read again. The sidecars are only written when the
+    conversion succeeds. When `sidecar_folder_path` is not specified nothing is exported.
+
+    Parameters
+    ----------
+    converter : NWBConverter or BaseDataInterface
+        The converter (or single data interface) that runs the conversion.
+    sidecar_folder_path : FolderPathType, optional
+        The folder of the Parquet sidecars. The default is to not export the tables.
+    """
+    if sidecar_folder_path is None:
+        yield
+        return
+
+    sidecars = dict()
+
+    def collect_tables(nwbfile: NWBFile):
+        subject_id = nwbfile.subject.subject_id if nwbfile.subject and nwbfile.subject.subject_id else "unknown"
+        sidecars.update(
+            tables=get_sidecar_tables(nwbfile=nwbfile),
+            subject_id=subject_id,
+            session_id=nwbfile.session_id or nwbfile.identifier,
+        )
+
+    with wrap_add_to_nwbfile(converter=converter, after=collect_tables):
+        yield
+
+    if sidecars:
+        write_sidecar_tables(sidecar_folder_path=sidecar_folder_path, **sidecars)
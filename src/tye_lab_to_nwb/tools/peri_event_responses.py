@@ -0,0 +1,274 @@
+import re
+from typing import Dict, Tuple
+
+import h5py
+import numpy as np
+from hdmf.common import DynamicTable, VectorData
+from neuroconv.utils import FilePathType
+from pynwb import NWBHDF5IO, NWBFile
+from pynwb.epoch import TimeIntervals
+from pynwb.ophys import RoiResponseSeries
+
+PERI_EVENT_MODULE_NAME = "peri_event_responses"
+DEFAULT_WINDOW = (-2.0, 5.0)
+DEFAULT_BIN_SIZE = 0.05
+
+
+def _get_name(name: str) -> str:
+    return re.sub(r"[^0-9a-zA-Z]+", "_", str(name)).strip("_")
+
+
+def get_event_times(nwbfile: NWBFile) -> Dict[str, np.ndarray]:
+    """
+    Collects the onset times of the events of an NWB file, grouped by event type.
+
+    The events are the rows of the time intervals (e.g. the trials and the discrimination task events), grouped by
+    their "trial_type" column when they have one, and the event times of each label of the annotated events
+    (e.g. the photometry events from the "Flags").
+
+    Parameters
+    ----------
+    nwbfile : NWBFile
+        The NWB file.
+
+    Returns
+    -------
+    event_times : dict of numpy.ndarray
+        The sorted onset times by the name of the event type (e.g. "trials_Reward" or "LabeledEvents_CueOn").
+    """
+    event_times = dict()
+    for neurodata_object in nwbfile.all_children():
+        if isinstance(neurodata_object, TimeIntervals) and len(neurodata_object):
+            start_times = np.asarray(neurodata_object["start_time"].data[:], dtype=float)
+            if "trial_type" in neurodata_object.colnames:
+                trial_types = np.asarray(neurodata_object["trial_type"][:]).astype(str)
+                for trial_type in np.unique(trial_types):
+                    event_name = f"{neurodata_object.name}_{_get_name(trial_type)}"
+                    event_times[event_name] = np.sort(start_times[trial_types == trial_type])
+            else:
+                event_times[neurodata_object.name] = np.sort(start_times)
+        elif neurodata_object.neurodata_type == "AnnotatedEventsTable":
+            for label, label_event_times in zip(neurodata_object["label"][:], neurodata_object["event_times"][:]):
+                if len(label_event_times):
+                    event_name = f"{neurodata_object.name}_{_get_name(label)}"
+                    event_times[event_name] = np.sort(np.asarray(label_event_times, dtype=float))
+    return event_times
+
+
+def get_bin_edges(event_times: np.ndarray, window: Tuple[float, float], bin_size: float) -> np.ndarray:
+    """Returns the edges of the bins around each event, with shape (number of events, number of bins + 1)."""
+    num_bins = int(round((window[1] - window[0]) / bin_size))
+    offsets = window[0] + np.arange(num_bins + 1) * bin_size
+    return event_times[:, np.newaxis] + offsets[np.newaxis, :]
+
+
+def get_binned_spike_counts(spike_trains: list, bin_edges: np.ndarray) -> np.ndarray:
+    """
+    Counts the spikes of each unit in the bins around each event.
+
+    Parameters
+    ----------
+    spike_trains : list of numpy.ndarray
+        The sorted spike times of each unit.
+    bin_edges : numpy.ndarray
+        The edges of the bins around each event (see `get_bin_edges`).
+
+    Returns
+    -------
+    spike_counts : numpy.ndarray
+        The number of spikes with shape (number of events, number of units, number of bins).
+    """
+    spike_counts = np.empty((bin_edges.shape[0], len(spike_trains), bin_edges.shape[1] - 1), dtype=np.int64)
+    for unit_index, spike_train in enumerate(spike_trains):
+        spike_counts[:, unit_index, :] = np.diff(np.searchsorted(spike_train, bin_edges), axis=1)
+    return spike_counts.astype(np.min_scalar_type(spike_counts.max(initial=0)))
+
+
+def get_binned_means(data: np.ndarray, timestamps: np.ndarray, bin_edges: np.ndarray) -> np.ndarray:
+    """
+    Averages the samples of each trace in the bins around each event, ignoring the NaN samples. The bins without
+    samples (or with only NaN samples) are NaN.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        The traces with shape (number of samples, number of traces) or (number of samples,).
+    timestamps : numpy.ndarray
+        The sorted timestamps of the samples.
+    bin_edges : numpy.ndarray
+        The edges of the bins around each event (see `get_bin_edges`).
+
+    Returns
+    -------
+    means : numpy.ndarray
+        The mean values with shape (number of events, number of traces, number of bins).
+    """
+    data = data.reshape(len(data), -1).astype(np.float64)
+    cumulative_sums = np.concatenate([np.zeros((1, data.shape[1])), np.nancumsum(data, axis=0)])
+    # the NaN samples (e.g. the gaps of the photometry signals) are not counted
+    cumulative_counts = np.concatenate(
+        [np.zeros((1, data.shape[1]), dtype=np.int64), np.cumsum(~np.isnan(data), axis=0)]
+    )
+    sample_indices = np.searchsorted(timestamps, bin_edges)
+    sums = np.diff(cumulative_sums[sample_indices], axis=1)
+    num_samples = np.diff(cumulative_counts[sample_indices], axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / num_samples
+    return np.moveaxis(means, -1, 1).astype(np.float32)
+
+
+def _get_spike_trains(nwbfile: NWBFile) -> list:
+    # The spike times of all units are read at once and split with the index
+    spike_times = np.asarray(nwbfile.units.spike_times.data[:], dtype=float)
+    spike_times_index = np.asarray(nwbfile.units.spike_times_index.data[:])
+    return [np.sort(spike_train) for spike_train in np.split(spike_times, spike_times_index[:-1])]
+
+
+def _get_timestamps(series: RoiResponseSeries, num_samples: int) -> np.ndarray:
+    if series.timestamps is not None:
+        return np.asarray(series.timestamps[:], dtype=float)
+    return series.starting_time + np.arange(num_samples) / series.rate
+
+
+def _read_samples(series: RoiResponseSeries, start_time: float, stop_time: float) -> Tuple[np.ndarray, np.ndarray]:
+    # Only the samples from the first to the last bin edge are read
+    timestamps = _get_timestamps(series=series, num_samples=len(series.data))
+    start_index, stop_index = np.searchsorted(timestamps, [start_time, stop_time])
+    return np.asarray(series.data[start_index:stop_index]), timestamps[start_index:stop_index]
+
+
+def add_peri_event_responses(
+    nwbfile_path: FilePathType,
+    window: Tuple[float, float] = DEFAULT_WINDOW,
+    bin_size: float = DEFAULT_BIN_SIZE,
+):
+    """
+    Adds the binned responses of the units and of the ROI traces around each event to an NWB file.
+
+    The responses are computed for every pair of signal (the units, and each RoiResponseSeries, e.g. the CNMF-E
+    traces or the photometry signals) and event type (see `get_event_times`). The spikes are counted and the traces
+    are averaged in each bin. Each pair is stored in the "peri_event_responses" processing module as a table named
+    "<signal>__<event type>" with one row per event, the "event_time" column and the "responses" column with shape
+    (number of events, number of units or traces, number of bins). The units and traces are in the order of the
+    units table and of the columns of the series. The "bins" table of the module has the start and stop time of
+    each bin relative to the events. The existing module is replaced.
+
+    Parameters
+    ----------
+    nwbfile_path : FilePathType
+        The path to the NWB file, it is modified in place.
+    window : tuple of float, default: (-2.0, 5.0)
+        The start and stop time of the window around each event in seconds.
+    bin_size : float, default: 0.05
+        The width of the bins in seconds.
+    """
+    with NWBHDF5IO(path=str(nwbfile_path), mode="r", load_namespaces=True) as io:
+        nwbfile = io.read()
+        event_times = get_event_times(nwbfile=nwbfile)
+        signals = dict()
+        if nwbfile.units is not None and len(nwbfile.units) and "spike_times" in nwbfile.units.colnames:
+            signals["units"] = (get_binned_spike_counts, dict(spike_trains=_get_spike_trains(nwbfile=nwbfile)))
+        if event_times:
+            # the first and last bin edges of all the events
+            bin_edges = [
+                get_bin_edges(event_times=event_name_times[[0, -1]], window=window, bin_size=bin_size)
+                for event_name_times in event_times.values()
+            ]
+            start_time = min(event_bin_edges[0, 0] for event_bin_edges in bin_edges)
+            stop_time = max(event_bin_edges[-1, -1] for event_bin_edges in bin_edges)
+        for neurodata_object in nwbfile.all_children():
+            if isinstance(neurodata_object, RoiResponseSeries) and event_times:
+                data, timestamps = _read_samples(series=neurodata_object, start_time=start_time, stop_time=stop_time)
+                signals[neurodata_object.name] = (get_binned_means, dict(data=data, timestamps=timestamps))
+        has_module = PERI_EVENT_MODULE_NAME in nwbfile.processing
+
+    if not event_times or not signals:
+        return
+
+    num_bins = int(round((window[1] - window[0]) / bin_size))
+    bin_starts = window[0] + np.arange(num_bins) * bin_size
+    tables = [
+        DynamicTable(
+            name="bins",
+            description="The start and stop time of each bin relative to the event onsets in seconds.",
+            columns=[
+                VectorData(name="start_time", description="The start time of the bin.", data=bin_starts),
+                VectorData(name="stop_time", description="The stop time of the bin.", data=bin_starts + bin_size),
+            ],
+        )
+    ]
+    for event_name, event_name_times in event_times.items():
+        bin_edges = get_bin_edges(event_times=event_name_times, window=window, bin_size=bin_size)
+        for signal_name, (get_responses, signal_kwargs) in signals.items():
+            responses = get_responses(bin_edges=bin_edges, **signal_kwargs)
+            is_units = signal_name == "units"
+            tables.append(
+                DynamicTable(
+                    name=f"{signal_name}__{event_name}",
+                    description=(
+                        f"The {'spike counts of the units' if is_units else f'mean values of the {signal_name} traces'}"
+                        f" in {bin_size} s bins from {window[0]} s to {window[1]} s around the {event_name} events."
+                    ),
+                    columns=[
+                        VectorData(
+                            name="event_time", description="The onset time of the event.", data=event_name_times
+                        ),
+                        VectorData(
+                            name="responses",
+                            description="The binned responses with shape (events, units or traces, bins).",
+                            data=responses,
+                        ),
+                    ],
+                )
+            )
+
+    # An existing module is replaced by rewriting the groups with h5py, pynwb can not remove containers
+    if has_module:
+        with h5py.File(nwbfile_path, mode="a") as file:
+            del file[f"processing/{PERI_EVENT_MODULE_NAME}"]
+
+    with NWBHDF5IO(path=str(nwbfile_path), mode="a", load_namespaces=True) as io:
+        nwbfile = io.read()
+        peri_event_module = nwbfile.create_processing_module(
+            name=PERI_EVENT_MODULE_NAME,
+            description="The binned responses of the units and of the ROI traces around the events.",
+        )
+        for table in tables:
+            peri_event_module.add(table)
+        io.write(nwbfile)
+
+
+def get_peri_event_responses(
+    nwbfile_path: FilePathType,
+    signal_name: str,
+    event_name: str,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reads the binned responses of a signal around the events of a type (see `add_peri_event_responses`).
+
+    Parameters
+    ----------
+    nwbfile_path : FilePathType
+        The path to the NWB file.
+    signal_name : str
+        The name of the signal, "units" or the name of a RoiResponseSeries.
+    event_name : str
+        The name of the event type, e.g. "trials_Reward".
+
+    Returns
+    -------
+    responses : numpy.ndarray
+        The binned responses with shape (number of events, number of units or traces, number of bins).
+    event_times : numpy.ndarray
+        The onset times of the events.
+    bin_start_times : numpy.ndarray
+        The start time of each bin relative to the event onsets.
+    """
+    with h5py.File(nwbfile_path, mode="r") as file:
+        peri_event_group = file[f"processing/{PERI_EVENT_MODULE_NAME}"]
+        responses_group = peri_event_group[f"{signal_name}__{event_name}"]
+        return (
+            responses_group["responses"][:],
+            responses_group["event_time"][:],
+            peri_event_group["bins/start_time"][:],
+        )
@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+from typing import Optional, Union
+
+from hdmf.backends.hdf5 import HDF5IO
+from hdmf.backends.hdf5.h5_utils import HDF5IODataChunkIteratorQueue
+from neuroconv import BaseDataInterface, NWBConverter
+from neuroconv.utils import OptionalFilePathType
+
+from .method_wrappers import wrap_method
+
+# The profiler of the conversion that is running in this process, None when profiling is disabled
+_active_profiler = None
+
+
+class TraceProfiler:
+    """Collects the spans of a conversion as events of the Chrome trace format (also read by Perfetto and speedscope)."""
+
+    def __init__(self):
+        self.trace_events = []
+        self._process_id = os.getpid()
+        self._start_time_ns = time.perf_counter_ns()
+
+    def add_span(self, name: str, category: str, start_time_ns: int, end_time_ns: int, **args):
+        self.trace_events.append(
+            dict(
+                name=name,
+                cat=category,
+                ph="X",
+                ts=(start_time_ns - self._start_time_ns) / 1000,
+                dur=(end_time_ns - start_time_ns) / 1000,
+                pid=self._process_id,
+                tid=threading.get_ident(),
+                args=args,
+            )
+        )
+
+    @contextmanager
+    def span(self, name: str, category: str, **args):
+        start_time_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add_span(name, category, start_time_ns, time.perf_counter_ns(), **args)
+
+    def save(self, trace_file_path: str):
+        with open(trace_file_path, "w") as file:
+            json.dump(dict(traceEvents=self.trace_events, displayTimeUnit="ms"), file)
+
+
+@contextmanager
+def trace_span(name: str, category: str = "conversion", **args):
+    """Records a span on the timeline of the active profiler, does nothing when profiling is disabled."""
+    if _active_profiler is None:
+        yield
+        return
+    with _active_profiler.span(name, category, **args):
+        yield
+
+
+def _traced_write_chunk(cls, dset, data) -> bool:
+    # Same as HDF5IODataChunkIteratorQueue._write_chunk, with the read from the iterator (source decode and
+    # dtype conversion) and the write to the dataset (compression and HDF5 write) recorded as separate spans
+    start_time_ns = time.perf_counter_ns()
+    try:
+        chunk_i = next(data)
+    except StopIteration:
+        return False
+    read_end_time_ns = time.perf_counter_ns()
+
+    max_bounds = chunk_i.get_min_bounds()
+    dset.id.extend(max_bounds)
+    dset[chunk_i.selection] = chunk_i.data
+    write_end_time_ns = time.perf_counter_ns()
+
+    selection = str(chunk_i.selection)
+    _active_profiler.add_span(
+        "read chunk", "read", start_time_ns, read_end_time_ns, dataset=dset.name, selection=selection
+    )
+    _active_profiler.add_span(
+        "write chunk",
+        "write",
+        read_end_time_ns,
+        write_end_time_ns,
+        dataset=dset.name,
+        selection=selection,
+        nbytes=getattr(chunk_i.data, "nbytes", None),
+    )
+    return True
+
+
+def _create_traced_method(span_name: str):
+    def create_wrapper(method):
+        @wraps(method)
+        def traced_method(*args, **kwargs):
+            with trace_span(span_name, category="interface"):
+                return method(*args, **kwargs)
+
+        return traced_method
+
+    return create_wrapper
+
+
+def _trace_data_interfaces(data_interface: Union[BaseDataInterface, NWBConverter], name: str, exit_stack: ExitStack):
+    for method_name in ["run_conversion", "add_to_nwbfile"]:
+        if hasattr(data_interface, method_name):
+            exit_stack.enter_context(
+                wrap_method(
+                    obj=data_interface,
+                    method_name=method_name,
+                    create_wrapper=_create_traced_method(span_name=f"{name}.{method_name}"),
+                )
+            )
+    for interface_name, interface in getattr(data_interface, "data_interface_objects", dict()).items():
+        _trace_data_interfaces(data_interface=interface, name=interface_name, exit_stack=exit_stack)
+
+
+@contextmanager
+def profile_conversion(
+    converter: Union[BaseDataInterface, NWBConverter],
+    trace_file_path: OptionalFilePathType = None,
+):
+    """
+    Records a timeline of the conversion and saves it in the Chrome trace format.
+
+    The timeline has a span for `run_conversion` and `add_to_nwbfile` of the converter and of each (nested) data
+    interface, for the HDF5 write of the in-memory file, and for every chunk that is read from a data chunk iterator
+    and written to its dataset. The trace can be opened with chrome://tracing, https://ui.perfetto.dev or
+    https://www.speedscope.app.
+
+    The instrumentation is only installed while the context is active and is global to the process, which is safe
+    because the sessions of a batch are converted in separate processes. When `trace_file_path` is not specified
+    nothing is instrumented.
+
+    Parameters
+    ----------
+    converter : NWBConverter or BaseDataInterface
+        The converter (or single data interface) that runs the conversion.
+    trace_file_path : FilePathType, optional
+        The file path where the trace (.json) is saved. The default is to not profile the conversion.
+    """
+    global _active_profiler
+
+    if trace_file_path is None:
+        yield None
+        return
+
+    profiler = TraceProfiler()
+    original_write_chunk = HDF5IODataChunkIteratorQueue.__dict__["_write_chunk"]
+    original_write = HDF5IO.write
+    traced_methods = ExitStack()
+    _trace_data_interfaces(data_interface=converter, name=type(converter).__name__, exit_stack=traced_methods)
+
+    @wraps(original_write)
+    def traced_write(self, *args, **kwargs):
+        with trace_span("HDF5IO.write", category="write"):
+            return original_write(self, *args, **kwargs)
+
+    _active_profiler = profiler
+    HDF5IODataChunkIteratorQueue._write_chunk = classmethod(_traced_write_chunk)
+    HDF5IO.write = traced_write
+    try:
+        yield profiler
+    finally:
+        HDF5IODataChunkIteratorQueue._write_chunk = original_write_chunk
+        HDF5IO.write = original_write
+        traced_methods.close()
+        _active_profiler = None
+        profiler.save(trace_file_path=str(trace_file_path))
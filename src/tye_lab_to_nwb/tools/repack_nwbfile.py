@@ -0,0 +1,127 @@
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+import h5py
+from neuroconv.utils import FilePathType
+from pynwb import NWBHDF5IO
+
+# 4 MiB pages amortize the latency of network file systems while keeping the padding overhead small
+DEFAULT_PAGE_SIZE = 4 * 1024 * 1024
+
+
+def repack_nwbfile(
+    nwbfile_path: FilePathType,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    repacked_nwbfile_path: Optional[FilePathType] = None,
+):
+    """
+    Rewrites an NWB file with the HDF5 paged file-space strategy.
+
+    With paged aggregation the small metadata blocks (object headers, attributes, B-tree nodes) are aggregated
+    into dedicated metadata pages instead of being scattered between the data chunks. Opening the file then
+    requires a handful of page-sized reads instead of thousands of small ones, which matters most when the file
+    is read over the network or browsed with nwbwidgets.
+
+    The file is exported object by object into a temporary file next to the original, the raw chunks are copied
+    by HDF5 without being decompressed, and the temporary file then replaces the original. The peak disk usage
+    is therefore the size of the original file plus one copy of it.
+
+    Parameters
+    ----------
+    nwbfile_path : FilePathType
+        The path to the NWB file to repack.
+    page_size : int, default: 4 MiB
+        The size of the file-space pages in bytes.
+    repacked_nwbfile_path : FilePathType, optional
+        The path to write the repacked file to. The default is to replace the original file.
+    """
+    nwbfile_path = Path(nwbfile_path)
+    assert nwbfile_path.is_file(), f"The NWB file does not exist at '{nwbfile_path}'."
+
+    output_file_path = Path(repacked_nwbfile_path) if repacked_nwbfile_path else nwbfile_path
+    temporary_file_path = output_file_path.parent / f".{output_file_path.stem}_repacking.nwb"
+
+    try:
+        destination_file = h5py.File(
+            temporary_file_path,
+            mode="w",
+            fs_strategy="page",
+            fs_persist=True,
+            fs_page_size=page_size,
+            meta_block_size=page_size,
+        )
+        with NWBHDF5IO(path=str(nwbfile_path), mode="r", load_namespaces=True) as source_io:
+            with NWBHDF5IO(path=str(temporary_file_path), mode="w", file=destination_file) as export_io:
+                export_io.export(src_io=source_io)
+        os.replace(temporary_file_path, output_file_path)
+    finally:
+        if temporary_file_path.exists():
+            temporary_file_path.unlink()
+
+
+def benchmark_read_latency(nwbfile_path: FilePathType, num_repeats: int = 5) -> dict:
+    """
+    Measures the latency of opening an NWB file and of the first read from its largest dataset.
+
+    Paged files are opened with a page buffer of eight pages, which is how they should be read by consumers.
+    Note that repeated reads of a local file are served from the operating system cache, so the numbers are only
+    representative when the file is on a network file system or the cache is dropped between runs.
+
+    Parameters
+    ----------
+    nwbfile_path : FilePathType
+        The path to the NWB file.
+    num_repeats : int, default: 5
+        The number of times to repeat the measurement, the fastest is reported.
+
+    Returns
+    -------
+    latency: dict
+        The file-space strategy and page size of the file,
+        the open latency ("open_seconds") and the first read latency ("first_read_seconds").
+    """
+    with h5py.File(nwbfile_path, mode="r") as file:
+        strategy, _, _ = file.id.get_create_plist().get_file_space_strategy()
+        page_size = file.id.get_create_plist().get_file_space_page_size()
+        is_paged = strategy == h5py.h5f.FSPACE_STRATEGY_PAGE
+
+        datasets = []
+        file.visititems(lambda name, obj: datasets.append(name) if isinstance(obj, h5py.Dataset) else None)
+        largest_dataset_name = max(datasets, key=lambda name: file[name].size, default=None)
+
+    file_kwargs = dict(page_buf_size=8 * page_size) if is_paged else dict()
+    open_seconds, first_read_seconds = [], []
+    for _ in range(num_repeats):
+        start_time = time.perf_counter()
+        file = h5py.File(nwbfile_path, mode="r", **file_kwargs)
+        with NWBHDF5IO(mode="r", file=file, load_namespaces=True) as io:
+            io.read()
+            open_seconds.append(time.perf_counter() - start_time)
+
+            start_time = time.perf_counter()
+            if largest_dataset_name is not None:
+                dataset = file[largest_dataset_name]
+                if dataset.shape:
+                    dataset[: dataset.chunks[0] if dataset.chunks else 1]
+            first_read_seconds.append(time.perf_counter() - start_time)
+
+    return dict(
+        paged=is_paged,
+        page_size=page_size if is_paged else None,
+        open_seconds=min(open_seconds),
+        first_read_seconds=min(first_read_seconds),
+    )
+
+
+if __name__ == "__main__":
+    # The path to the NWB file that will be repacked
+    nwbfile_path = Path("/Volumes/t7-ssd/Hao_NWB/nwbfiles/test.nwb")
+
+    latency_before_repack = benchmark_read_latency(nwbfile_path=nwbfile_path)
+    repack_nwbfile(nwbfile_path=nwbfile_path)
+    latency_after_repack = benchmark_read_latency(nwbfile_path=nwbfile_path)
+
+    print(f"Before repacking: {latency_before_repack}")
+    print(f"After repacking: {latency_after_repack}")
@@ -0,0 +1,110 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import h5py
+from neuroconv.utils import FilePathType, FolderPathType
+from pynwb import NWBFile, NWBHDF5IO
+from pynwb.core import NWBDataInterface
+
+# Reading the source files in large blocks keeps the hashing bound by the disk (or network) throughput
+HASH_BLOCK_SIZE = 16 * 1024 * 1024
+
+# The shared asset files that are open in this process, the datasets read from them are only valid while open
+# (see `close_shared_asset_files`)
+_shared_asset_files: Dict[Path, h5py.File] = dict()
+
+
+def get_content_hash(file_paths: List[FilePathType]) -> str:
+    """
+    Computes the SHA-256 hash of the contents of one or more files.
+
+    The hash does not depend on the file names or locations, so copies of the same asset in different
+    session folders have the same hash.
+
+    Parameters
+    ----------
+    file_paths : list of FilePathType
+        The files of the asset (e.g. the .oif file and the files in its storage folder), the order matters.
+
+    Returns
+    -------
+    content_hash : str
+        The hexadecimal digest of the contents.
+    """
+    content_hash = hashlib.sha256()
+    for file_path in file_paths:
+        with open(file_path, "rb") as file:
+            while block := file.read(HASH_BLOCK_SIZE):
+                content_hash.update(block)
+    return content_hash.hexdigest()
+
+
+def close_shared_asset_files():
+    """Closes the shared asset files opened by `get_shared_datasets`, the datasets read from them become invalid."""
+    for file in _shared_asset_files.values():
+        file.close()
+    _shared_asset_files.clear()
+
+
+def get_shared_datasets(
+    shared_assets_folder_path: FolderPathType,
+    file_paths: List[FilePathType],
+    create_container: Callable[[], NWBDataInterface],
+) -> Dict[str, h5py.Dataset]:
+    """
+    Returns the datasets of a container (e.g. the images of an Images container) that is shared by several sessions,
+    writing the data only once for each batch.
+
+    The container is written to the acquisition of a shared asset file named after the content hash of the source
+    files. The first session that needs the asset creates the container (decoding and compressing the data), the
+    later sessions only hash the source files and open the existing asset file. The returned datasets keep their
+    neurodata type and attributes, so they can be passed as the data of the containers of a session, in which case
+    they are written as HDF5 external links (with a path relative to the NWB file) instead of copies. The shared
+    asset folder must therefore be moved or shared together with the NWB files. The attributes of the linked
+    datasets (e.g. the descriptions) are the ones of the session that created the asset.
+
+    Concurrent sessions that need the same asset may both write it, the asset file is written to a temporary
+    file first and then renamed, so the asset file is never seen half written.
+
+    Parameters
+    ----------
+    shared_assets_folder_path : FolderPathType
+        The folder of the shared asset files, usually next to the NWB files of the batch.
+    file_paths : list of FilePathType
+        The source files of the asset, their contents identify the asset.
+    create_container : callable
+        The function that creates the container from the source files, only called when the asset file does not
+        exist yet.
+
+    Returns
+    -------
+    shared_datasets : dict of h5py.Dataset
+        The datasets of the container by name, opened in read mode until `close_shared_asset_files` is called.
+    """
+    shared_assets_folder_path = Path(shared_assets_folder_path)
+    shared_assets_folder_path.mkdir(parents=True, exist_ok=True)
+    asset_file_path = (shared_assets_folder_path / f"{get_content_hash(file_paths=file_paths)}.nwb").resolve()
+
+    if not asset_file_path.exists():
+        temporary_file_path = shared_assets_folder_path / f".{asset_file_path.stem}_{os.getpid()}.nwb"
+        asset_nwbfile = NWBFile(
+            session_description=f"Shared asset from {', '.join(Path(file_path).name for file_path in file_paths)}.",
+            identifier=asset_file_path.stem,
+            session_start_time=datetime.fromtimestamp(os.path.getmtime(file_paths[0]), tz=timezone.utc),
+        )
+        asset_nwbfile.add_acquisition(create_container())
+        try:
+            with NWBHDF5IO(path=str(temporary_file_path), mode="w") as io:
+                io.write(asset_nwbfile)
+            os.replace(temporary_file_path, asset_file_path)
+        finally:
+            if temporary_file_path.exists():
+                temporary_file_path.unlink()
+
+    if asset_file_path not in _shared_asset_files:
+        _shared_asset_files[asset_file_path] = h5py.File(asset_file_path, mode="r")
+    (container_group,) = _shared_asset_files[asset_file_path]["acquisition"].values()
+    return {name: dataset for name, dataset in container_group.items() if isinstance(dataset, h5py.Dataset)}
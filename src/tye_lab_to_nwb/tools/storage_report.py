@@ -0,0 +1,150 @@
+from pathlib import Path
+from typing import Dict, List, Union
+
+import h5py
+import numpy as np
+import pandas as pd
+from neuroconv.utils import FilePathType, FolderPathType
+
+
+def _get_codec(dataset: h5py.Dataset) -> str:
+    """Returns the names of the filters in the pipeline of a dataset (e.g. 'deflate+shuffle') from its metadata."""
+    dataset_creation_property_list = dataset.id.get_create_plist()
+    filter_names = []
+    for filter_index in range(dataset_creation_property_list.get_nfilters()):
+        _, _, _, filter_name = dataset_creation_property_list.get_filter(filter_index)
+        filter_names.append(filter_name.decode("utf-8", errors="replace").split(" ")[0])
+    return "+".join(filter_names) or "none"
+
+
+def _get_logical_size(dataset: h5py.Dataset) -> float:
+    # The size of variable length strings and references cannot be known without reading the data
+    if h5py.check_vlen_dtype(dataset.dtype) is not None or dataset.dtype.kind == "O":
+        return np.nan
+    return float(dataset.size * dataset.dtype.itemsize)
+
+
+def get_dataset_storage(nwbfile_path: FilePathType) -> pd.DataFrame:
+    """
+    Collects the storage information of each dataset in an NWB file from the HDF5 metadata only.
+
+    The chunks are never read, the stored size is the allocated size reported by HDF5.
+    The cached namespace specifications are not included.
+
+    Parameters
+    ----------
+    nwbfile_path : FilePathType
+        The path to the NWB file.
+
+    Returns
+    -------
+    dataset_storage : pandas.DataFrame
+        One row per dataset with the columns "nwbfile_path", "dataset", "stream_type" (the neurodata type of the
+        group that contains the dataset), "dtype", "shape", "chunk_shape", "codec", "logical_size", "stored_size"
+        and "compression_ratio" (logical size divided by stored size).
+    """
+    rows = []
+
+    def collect_dataset(name: str, obj):
+        # The cached namespaces under "specifications" are not data
+        if not isinstance(obj, h5py.Dataset) or name.startswith("specifications/"):
+            return
+        stream_type = obj.parent.attrs.get("neurodata_type", "")
+        stream_type = stream_type.decode() if isinstance(stream_type, bytes) else stream_type
+        rows.append(
+            dict(
+                nwbfile_path=str(nwbfile_path),
+                dataset=obj.name,
+                stream_type=stream_type or obj.parent.name,
+                dtype=str(obj.dtype),
+                shape=obj.shape,
+                chunk_shape=obj.chunks,
+                codec=_get_codec(dataset=obj),
+                logical_size=_get_logical_size(dataset=obj),
+                stored_size=obj.id.get_storage_size(),
+            )
+        )
+
+    with h5py.File(nwbfile_path, mode="r") as file:
+        file.visititems(collect_dataset)
+
+    dataset_storage = pd.DataFrame(rows, columns=list(rows[0]) if rows else None)
+    if rows:
+        dataset_storage["compression_ratio"] = dataset_storage["logical_size"] / dataset_storage["stored_size"].replace(
+            0, np.nan
+        )
+    return dataset_storage
+
+
+def get_storage_report(nwbfile_paths: Dict[str, List[Union[FilePathType, FolderPathType]]]) -> pd.DataFrame:
+    """
+    Collects the storage information of each dataset from the NWB files of one or more conversion pipelines.
+
+    Parameters
+    ----------
+    nwbfile_paths : dict
+        The NWB files for each pipeline (e.g. dict(ecephys=[...], ophys=[...])).
+        Folders are searched recursively for ".nwb" files.
+
+    Returns
+    -------
+    storage_report : pandas.DataFrame
+        The dataset storage (see `get_dataset_storage`) with an additional "pipeline" column.
+    """
+    dataset_storages = []
+    for pipeline, paths in nwbfile_paths.items():
+        for path in map(Path, paths):
+            pipeline_nwbfile_paths = sorted(path.rglob("*.nwb")) if path.is_dir() else [path]
+            for nwbfile_path in pipeline_nwbfile_paths:
+                dataset_storage = get_dataset_storage(nwbfile_path=nwbfile_path)
+                dataset_storage.insert(0, "pipeline", pipeline)
+                dataset_storages.append(dataset_storage)
+
+    assert dataset_storages, "There are no NWB files to report on."
+    return pd.concat(dataset_storages, ignore_index=True)
+
+
+def summarize_storage_report(storage_report: pd.DataFrame, by: Union[str, List[str]] = "pipeline") -> pd.DataFrame:
+    """
+    Rolls up the storage report by pipeline, stream type or any other column.
+
+    Parameters
+    ----------
+    storage_report : pandas.DataFrame
+        The storage report from `get_storage_report`.
+    by : str or list of str, default: "pipeline"
+        The column(s) to group by, e.g. ["pipeline", "stream_type"].
+
+    Returns
+    -------
+    summary : pandas.DataFrame
+        The number of datasets, the total logical and stored sizes, the compression ratio and the share of the
+        stored size for each group, sorted by the stored size.
+    """
+    summary = storage_report.groupby(by).agg(
+        num_datasets=("dataset", "count"),
+        logical_size=("logical_size", "sum"),
+        stored_size=("stored_size", "sum"),
+    )
+    summary["compression_ratio"] = summary["logical_size"] / summary["stored_size"].replace(0, np.nan)
+    summary["stored_size_fraction"] = summary["stored_size"] / summary["stored_size"].sum()
+    return summary.sort_values("stored_size", ascending=False)
+
+
+if __name__ == "__main__":
+    # The folders with the NWB files of each pipeline
+    nwbfile_paths = dict(
+        ecephys=["/Volumes/t7-ssd/Hao_NWB/nwbfiles/ecephys"],
+        neuropixels=["/Volumes/t7-ssd/Hao_NWB/nwbfiles/neuropixels"],
+        ophys=["/Volumes/t7-ssd/Hao_NWB/nwbfiles/ophys"],
+        photometry=["/Volumes/t7-ssd/Hao_NWB/nwbfiles/photometry"],
+        neurotensin=["/Volumes/t7-ssd/Hao_NWB/nwbfiles/neurotensin"],
+    )
+    # The file path where the report will be saved
+    report_file_path = Path("/Volumes/t7-ssd/Hao_NWB/nwbfiles/storage_report.csv")
+
+    storage_report = get_storage_report(nwbfile_paths=nwbfile_paths)
+    storage_report.to_csv(report_file_path, index=False)
+
+    print(summarize_storage_report(storage_report=storage_report, by="pipeline"))
+    print(summarize_storage_report(storage_report=storage_report, by=["pipeline", "stream_type"]))
@@ -0,0 +1,208 @@
+from contextlib import contextmanager
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+from hdmf.common import DynamicTable, VectorData
+from neuroconv import BaseDataInterface, NWBConverter
+from neuroconv.utils import FilePathType
+from pynwb import NWBFile, TimeSeries
+from pynwb.base import Images
+from pynwb.ecephys import ElectricalSeries
+from pynwb.image import GrayscaleImage, ImageSeries, RGBImage
+from pynwb.ophys import RoiResponseSeries
+
+from .chunk_taps import ChunkTap, tap_chunk_iterators
+
+SUMMARY_STATISTICS_MODULE_NAME = "summary_statistics"
+# The number of values of the blocks of a chunk that are converted to float64 at once (16 MB)
+NUM_VALUES_PER_BLOCK = 2**21
+
+
+class RunningStatisticsTap(ChunkTap):
+    """
+    Accumulates the number of samples, mean, variance, minimum and maximum of each channel (or pixel) of a series
+    from its written chunks, and adds them to the "summary_statistics" processing module.
+
+    The mean and the sum of squared deviations of each block of samples of a chunk (up to `NUM_VALUES_PER_BLOCK`
+    values) are computed in float64 and merged with the running values with the pairwise update of Chan et al.,
+    which is stable for long recordings with a large offset. The memory does not scale with the write buffers. The
+    NaN samples (e.g. the gaps of the photometry signals) are not counted.
+
+    The movies (ImageSeries, e.g. the Miniscope OnePhotonSeries) are summarized as the "<series name>_summary_images"
+    Images with the mean, maximum and standard deviation projections, in the stored pixel values. The other series
+    are summarized as the "<series name>_statistics" table with one row per channel (or ROI, or column) and the
+    mean, std, rms, min and max columns, in the unit of the series (the conversion and offset are applied).
+    """
+
+    def __init__(self, series: TimeSeries, shape: Tuple[int, ...], dtype: np.dtype):
+        super().__init__(series=series, shape=shape, dtype=dtype)
+        element_shape = shape[1:]
+        self.counts = np.zeros(element_shape, dtype=np.int64)
+        self.means = np.zeros(element_shape, dtype=np.float64)
+        self.squared_deviations = np.zeros(element_shape, dtype=np.float64)
+        self.mins = np.full(element_shape, np.nan, dtype=np.float64)
+        self.maxs = np.full(element_shape, np.nan, dtype=np.float64)
+
+    def update(self, data: np.ndarray, selection: Tuple[slice, ...]):
+        # The chunks are converted to float64 in blocks of samples, the write buffers are not copied at once
+        element_selection = tuple(selection[1:])
+        num_values_per_sample = max(int(np.prod(data.shape[1:])), 1)
+        num_samples_per_block = max(NUM_VALUES_PER_BLOCK // num_values_per_sample, 1)
+        for start in range(0, data.shape[0], num_samples_per_block):
+            self._update_block(data=data[start : start + num_samples_per_block], element_selection=element_selection)
+
+    def _update_block(self, data: np.ndarray, element_selection: Tuple[slice, ...]):
+        data = np.asarray(data, dtype=np.float64)
+        is_valid = ~np.isnan(data)
+        chunk_counts = is_valid.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            chunk_means = np.where(chunk_counts > 0, np.nansum(data, axis=0) / chunk_counts, 0.0)
+        chunk_squared_deviations = np.nansum((data - chunk_means) ** 2, axis=0)
+
+        counts = self.counts[element_selection]
+        means = self.means[element_selection]
+        total_counts = counts + chunk_counts
+        deltas = chunk_means - means
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weights = np.where(total_counts > 0, chunk_counts / total_counts, 0.0)
+        self.means[element_selection] = means + deltas * weights
+        self.squared_deviations[element_selection] += chunk_squared_deviations + deltas**2 * counts * weights
+        self.counts[element_selection] = total_counts
+        # fmin and fmax ignore the NaN, the elements without samples stay NaN
+        self.mins[element_selection] = np.fmin(self.mins[element_selection], np.fmin.reduce(data, axis=0))
+        self.maxs[element_selection] = np.fmax(self.maxs[element_selection], np.fmax.reduce(data, axis=0))
+
+    def get_statistics(self) -> dict:
+        """Returns the number of samples, mean, std (population), rms, min and max of each element (stored values)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variances = np.where(self.counts > 0, self.squared_deviations / self.counts, np.nan)
+        means = np.where(self.counts > 0, self.means, np.nan)
+        return dict(
+            num_samples=self.counts,
+            mean=means,
+            std=np.sqrt(variances),
+            rms=np.sqrt(variances + means**2),
+            min=self.mins,
+            max=self.maxs,
+        )
+
+    def _get_name(self, nwbfile: NWBFile, suffix: str) -> str:
+        name = f"{self.series.name}_{suffix}"
+        if (
+            SUMMARY_STATISTICS_MODULE_NAME in nwbfile.processing
+            and name in nwbfile.processing[SUMMARY_STATISTICS_MODULE_NAME].data_interfaces
+        ):
+            # The series of different containers can have the same name (e.g. the RoiResponseSeries of the CNMF-E)
+            name = f"{self.series.parent.name}_{name}"
+        return name
+
+    def _get_summary_images(self, nwbfile: NWBFile) -> Images:
+        statistics = self.get_statistics()
+        image_class = GrayscaleImage if len(self.shape) == 3 else RGBImage
+        images = [
+            image_class(
+                name=name,
+                data=statistics[statistic].astype(np.float32),
+                description=f"The {description} of each pixel over the frames of {self.series.name}.",
+            )
+            for name, statistic, description in [
+                ("mean", "mean", "mean"),
+                ("max", "max", "maximum"),
+                ("std", "std", "standard deviation"),
+            ]
+        ]
+        return Images(
+            name=self._get_name(nwbfile=nwbfile, suffix="summary_images"),
+            images=images,
+            description=f"The projections of {self.series.name}, in the stored pixel values.",
+        )
+
+    def _get_statistics_table(self, nwbfile: NWBFile) -> DynamicTable:
+        series = self.series
+        statistics = {name: values.reshape(-1) for name, values in self.get_statistics().items()}
+        conversion, offset = series.conversion, series.offset or 0.0
+        statistics.update(
+            mean=statistics["mean"] * conversion + offset,
+            std=statistics["std"] * abs(conversion),
+            min=np.fmin(statistics["min"] * conversion, statistics["max"] * conversion) + offset,
+            max=np.fmax(statistics["min"] * conversion, statistics["max"] * conversion) + offset,
+        )
+        # The rms of the scaled values is computed from the scaled mean and variance
+        statistics.update(rms=np.sqrt(statistics["std"] ** 2 + statistics["mean"] ** 2))
+        descriptions = dict(
+            num_samples="The number of samples (the NaN samples are not counted).",
+            mean="The mean value.",
+            std="The standard deviation.",
+            rms="The root mean square.",
+            min="The minimum value.",
+            max="The maximum value.",
+        )
+        columns = [
+            VectorData(name=name, description=description, data=statistics[name])
+            for name, description in descriptions.items()
+        ]
+        if isinstance(series, ElectricalSeries):
+            electrodes = np.asarray(series.electrodes.data[:])
+            columns.insert(0, VectorData(name="electrode", description="The index of the electrode.", data=electrodes))
+        return DynamicTable(
+            name=self._get_name(nwbfile=nwbfile, suffix="statistics"),
+            description=(
+                f"The statistics of each channel of {series.name} in {series.unit}, "
+                f"one row per channel in the order of the series."
+            ),
+            columns=columns,
+        )
+
+    def add_to_nwbfile(self, nwbfile: NWBFile):
+        if SUMMARY_STATISTICS_MODULE_NAME in nwbfile.processing:
+            summary_module = nwbfile.processing[SUMMARY_STATISTICS_MODULE_NAME]
+        else:
+            summary_module = nwbfile.create_processing_module(
+                name=SUMMARY_STATISTICS_MODULE_NAME,
+                description="The summary statistics of the acquired and processed series, computed while writing.",
+            )
+        if isinstance(self.series, ImageSeries):
+            summary_module.add(self._get_summary_images(nwbfile=nwbfile))
+        else:
+            summary_module.add(self._get_statistics_table(nwbfile=nwbfile))
+
+
+def _create_statistics_taps(series: TimeSeries, shape: Tuple[int, ...], dtype: np.dtype) -> List[ChunkTap]:
+    if not shape or not shape[0] or not np.issubdtype(dtype, np.number):
+        return []
+    if isinstance(series, ImageSeries) and len(shape) in (3, 4):
+        return [RunningStatisticsTap(series=series, shape=shape, dtype=dtype)]
+    if isinstance(series, (ElectricalSeries, RoiResponseSeries)) and len(shape) <= 2:
+        return [RunningStatisticsTap(series=series, shape=shape, dtype=dtype)]
+    return []
+
+
+@contextmanager
+def compute_summary_statistics(
+    converter: Union[BaseDataInterface, NWBConverter],
+    nwbfile_path: FilePathType,
+    summary_statistics: Optional[bool] = True,
+):
+    """
+    Computes the summary statistics of the electrical series, the ROI traces (e.g. the photometry signals and the
+    CNMF-E traces) and the movies (e.g. the Miniscope OnePhotonSeries) while they are written, and adds them to the
+    "summary_statistics" processing module when the conversion succeeds (see `RunningStatisticsTap`).
+
+    The statistics are accumulated from the chunks as they are written (see `tye_lab_to_nwb.tools.chunk_taps`), so
+    the data is not read a second time. When `summary_statistics` is False nothing is computed.
+
+    Parameters
+    ----------
+    converter : NWBConverter or BaseDataInterface
+        The converter (or single data interface) that runs the conversion.
+    nwbfile_path : FilePathType
+        The path to the NWB file of the conversion.
+    summary_statistics : bool, default: True
+        Whether to compute the summary statistics.
+    """
+    if not summary_statistics:
+        yield
+        return
+
+    with tap_chunk_iterators(converter=converter, nwbfile_path=nwbfile_path, create_taps=_create_statistics_taps):
+        yield
@@ -0,0 +1,140 @@
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from hdmf.common import ElementIdentifiers, VectorData
+from neuroconv.utils import ArrayType
+from pynwb import NWBFile
+from pynwb.epoch import TimeIntervals
+
+DEFAULT_COLUMN_DESCRIPTIONS = dict(
+    start_time="Start time of epoch, in seconds.",
+    stop_time="Stop time of epoch, in seconds.",
+)
+
+
+def _get_column_data(values: ArrayType) -> np.ndarray:
+    values = np.asarray(values)
+    # The text columns are written as variable length strings
+    if values.dtype.kind in ("U", "S", "O"):
+        return values.astype(object)
+    return values
+
+
+def build_time_intervals(
+    start_times: ArrayType,
+    stop_times: Optional[ArrayType] = None,
+    columns: Optional[Dict[str, ArrayType]] = None,
+    name: str = "trials",
+    description: str = "experimental trials",
+    column_descriptions: Optional[Dict[str, str]] = None,
+) -> TimeIntervals:
+    """
+    Builds a TimeIntervals table from the arrays of its columns at once, instead of adding the intervals row by row.
+
+    Parameters
+    ----------
+    start_times : ArrayType
+        The start time of each interval in seconds.
+    stop_times : ArrayType, optional
+        The stop time of each interval in seconds, the default is the start time of the next interval
+        (NaN for the last interval).
+    columns : dict, optional
+        The values of the additional columns (e.g. the labels of the intervals) by the name of the column,
+        each with one value per interval.
+    name : str, default: "trials"
+        The name of the TimeIntervals table.
+    description : str, default: "experimental trials"
+        The description of the TimeIntervals table.
+    column_descriptions : dict, optional
+        The descriptions of the columns by their names, the default is the name of the column.
+    """
+    start_times = np.asarray(start_times, dtype=float)
+    if stop_times is None:
+        stop_times = np.r_[start_times[1:], np.nan]
+    stop_times = np.asarray(stop_times, dtype=float)
+    assert stop_times.shape == start_times.shape, "The number of stop times must match the number of start times."
+
+    column_descriptions = dict(DEFAULT_COLUMN_DESCRIPTIONS, **(column_descriptions or dict()))
+    column_values = dict(start_time=start_times, stop_time=stop_times, **(columns or dict()))
+    vector_data = []
+    for column_name, values in column_values.items():
+        values = _get_column_data(values)
+        assert len(values) == len(start_times), f"The column '{column_name}' must have one value per interval."
+        vector_data.append(
+            VectorData(
+                name=column_name,
+                description=column_descriptions.get(column_name, column_name),
+                data=values,
+            )
+        )
+
+    return TimeIntervals(
+        name=name,
+        description=description,
+        id=ElementIdentifiers(name="id", data=np.arange(len(start_times))),
+        columns=vector_data,
+    )
+
+
+def build_time_intervals_from_dataframe(
+    dataframe: pd.DataFrame,
+    table_name: str = "trials",
+    table_description: str = "experimental trials",
+    column_name_mapping: Optional[Dict[str, str]] = None,
+    column_descriptions: Optional[Dict[str, str]] = None,
+) -> TimeIntervals:
+    """
+    Builds a TimeIntervals table from the columns of a dataframe (see `build_time_intervals`), the columnar
+    equivalent of `neuroconv.tools.text.convert_df_to_time_intervals`.
+
+    Parameters
+    ----------
+    dataframe : pandas.DataFrame
+        The dataframe with the "start_time" column (after renaming), and optionally the "stop_time" column.
+    table_name : str, default: "trials"
+        The name of the TimeIntervals table.
+    table_description : str, default: "experimental trials"
+        The description of the TimeIntervals table.
+    column_name_mapping : dict, optional
+        If passed, rename subset of columns from key to value.
+    column_descriptions : dict, optional
+        The descriptions of the columns (after renaming), the default is the name of the column.
+    """
+    if column_name_mapping is not None:
+        dataframe = dataframe.rename(columns=column_name_mapping)
+    if "start_time" not in dataframe:
+        raise ValueError(
+            f"The dataframe must contain a column named 'start_time'. Existing columns: {dataframe.columns.to_list()}"
+        )
+
+    return build_time_intervals(
+        start_times=dataframe["start_time"].to_numpy(),
+        stop_times=dataframe["stop_time"].to_numpy() if "stop_time" in dataframe else None,
+        columns={
+            column_name: dataframe[column_name].to_numpy()
+            for column_name in dataframe.columns
+            if column_name not in ("start_time", "stop_time")
+        },
+        name=table_name,
+        description=table_description,
+        column_descriptions=column_descriptions,
+    )
+
+
+def add_time_intervals(nwbfile: NWBFile, time_intervals: TimeIntervals):
+    """
+    Adds a TimeIntervals table to the NWB file, the table named "trials" is added as the trials of the file.
+
+    Parameters
+    ----------
+    nwbfile : NWBFile
+        The in-memory NWB file.
+    time_intervals : TimeIntervals
+        The table (see `build_time_intervals`).
+    """
+    if time_intervals.name == "trials":
+        assert nwbfile.trials is None, "The NWB file already has trials."
+        nwbfile.trials = time_intervals
+    else:
+        nwbfile.add_time_intervals(time_intervals)
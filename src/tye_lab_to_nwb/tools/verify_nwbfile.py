@@ -0,0 +1,327 @@
+import hashlib
+import inspect
+import math
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import h5py
+import numpy as np
+from neuroconv import BaseDataInterface, NWBConverter
+from neuroconv.datainterfaces.ecephys.baserecordingextractorinterface import BaseRecordingExtractorInterface
+from neuroconv.datainterfaces.ecephys.basesortingextractorinterface import BaseSortingExtractorInterface
+from neuroconv.datainterfaces.ophys.baseimagingextractorinterface import BaseImagingExtractorInterface
+from neuroconv.utils import FilePathType
+from roiextractors import ImagingExtractor
+from spikeinterface import BaseRecording, BaseSorting
+
+# The number of bytes to compare at once for datasets that are stored contiguously (without chunks)
+CONTIGUOUS_BLOCK_SIZE = 1024 * 1024
+
+
+def _hash_array(array: np.ndarray) -> str:
+    return hashlib.sha1(np.ascontiguousarray(array).tobytes()).hexdigest()
+
+
+def _format_selection(selection: Tuple[slice, ...]) -> str:
+    return "[" + ", ".join(f"{axis_slice.start}:{axis_slice.stop}" for axis_slice in selection) + "]"
+
+
+def iter_sampled_chunk_selections(
+    shape: Tuple[int, ...],
+    chunk_shape: Optional[Tuple[int, ...]],
+    sample_fraction: float,
+    seed: int = 0,
+) -> Iterator[Tuple[int, Tuple[slice, ...]]]:
+    """
+    Yields the index and the selection of randomly sampled chunks of a dataset in ascending order.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        The shape of the dataset.
+    chunk_shape : tuple of int, optional
+        The chunk shape of the dataset, when the dataset is contiguous it is split into blocks along the first axis.
+    sample_fraction : float
+        The fraction of chunks to sample, at least one chunk is always sampled.
+    seed : int, default: 0
+        The seed of the random number generator.
+    """
+    if chunk_shape is None:
+        row_size = int(np.prod(shape[1:], dtype=np.int64)) or 1
+        chunk_shape = (max(1, CONTIGUOUS_BLOCK_SIZE // row_size), *shape[1:])
+
+    num_chunks_per_axis = [
+        math.ceil(axis_length / chunk_length) for axis_length, chunk_length in zip(shape, chunk_shape)
+    ]
+    num_chunks = int(np.prod(num_chunks_per_axis, dtype=np.int64))
+    if num_chunks == 0:
+        return
+
+    num_sampled_chunks = min(num_chunks, max(1, math.ceil(sample_fraction * num_chunks)))
+    random_number_generator = np.random.default_rng(seed)
+    sampled_chunk_indices = np.sort(random_number_generator.choice(num_chunks, size=num_sampled_chunks, replace=False))
+    for chunk_index in sampled_chunk_indices:
+        chunk_position = np.unravel_index(chunk_index, num_chunks_per_axis)
+        selection = tuple(
+            slice(position * chunk_length, min((position + 1) * chunk_length, axis_length))
+            for position, chunk_length, axis_length in zip(chunk_position, chunk_shape, shape)
+        )
+        yield int(chunk_index), selection
+
+
+def verify_dataset(
+    dataset: h5py.Dataset,
+    read_source: Callable[[Tuple[slice, ...]], np.ndarray],
+    sample_fraction: float = 0.01,
+    seed: int = 0,
+):
+    """
+    Compares the hashes of randomly sampled chunks of a written dataset against the same selection from the source.
+
+    Parameters
+    ----------
+    dataset : h5py.Dataset
+        The dataset that was written to the NWB file.
+    read_source : callable
+        Returns the source data for a selection (a tuple of slices) in the layout of the written dataset.
+    sample_fraction : float, default: 0.01
+        The fraction of chunks to compare.
+    seed : int, default: 0
+        The seed of the random number generator.
+
+    Raises
+    ------
+    ValueError
+        When the hash of a sampled chunk differs from the hash of the source.
+    """
+    for chunk_index, selection in iter_sampled_chunk_selections(
+        shape=dataset.shape, chunk_shape=dataset.chunks, sample_fraction=sample_fraction, seed=seed
+    ):
+        written_data = dataset[selection]
+        source_data = np.asarray(read_source(selection)).astype(dataset.dtype, copy=False)
+        if source_data.shape != written_data.shape or _hash_array(source_data) != _hash_array(written_data):
+            raise ValueError(
+                f"The data written to '{dataset.file.filename}:{dataset.name}' does not match the source "
+                f"at chunk {chunk_index} (selection {_format_selection(selection)})."
+            )
+
+
+def verify_array(
+    dataset: h5py.Dataset,
+    array: np.ndarray,
+    sample_fraction: float = 0.01,
+    seed: int = 0,
+):
+    """Compares randomly sampled chunks of a written dataset against an in-memory source array."""
+    assert dataset.shape == array.shape, (
+        f"The shape of '{dataset.file.filename}:{dataset.name}' {dataset.shape} "
+        f"does not match the shape of the source {array.shape}."
+    )
+    verify_dataset(
+        dataset=dataset, read_source=lambda selection: array[selection], sample_fraction=sample_fraction, seed=seed
+    )
+
+
+def verify_imaging_extractor(
+    dataset: h5py.Dataset,
+    imaging_extractor: ImagingExtractor,
+    sample_fraction: float = 0.01,
+    seed: int = 0,
+):
+    """Compares randomly sampled chunks of a written photon series against the frames from `get_video`."""
+
+    def read_source(selection: Tuple[slice, ...]) -> np.ndarray:
+        video = imaging_extractor.get_video(start_frame=selection[0].start, end_frame=selection[0].stop)
+        # The frames are written as (frames, width, height) to the NWB file
+        return video.transpose((0, 2, 1) if video.ndim == 3 else (0, 2, 1, 3))[(slice(None),) + selection[1:]]
+
+    verify_dataset(dataset=dataset, read_source=read_source, sample_fraction=sample_fraction, seed=seed)
+
+
+def verify_recording_extractor(
+    dataset: h5py.Dataset,
+    recording_extractor: BaseRecording,
+    sample_fraction: float = 0.01,
+    seed: int = 0,
+):
+    """Compares randomly sampled chunks of a written electrical series against the unscaled `get_traces`."""
+    channel_ids = recording_extractor.get_channel_ids()
+
+    def read_source(selection: Tuple[slice, ...]) -> np.ndarray:
+        return recording_extractor.get_traces(
+            channel_ids=channel_ids[selection[1]],
+            start_frame=selection[0].start,
+            end_frame=selection[0].stop,
+            return_scaled=False,
+        )
+
+    verify_dataset(dataset=dataset, read_source=read_source, sample_fraction=sample_fraction, seed=seed)
+
+
+def verify_sorting_extractor(
+    units_group: h5py.Group,
+    sorting_extractor: BaseSorting,
+    sample_fraction: float = 0.01,
+    seed: int = 0,
+):
+    """
+    Compares the spike times of randomly sampled units in a written units table against the source spike trains.
+
+    The units are matched by the 'unit_name' column of the units table, which is the 'unit_name' property of the
+    sorting extractor when it has one (e.g. the unit names of the `AStSortingExtractor`), otherwise the unit id.
+    When the file was written with `stub_test` only the first spikes of each unit were written, so only that many
+    spikes are compared.
+    """
+    spike_times = units_group["spike_times"]
+    spike_times_index = units_group["spike_times_index"][:]
+    unit_names = units_group["unit_name"][:].astype(str) if "unit_name" in units_group else None
+    unit_ids = sorting_extractor.get_unit_ids()
+    if "unit_name" in sorting_extractor.get_property_keys():
+        source_unit_names = sorting_extractor.get_property("unit_name").astype(str)
+    else:
+        source_unit_names = [str(unit_id) for unit_id in unit_ids]
+    unit_ids_by_name = dict(zip(source_unit_names, unit_ids))
+
+    num_units = len(spike_times_index)
+    num_sampled_units = min(num_units, max(1, math.ceil(sample_fraction * num_units)))
+    random_number_generator = np.random.default_rng(seed)
+    for row_index in np.sort(random_number_generator.choice(num_units, size=num_sampled_units, replace=False)):
+        if unit_names is None:
+            unit_id = unit_ids[row_index]
+        elif unit_names[row_index] in unit_ids_by_name:
+            unit_id = unit_ids_by_name[unit_names[row_index]]
+        else:
+            raise ValueError(
+                f"The unit '{unit_names[row_index]}' written to '{units_group.file.filename}:{units_group.name}' "
+                f"(row {row_index}) is not a unit of the source."
+            )
+        start = spike_times_index[row_index - 1] if row_index > 0 else 0
+        written_spike_times = spike_times[start : spike_times_index[row_index]]
+        source_spike_times = np.concatenate(
+            [
+                sorting_extractor.get_unit_spike_train(unit_id=unit_id, segment_index=segment_index, return_times=True)
+                for segment_index in range(sorting_extractor.get_num_segments())
+            ]
+        )[: len(written_spike_times)].astype(spike_times.dtype)
+        if _hash_array(source_spike_times) != _hash_array(written_spike_times):
+            raise ValueError(
+                f"The spike times written to '{units_group.file.filename}:{spike_times.name}' do not match the source "
+                f"for unit '{unit_id}' (row {row_index}, selection [{start}:{spike_times_index[row_index]}])."
+            )
+
+
+def get_neurodata_object(nwbfile: h5py.File, name: str) -> h5py.Group:
+    """Returns the group of the neurodata object with this name from the acquisition or from a processing module."""
+    if name in nwbfile["acquisition"]:
+        return nwbfile["acquisition"][name]
+    for processing_module in nwbfile.get("processing", dict()).values():
+        if name in processing_module:
+            return processing_module[name]
+    raise KeyError(f"The neurodata object '{name}' is not in '{nwbfile.filename}'.")
+
+
+def get_nested_conversion_options(converter: NWBConverter, conversion_options: dict) -> Dict[str, dict]:
+    """
+    Returns the conversion options of each data interface of a nested converter.
+
+    The options of an NWBConverter are already by interface name. A converter that is used as a single interface
+    (e.g. the ConcurrentMiniscopeConverter) receives flat options and forwards them to its interfaces, each interface
+    is given the options that its add_to_nwbfile accepts.
+    """
+    data_interfaces = converter.data_interface_objects
+    if all(option_name in data_interfaces for option_name in conversion_options):
+        return {interface_name: conversion_options.get(interface_name, dict()) for interface_name in data_interfaces}
+
+    nested_conversion_options = dict()
+    for interface_name, data_interface in data_interfaces.items():
+        parameter_names = inspect.signature(data_interface.add_to_nwbfile).parameters
+        nested_conversion_options[interface_name] = {
+            option_name: option for option_name, option in conversion_options.items() if option_name in parameter_names
+        }
+    return nested_conversion_options
+
+
+def verify_nwbfile(
+    nwbfile_path: FilePathType,
+    data_interfaces: Dict[str, BaseDataInterface],
+    metadata: dict,
+    conversion_options: Optional[dict] = None,
+    sample_fraction: float = 0.01,
+    seed: int = 0,
+):
+    """
+    Verifies the data written by each interface against its source by comparing hashes of randomly sampled chunks.
+
+    Recording, sorting and imaging interfaces are verified from their extractors. Any other interface is verified
+    when it implements a `verify_written_data(nwbfile, metadata, sample_fraction, seed)` method. The photon series
+    that reference external videos are not verified, they have no frames in the file.
+
+    Parameters
+    ----------
+    nwbfile_path : FilePathType
+        The path to the NWB file that was written.
+    data_interfaces : dict
+        The data interfaces (or converters) that wrote to the file, e.g. `converter.data_interface_objects`.
+    metadata : dict
+        The metadata that was used for the conversion.
+    conversion_options : dict, optional
+        The conversion options that were used for the conversion.
+    sample_fraction : float, default: 0.01
+        The fraction of chunks (or units) to compare for each dataset.
+    seed : int, default: 0
+        The seed of the random number generator.
+
+    Raises
+    ------
+    ValueError
+        When a sampled chunk does not match the source, the message points to the dataset and the chunk.
+    """
+    conversion_options = conversion_options or dict()
+    with h5py.File(nwbfile_path, mode="r") as nwbfile:
+        for interface_name, data_interface in data_interfaces.items():
+            interface_conversion_options = conversion_options.get(interface_name, dict())
+            verification_kwargs = dict(sample_fraction=sample_fraction, seed=seed)
+
+            if hasattr(data_interface, "data_interface_objects"):
+                verify_nwbfile(
+                    nwbfile_path=nwbfile_path,
+                    data_interfaces=data_interface.data_interface_objects,
+                    metadata=metadata,
+                    conversion_options=get_nested_conversion_options(
+                        converter=data_interface, conversion_options=interface_conversion_options
+                    ),
+                    **verification_kwargs,
+                )
+            elif isinstance(data_interface, BaseRecordingExtractorInterface):
+                electrical_series_name = metadata["Ecephys"][data_interface.es_key]["name"]
+                electrical_series = get_neurodata_object(nwbfile=nwbfile, name=electrical_series_name)
+                verify_recording_extractor(
+                    dataset=electrical_series["data"],
+                    recording_extractor=data_interface.recording_extractor,
+                    **verification_kwargs,
+                )
+            elif isinstance(data_interface, BaseSortingExtractorInterface):
+                if interface_conversion_options.get("write_as", "units") == "units":
+                    units_group = nwbfile["units"]
+                else:
+                    units_name = interface_conversion_options.get("units_name", "units")
+                    units_group = nwbfile["processing"]["ecephys"][units_name]
+                verify_sorting_extractor(
+                    units_group=units_group,
+                    sorting_extractor=data_interface.sorting_extractor,
+                    **verification_kwargs,
+                )
+            elif isinstance(data_interface, BaseImagingExtractorInterface):
+                photon_series_type = "OnePhotonSeries" if "OnePhotonSeries" in metadata["Ophys"] else "TwoPhotonSeries"
+                photon_series_index = interface_conversion_options.get("photon_series_index", 0)
+                photon_series_name = metadata["Ophys"][photon_series_type][photon_series_index]["name"]
+                photon_series = get_neurodata_object(nwbfile=nwbfile, name=photon_series_name)
+                if "external_file" in photon_series:
+                    # The frames are in the referenced videos, their number is verified when the series is written
+                    continue
+                verify_imaging_extractor(
+                    dataset=photon_series["data"],
+                    imaging_extractor=data_interface.imaging_extractor,
+                    **verification_kwargs,
+                )
+            elif hasattr(data_interface, "verify_written_data"):
+                data_interface.verify_written_data(nwbfile=nwbfile, metadata=metadata, **verification_kwargs)
@@ -0,0 +1,251 @@
+"""Long-running watcher that converts the sessions of each pipeline as soon as their files are complete."""
+
+import importlib
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from warnings import warn
+
+from neuroconv.utils import FolderPathType
+
+from tye_lab_to_nwb.tools.parallel_execute import parallel_execute
+
+
+def find_ast_ecephys_sessions(data_root: FolderPathType) -> List[Tuple[str, dict, List[Path]]]:
+    """Finds the legacy OpenEphys folders (with "*_CH<n>.continuous" files)."""
+    sessions = []
+    for folder_path in sorted({file_path.parent for file_path in Path(data_root).rglob("*_CH*.continuous")}):
+        session_kwargs = dict(ecephys_recording_folder_path=str(folder_path))
+        sessions.append((folder_path.name, session_kwargs, sorted(folder_path.glob("*.continuous"))))
+    return sessions
+
+
+def find_ast_neuropixels_sessions(data_root: FolderPathType) -> List[Tuple[str, dict, List[Path]]]:
+    """Finds the SpikeGLX "*.ap.bin" files that have their "*.lf.bin" (and .meta) files next to them."""
+    sessions = []
+    for ap_bin_file_path in sorted(Path(data_root).rglob("*.ap.bin")):
+        lf_bin_file_path = ap_bin_file_path.with_name(ap_bin_file_path.name.replace(".ap.bin", ".lf.bin"))
+        source_paths = [
+            ap_bin_file_path,
+            ap_bin_file_path.with_suffix(".meta"),
+            lf_bin_file_path,
+            lf_bin_file_path.with_suffix(".meta"),
+        ]
+        if not all(source_path.is_file() for source_path in source_paths):
+            continue
+        # The Phy output is optional, it is expected next to the recording
+        phy_folder_path = ap_bin_file_path.parent if (ap_bin_file_path.parent / "params.py").is_file() else None
+        session_kwargs = dict(
+            neuropixels_file_path=str(ap_bin_file_path),
+            phy_sorting_folder_path=str(phy_folder_path) if phy_folder_path else None,
+            histology_image_file_path=None,
+        )
+        sessions.append((ap_bin_file_path.name.split(".")[0], session_kwargs, source_paths))
+    return sessions
+
+
+def find_ast_ophys_sessions(data_root: FolderPathType) -> List[Tuple[str, dict, List[Path]]]:
+    """
+    Finds the processed Miniscope movies ("<session>_msCamAll_ffd.avi") that have their timestamps
+    ("<session>_timestampsAllCumulData.mat") next to them, with the motion corrected movie when it is available.
+    """
+    sessions = []
+    for avi_file_path in sorted(Path(data_root).rglob("*_msCamAll_ffd.avi")):
+        session_name = avi_file_path.name.replace("_msCamAll_ffd.avi", "")
+        timestamps_mat_file_path = avi_file_path.with_name(f"{session_name}_timestampsAllCumulData.mat")
+        if not timestamps_mat_file_path.is_file():
+            continue
+        source_paths = [avi_file_path, timestamps_mat_file_path]
+        session_kwargs = dict(
+            processed_miniscope_avi_file_path=str(avi_file_path),
+            timestamps_mat_file_path=str(timestamps_mat_file_path),
+        )
+        motion_corrected_mat_file_path = avi_file_path.with_name(f"{session_name}_msCamComb_MC.mat")
+        if motion_corrected_mat_file_path.is_file():
+            source_paths.append(motion_corrected_mat_file_path)
+            session_kwargs.update(motion_corrected_mat_file_path=str(motion_corrected_mat_file_path))
+        sessions.append((session_name, session_kwargs, source_paths))
+    return sessions
+
+
+def find_fiber_photometry_sessions(data_root: FolderPathType) -> List[Tuple[str, dict, List[Path]]]:
+    """Finds the photometry CSV files (with the "Timestamp" and "Flags" columns)."""
+    sessions = []
+    for csv_file_path in sorted(Path(data_root).rglob("*.csv")):
+        with open(csv_file_path, "r") as file:
+            columns = file.readline().strip().split(",")
+        if not {"Timestamp", "Flags"}.issubset(columns):
+            continue
+        session_kwargs = dict(data_file_path=str(csv_file_path))
+        sessions.append((csv_file_path.stem, session_kwargs, [csv_file_path]))
+    return sessions
+
+
+# The module of the session_to_nwb function and the function that finds the sessions of each pipeline
+WATCHED_PIPELINES: Dict[str, Tuple[str, Callable]] = dict(
+    ast_ecephys=("tye_lab_to_nwb.ast_ecephys.convert_session", find_ast_ecephys_sessions),
+    ast_neuropixels=("tye_lab_to_nwb.ast_neuropixels.convert_session", find_ast_neuropixels_sessions),
+    ast_ophys=("tye_lab_to_nwb.ast_ophys.convert_session", find_ast_ophys_sessions),
+    fiber_photometry=("tye_lab_to_nwb.fiber_photometry.convert_session", find_fiber_photometry_sessions),
+)
+
+# The pipelines whose acquisition software does not write the start time of the session, it must be provided
+SESSION_START_TIME_PIPELINES = ("ast_ophys", "fiber_photometry")
+
+
+def _get_signature(source_paths: List[Path]) -> Optional[tuple]:
+    try:
+        return tuple((source_path.stat().st_size, source_path.stat().st_mtime_ns) for source_path in source_paths)
+    except FileNotFoundError:
+        return None
+
+
+def watch_folders(
+    data_roots: Dict[str, List[FolderPathType]],
+    nwbfile_folder_path: FolderPathType,
+    num_parallel_jobs: Optional[int] = 1,
+    settle_time: float = 60.0,
+    poll_interval: float = 30.0,
+    session_kwargs: Optional[Dict[str, dict]] = None,
+    session_start_times: Optional[Dict[str, str]] = None,
+    max_polls: Optional[int] = None,
+    verbose: bool = False,
+):
+    """
+    Watches the data roots of each pipeline and converts the sessions as soon as their files stopped changing.
+
+    A session is recognized by the files that the pipeline expects (see the `find_<pipeline>_sessions` functions)
+    and is converted once the size and modification time of all of its files did not change for `settle_time`
+    seconds. The complete sessions found by a poll are converted with `parallel_execute`. The NWB files are written
+    to "<nwbfile_folder_path>/<pipeline>/<session name>.nwb", a session is not converted again when its NWB file
+    (or its error log) exists, so the watcher can be restarted at any time. A session whose conversion failed before
+    its error log was written is not converted again until the watcher is restarted.
+
+    The start time of the ast_ophys and fiber_photometry sessions is not written by the acquisition software, it is
+    taken from `session_start_times` (or from the "session_start_time" of the `session_kwargs` of the pipeline).
+    The sessions without a start time are skipped with a warning.
+
+    Parameters
+    ----------
+    data_roots : dict
+        The folders to watch for each pipeline (the keys of `WATCHED_PIPELINES`), e.g.
+        dict(ast_neuropixels=["/Volumes/t7-ssd/Raw_NPX"], fiber_photometry=["/Volumes/t7-ssd/photometry"]).
+    nwbfile_folder_path : FolderPathType
+        The folder where the NWB files are written.
+    num_parallel_jobs : int, optional
+        The number of sessions that are converted in parallel. The default is to convert one session at a time.
+        When not specified (num_parallel_jobs=None) it is set to use all available CPUs.
+    settle_time : float, default: 60.0
+        The number of seconds the files of a session must stay unchanged before the session is converted.
+    poll_interval : float, default: 30.0
+        The number of seconds between the polls of the data roots.
+    session_kwargs : dict, optional
+        Additional keyword arguments for the session_to_nwb function of each pipeline,
+        e.g. dict(fiber_photometry=dict(subject_metadata=dict(sex="U"), repack=True)).
+    session_start_times : dict, optional
+        The start time of the sessions by session name in YYYY-MM-DDTHH:MM:SS format,
+        e.g. dict(Photometry_data0="2023-08-21T15:30:00").
+    max_polls : int, optional
+        The number of polls after which the watcher stops, the default is to watch until interrupted.
+    verbose : bool, default: False
+        Whether to report the number of sessions of each pipeline that are converted after each poll.
+    """
+    nwbfile_folder_path = Path(nwbfile_folder_path)
+    session_kwargs = session_kwargs or dict()
+    session_start_times = session_start_times or dict()
+    unknown_pipelines = set(data_roots) - set(WATCHED_PIPELINES)
+    assert not unknown_pipelines, f"The pipelines {unknown_pipelines} are not one of {list(WATCHED_PIPELINES)}."
+
+    # The signature of the files of each pending session and the time it was first seen
+    pending_sessions = dict()
+    # The sessions that are not converted until the watcher is restarted (e.g. their conversion failed)
+    skipped_sessions = set()
+    num_polls = 0
+    while max_polls is None or num_polls < max_polls:
+        num_polls += 1
+        complete_sessions = {pipeline: [] for pipeline in data_roots}
+        for pipeline, pipeline_data_roots in data_roots.items():
+            _, find_sessions = WATCHED_PIPELINES[pipeline]
+            for data_root in pipeline_data_roots:
+                for session_name, pipeline_session_kwargs, source_paths in find_sessions(data_root=data_root):
+                    nwbfile_path = nwbfile_folder_path / pipeline / f"{session_name}.nwb"
+                    error_log_file_path = nwbfile_path.parent / f"{nwbfile_path.stem}_error_log.txt"
+                    if nwbfile_path in skipped_sessions or nwbfile_path.exists() or error_log_file_path.exists():
+                        continue
+
+                    session_start_time = session_start_times.get(
+                        session_name, session_kwargs.get(pipeline, dict()).get("session_start_time")
+                    )
+                    if pipeline in SESSION_START_TIME_PIPELINES and session_start_time is None:
+                        warn(
+                            f"The start time of the {pipeline} session '{session_name}' is not specified, the session "
+                            "is skipped. Use the 'session_start_times' argument to provide it."
+                        )
+                        skipped_sessions.add(nwbfile_path)
+                        continue
+
+                    signature = _get_signature(source_paths=source_paths)
+                    if signature is None or pending_sessions.get(nwbfile_path, (None,))[0] != signature:
+                        # The files are new or still changing
+                        pending_sessions[nwbfile_path] = (signature, time.monotonic())
+                        continue
+                    if time.monotonic() - pending_sessions[nwbfile_path][1] < settle_time:
+                        continue
+
+                    del pending_sessions[nwbfile_path]
+                    nwbfile_path.parent.mkdir(parents=True, exist_ok=True)
+                    kwargs = dict(
+                        nwbfile_path=str(nwbfile_path),
+                        **pipeline_session_kwargs,
+                        **session_kwargs.get(pipeline, dict()),
+                    )
+                    if session_start_time is not None:
+                        kwargs.update(session_start_time=session_start_time)
+                    complete_sessions[pipeline].append(kwargs)
+
+        for pipeline, kwargs_list in complete_sessions.items():
+            if not kwargs_list:
+                continue
+            module_name, _ = WATCHED_PIPELINES[pipeline]
+            if verbose:
+                print(f"Converting {len(kwargs_list)} {pipeline} session(s).")
+            try:
+                parallel_execute(
+                    session_to_nwb_function=importlib.import_module(module_name).session_to_nwb,
+                    kwargs_list=kwargs_list,
+                    num_parallel_jobs=num_parallel_jobs,
+                )
+            except Exception as e:
+                # The session_to_nwb functions write their own error logs, the watcher keeps running
+                warn(f"There was an error during the conversion of the {pipeline} sessions: {e}")
+
+            # The sessions that failed before writing their error log would otherwise be converted on every poll
+            for kwargs in kwargs_list:
+                nwbfile_path = Path(kwargs["nwbfile_path"])
+                error_log_file_path = nwbfile_path.parent / f"{nwbfile_path.stem}_error_log.txt"
+                if not nwbfile_path.exists() and not error_log_file_path.exists():
+                    warn(f"The conversion of {nwbfile_path} failed, the session is skipped until the watcher restarts.")
+                    skipped_sessions.add(nwbfile_path)
+
+        if max_polls is None or num_polls < max_polls:
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    # The folders that are watched for new sessions of each pipeline
+    data_roots = dict(
+        ast_neuropixels=["/Volumes/t7-ssd/Raw_NPX"],
+        ast_ophys=["/Volumes/t7-ssd/Miniscope"],
+        fiber_photometry=["/Volumes/t7-ssd/Hao_NWB/recording"],
+    )
+    # The folder where the NWB files will be created
+    nwbfile_folder_path = Path("/Volumes/t7-ssd/Hao_NWB/nwbfiles/watched")
+
+    watch_folders(
+        data_roots=data_roots,
+        nwbfile_folder_path=nwbfile_folder_path,
+        num_parallel_jobs=3,  # defines the number of sessions that will be converted in parallel.
+        session_kwargs=dict(fiber_photometry=dict(subject_metadata=dict(sex="U"))),
+        # The start time of the ast_ophys and fiber_photometry sessions has to be provided manually
+        session_start_times=dict(Photometry_data0="2023-08-21T15:30:00"),
+    )
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from tye_lab_to_nwb.ast_ecephys.ast_sortingextractor import AStSortingSegment
+
+
+@pytest.fixture
+def sorting_segment():
+    rng = np.random.default_rng(0)
+    spike_times = np.empty(4, dtype=object)
+    spike_times[0] = rng.uniform(0, 10, size=50)
+    spike_times[1] = np.array([])
+    spike_times[2] = np.sort(rng.uniform(0, 10, size=30))
+    spike_times[3] = 4.2
+    return AStSortingSegment(sampling_frequency=1000.0, spike_times=spike_times)
+
+
+@pytest.mark.parametrize("start_frame, end_frame", [(None, None), (2000, None), (None, 7000), (2000, 7000), (0, 0)])
+def test_spike_trains_match_the_spike_train_of_each_unit(sorting_segment, start_frame, end_frame):
+    spike_frames, unit_offsets = sorting_segment.get_unit_spike_trains(start_frame=start_frame, end_frame=end_frame)
+
+    assert len(unit_offsets) == 5 and unit_offsets[-1] == len(spike_frames)
+    for unit_id in range(4):
+        np.testing.assert_array_equal(
+            spike_frames[unit_offsets[unit_id] : unit_offsets[unit_id + 1]],
+            sorting_segment.get_unit_spike_train(unit_id=unit_id, start_frame=start_frame, end_frame=end_frame),
+        )
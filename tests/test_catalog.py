@@ -0,0 +1,64 @@
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from pynwb import NWBHDF5IO, NWBFile, TimeSeries
+from pynwb.file import Subject
+
+from tye_lab_to_nwb.tools.catalog import index_nwbfiles, query_catalog, update_catalog
+
+
+def write_nwbfile(nwbfile_path, num_trials: int):
+    nwbfile = NWBFile(
+        session_description="session",
+        identifier=nwbfile_path.stem,
+        session_start_time=datetime(2023, 8, 21, 15, 30, tzinfo=timezone.utc),
+        session_id=nwbfile_path.stem,
+        subject=Subject(subject_id="H28", species="Mus musculus", sex="U"),
+    )
+    nwbfile.add_acquisition(TimeSeries(name="signal", data=np.zeros((100, 2)), unit="V", rate=10.0))
+    for trial_index in range(num_trials):
+        nwbfile.add_trial(start_time=float(trial_index), stop_time=trial_index + 0.5)
+    with NWBHDF5IO(str(nwbfile_path), mode="w") as io:
+        io.write(nwbfile)
+
+
+@pytest.fixture
+def source_file_path(tmp_path):
+    source_file_path = tmp_path / "source.csv"
+    source_file_path.write_text("Timestamp,Flags\n")
+    return source_file_path
+
+
+def test_sessions_are_replaced_when_they_are_indexed_again(tmp_path, source_file_path):
+    catalog_file_path = tmp_path / "catalog.sqlite"
+    nwbfile_path = tmp_path / "nwbfiles" / "session.nwb"
+    nwbfile_path.parent.mkdir()
+    source_data = dict(FiberPhotometry=dict(file_path=str(source_file_path)))
+
+    write_nwbfile(nwbfile_path=nwbfile_path, num_trials=2)
+    update_catalog(catalog_file_path=catalog_file_path, nwbfile_path=nwbfile_path, source_data=source_data)
+    # The file is converted again, then the folder is indexed (without the source data)
+    write_nwbfile(nwbfile_path=nwbfile_path, num_trials=3)
+    update_catalog(catalog_file_path=catalog_file_path, nwbfile_path=nwbfile_path, source_data=source_data)
+    index_nwbfiles(catalog_file_path=catalog_file_path, nwbfile_folder_path=nwbfile_path.parent)
+
+    (session,) = query_catalog(catalog_file_path=catalog_file_path)
+    assert session["num_trials"] == 3 and session["subject_id"] == "H28"
+    # The fingerprints recorded at the conversion are kept
+    assert list(json.loads(session["source_fingerprints"])) == [str(source_file_path)]
+    assert [(stream["name"], stream["sampling_rate"]) for stream in session["streams"]] == [
+        ("/acquisition/signal", 10.0)
+    ]
+
+
+def test_query_by_criteria(tmp_path):
+    catalog_file_path = tmp_path / "catalog.sqlite"
+    for session_name, num_trials in [("with_trials", 4), ("without_trials", 0)]:
+        write_nwbfile(nwbfile_path=tmp_path / f"{session_name}.nwb", num_trials=num_trials)
+    index_nwbfiles(catalog_file_path=catalog_file_path, nwbfile_folder_path=tmp_path)
+
+    sessions = query_catalog(catalog_file_path=catalog_file_path, min_num_trials=1, neurodata_types=["TimeSeries"])
+    assert [session["session_id"] for session in sessions] == ["with_trials"]
+    assert query_catalog(catalog_file_path=catalog_file_path, subject_id="other") == []
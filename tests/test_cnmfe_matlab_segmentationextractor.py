@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+
+import numpy as np
+from pynwb import NWBHDF5IO, NWBFile
+from scipy.io import loadmat
+from scipy.sparse import csc_matrix
+
+from tye_lab_to_nwb.ast_ophys.extractors.cnmfe_matlab_segmentationextractor import SparseTraces
+from tye_lab_to_nwb.ast_ophys.interfaces import CnmfeMatlabSegmentationSegmentationInterface
+from tye_lab_to_nwb.benchmarks.synthetic_data import generate_cnmfe_neuron_mat
+
+
+def test_sparse_traces_array_interface():
+    random_number_generator = np.random.default_rng(0)
+    dense_traces = random_number_generator.uniform(size=(50, 4)) * (random_number_generator.uniform(size=(50, 4)) < 0.2)
+    traces = SparseTraces(csc_matrix(dense_traces))
+
+    assert traces.shape == (50, 4)
+    assert traces.size == 200
+    assert traces.ndim == 2
+    np.testing.assert_array_equal(np.asarray(traces), dense_traces)
+    np.testing.assert_array_equal(traces[3:9, 1:3], dense_traces[3:9, 1:3])
+    np.testing.assert_array_equal(traces[5], dense_traces[5])
+
+
+def test_write_sparse_deconvolved_traces(tmp_path):
+    # The deconvolved traces ("S") of the pre-v7.3 files are sparse matrices
+    file_path = generate_cnmfe_neuron_mat(
+        file_path=tmp_path / "neuron.mat", num_rois=5, num_frames=200, height=30, width=40
+    )
+    interface = CnmfeMatlabSegmentationSegmentationInterface(file_path=str(file_path), verbose=False)
+    assert isinstance(interface.segmentation_extractor.get_traces_dict()["deconvolved"], SparseTraces)
+
+    nwbfile = NWBFile(
+        session_description="CNMF-E segmentation",
+        identifier="cnmfe",
+        session_start_time=datetime(2023, 1, 1, tzinfo=timezone.utc),
+    )
+    interface.add_to_nwbfile(nwbfile=nwbfile, metadata=interface.get_metadata(), stub_test=False)
+    nwbfile_path = tmp_path / "cnmfe.nwb"
+    with NWBHDF5IO(path=str(nwbfile_path), mode="w") as io:
+        io.write(nwbfile)
+
+    expected_deconvolved_traces = loadmat(file_path)["S"].toarray().T
+    with NWBHDF5IO(path=str(nwbfile_path), mode="r") as io:
+        fluorescence = io.read().processing["ophys"]["Fluorescence"]
+        np.testing.assert_allclose(fluorescence["Deconvolved"].data[:], expected_deconvolved_traces)
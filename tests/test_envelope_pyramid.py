@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from tye_lab_to_nwb.tools.envelope_pyramid import LEVEL_DECIMATION, EnvelopePyramidTap
+
+
+def get_expected_envelope(data: np.ndarray, decimation: int) -> np.ndarray:
+    bin_starts = np.arange(0, len(data), decimation)
+    return np.stack(
+        [np.minimum.reduceat(data, bin_starts, axis=0), np.maximum.reduceat(data, bin_starts, axis=0)], axis=-1
+    )
+
+
+@pytest.mark.parametrize("dtype", [np.int16, np.float32])
+def test_envelope_from_partial_chunks(dtype):
+    random_number_generator = np.random.default_rng(0)
+    data = random_number_generator.integers(-1000, 1000, size=(1003, 5)).astype(dtype)
+    tap = EnvelopePyramidTap(series=None, shape=data.shape, dtype=data.dtype, decimation=16)
+
+    # The chunks start and stop in the middle of the bins, cover part of the channels and arrive out of order
+    chunk_selections = [
+        (slice(start_sample, min(start_sample + 100, 1003)), slice(start_channel, min(start_channel + 3, 5)))
+        for start_sample in range(0, 1003, 100)
+        for start_channel in range(0, 5, 3)
+    ]
+    for selection in reversed(chunk_selections):
+        tap.update(data=data[selection], selection=selection)
+
+    levels = tap.get_levels(min_num_bins=2)
+    assert list(levels) == [16, 16 * LEVEL_DECIMATION, 16 * LEVEL_DECIMATION**2]
+    # The last bin of each level is partial
+    for decimation, envelope in levels.items():
+        assert len(envelope) == -(-1003 // decimation)
+        np.testing.assert_array_equal(envelope, get_expected_envelope(data=data, decimation=decimation))
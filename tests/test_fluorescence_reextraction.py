@@ -0,0 +1,28 @@
+import numpy as np
+from scipy.sparse import csc_matrix
+
+from tye_lab_to_nwb.ast_ophys.tools import fluorescence_reextraction
+from tye_lab_to_nwb.ast_ophys.tools.fluorescence_reextraction import FluorescenceReextractionTap
+
+
+def test_reextracted_fluorescence_is_weighted_mean_of_footprints(monkeypatch):
+    monkeypatch.setattr(fluorescence_reextraction, "NUM_FRAMES_PER_BLOCK", 3)
+    random_number_generator = np.random.default_rng(0)
+    height, width, num_frames, num_rois = 6, 8, 20, 3
+    footprints = random_number_generator.uniform(size=(height * width, num_rois))
+    footprints[footprints < 0.7] = 0
+    # The movie is written with shape (frames, width, height)
+    movie = random_number_generator.integers(0, 256, size=(num_frames, width, height), dtype=np.uint8)
+
+    tap = FluorescenceReextractionTap(
+        series=None, shape=movie.shape, dtype=movie.dtype, footprints=csc_matrix(footprints), image_size=(height, width)
+    )
+    # The chunks cover part of the frames
+    for frame_selection in [slice(0, 10), slice(10, 20)]:
+        for width_selection in [slice(0, 5), slice(5, 8)]:
+            selection = (frame_selection, width_selection, slice(0, height))
+            tap.update(data=movie[selection], selection=selection)
+
+    frames = movie.transpose(0, 2, 1).reshape(num_frames, -1).astype(np.float64)
+    expected_traces = frames @ footprints / footprints.sum(axis=0)
+    np.testing.assert_allclose(tap.get_traces(), expected_traces, rtol=1e-5)
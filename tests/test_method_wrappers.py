@@ -0,0 +1,40 @@
+from tye_lab_to_nwb.tools.method_wrappers import wrap_add_to_nwbfile, wrap_method
+
+
+class Interface:
+    def __init__(self):
+        self.calls = []
+
+    def add_to_nwbfile(self, nwbfile, metadata=None):
+        self.calls.append("add_to_nwbfile")
+
+
+def test_nested_wrappers_are_restored_in_reverse_order():
+    interface = Interface()
+
+    def create_wrapper(method):
+        def wrapper(*args, **kwargs):
+            interface.calls.append("outer")
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    with wrap_method(obj=interface, method_name="add_to_nwbfile", create_wrapper=create_wrapper):
+        outer_wrapper = interface.add_to_nwbfile
+        with wrap_add_to_nwbfile(converter=interface, after=lambda nwbfile: interface.calls.append(nwbfile)):
+            interface.add_to_nwbfile("nwbfile", metadata=dict())
+        # The inner stage restores the wrapper of the outer stage
+        assert interface.add_to_nwbfile is outer_wrapper
+    # The outer stage restores the method of the class
+    assert "add_to_nwbfile" not in vars(interface)
+    assert interface.calls == ["outer", "add_to_nwbfile", "nwbfile"]
+
+
+def test_wrapper_is_removed_when_the_conversion_fails():
+    interface = Interface()
+    try:
+        with wrap_add_to_nwbfile(converter=interface, after=lambda nwbfile: None):
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert "add_to_nwbfile" not in vars(interface)
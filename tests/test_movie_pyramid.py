@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from tye_lab_to_nwb.ast_ophys.tools import MoviePyramidTap
+from tye_lab_to_nwb.ast_ophys.tools.movie_pyramid import _get_bin_counts
+
+
+def get_expected_level(movie: np.ndarray, factor: int) -> np.ndarray:
+    level_shape = [-(-length // factor) for length in movie.shape]
+    level = np.zeros(level_shape, dtype=np.float64)
+    for frame_bin, row_bin, column_bin in np.ndindex(*level_shape):
+        values = movie[
+            frame_bin * factor : (frame_bin + 1) * factor,
+            row_bin * factor : (row_bin + 1) * factor,
+            column_bin * factor : (column_bin + 1) * factor,
+        ]
+        if np.issubdtype(movie.dtype, np.integer):
+            level[frame_bin, row_bin, column_bin] = (values.astype(np.int64).sum() + values.size // 2) // values.size
+        else:
+            level[frame_bin, row_bin, column_bin] = values.mean()
+    return level.astype(movie.dtype)
+
+
+def test_bin_counts():
+    np.testing.assert_array_equal(_get_bin_counts(length=10, factor=4), [4, 4, 2])
+    np.testing.assert_array_equal(_get_bin_counts(length=8, factor=4), [4, 4])
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.float32])
+def test_levels_from_partial_chunks(tmp_path, dtype):
+    random_number_generator = np.random.default_rng(0)
+    movie = random_number_generator.integers(0, 256, size=(37, 21, 30)).astype(dtype)
+    tap = MoviePyramidTap(series=None, shape=movie.shape, dtype=movie.dtype, temporary_folder_path=tmp_path)
+
+    # The chunks start and stop in the middle of the bins and cover part of the rows
+    chunk_selections = [
+        (slice(start_frame, min(start_frame + 7, 37)), slice(start_row, min(start_row + 9, 21)), slice(0, 30))
+        for start_frame in range(0, 37, 7)
+        for start_row in range(0, 21, 9)
+    ]
+    for selection in reversed(chunk_selections):
+        tap.update(data=movie[selection], selection=selection)
+
+    for factor in (2, 4, 8):
+        # All of the bins are complete, so they are written to the temporary file
+        assert not tap.pending_sums[factor]
+        np.testing.assert_array_equal(tap.get_level(factor=factor), get_expected_level(movie=movie, factor=factor))
+    tap.close()
+    assert not tap.temporary_file_path.exists()
+
+
+def test_in_order_chunks_keep_one_pending_bin(tmp_path):
+    movie = np.random.default_rng(1).integers(0, 256, size=(40, 8, 8), dtype=np.uint8)
+    tap = MoviePyramidTap(series=None, shape=movie.shape, dtype=movie.dtype, temporary_folder_path=tmp_path)
+    for start_frame in range(0, 40, 5):
+        selection = (slice(start_frame, start_frame + 5), slice(0, 8), slice(0, 8))
+        tap.update(data=movie[selection], selection=selection)
+        assert all(len(pending_sums) <= 1 for pending_sums in tap.pending_sums.values())
+    np.testing.assert_array_equal(tap.get_level(factor=8), get_expected_level(movie=movie, factor=8))
+    tap.close()
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from roiextractors import NumpyImagingExtractor
+
+from tye_lab_to_nwb.ast_ophys.tools import ParallelVideoDataChunkIterator
+
+
+@pytest.fixture
+def imaging_extractor():
+    video = np.random.default_rng(0).integers(0, 256, size=(50, 6, 8), dtype=np.uint8)
+    # The video of the numpy extractor has a channel axis
+    return NumpyImagingExtractor(timeseries=video[..., np.newaxis], sampling_frequency=10.0)
+
+
+def test_buffers_match_the_video(imaging_extractor):
+    iterator = ParallelVideoDataChunkIterator(
+        imaging_extractor=imaging_extractor, num_threads=3, buffer_shape=(20, 8, 6), chunk_shape=(10, 8, 6)
+    )
+    data = np.zeros(iterator.maxshape, dtype=iterator.dtype)
+    for data_chunk in iterator:
+        data[data_chunk.selection] = data_chunk.data
+
+    np.testing.assert_array_equal(data, imaging_extractor.get_video().transpose(0, 2, 1))
+    # The threads are stopped once the last buffer is read
+    assert iterator._executor is None
+
+
+def test_buffers_must_cover_whole_frames(imaging_extractor):
+    with pytest.raises(AssertionError):
+        ParallelVideoDataChunkIterator(
+            imaging_extractor=imaging_extractor, buffer_shape=(20, 4, 6), chunk_shape=(10, 4, 6)
+        )
+
+
+def test_early_stop_cancels_the_prefetched_buffer(imaging_extractor):
+    iterator = ParallelVideoDataChunkIterator(
+        imaging_extractor=imaging_extractor, buffer_shape=(10, 8, 6), chunk_shape=(10, 8, 6)
+    )
+    next(iterator)
+    assert iterator._next_buffer is not None
+    executor = iterator._executor
+    iterator._shutdown_executor()
+    assert iterator._next_buffer is None and iterator._executor is None
+    assert executor._shutdown
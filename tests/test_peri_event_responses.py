@@ -0,0 +1,29 @@
+import numpy as np
+
+from tye_lab_to_nwb.tools.peri_event_responses import get_bin_edges, get_binned_means, get_binned_spike_counts
+
+
+def test_binned_means_ignore_the_nan_samples():
+    timestamps = np.arange(100) / 10.0
+    data = np.stack([np.arange(100, dtype=float), np.ones(100)], axis=1)
+    # The gap of the second trace covers a whole bin
+    data[40:45, 1] = np.nan
+    data[42, 0] = np.nan
+    bin_edges = get_bin_edges(event_times=np.array([4.5, 9.5]), window=(-0.5, 1.0), bin_size=0.5)
+
+    means = get_binned_means(data=data, timestamps=timestamps, bin_edges=bin_edges)
+
+    assert means.shape == (2, 2, 3) and means.dtype == np.float32
+    np.testing.assert_allclose(means[0, 0], [np.mean([40, 41, 43, 44]), 47.0, 52.0])
+    np.testing.assert_array_equal(means[0, 1], [np.nan, 1.0, 1.0])
+    # The bins after the last sample have no samples
+    np.testing.assert_array_equal(means[1, 0], [92.0, 97.0, np.nan])
+
+
+def test_binned_spike_counts():
+    spike_trains = [np.array([0.1, 0.2, 1.1, 2.5]), np.array([])]
+    bin_edges = get_bin_edges(event_times=np.array([1.0]), window=(-1.0, 1.0), bin_size=1.0)
+
+    spike_counts = get_binned_spike_counts(spike_trains=spike_trains, bin_edges=bin_edges)
+
+    np.testing.assert_array_equal(spike_counts, [[[2, 1], [0, 0]]])
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from tye_lab_to_nwb.tools import summary_statistics
+from tye_lab_to_nwb.tools.summary_statistics import RunningStatisticsTap
+
+
+@pytest.mark.parametrize("num_values_per_block", [7, 2**21])
+def test_running_statistics_match_numpy(monkeypatch, num_values_per_block):
+    monkeypatch.setattr(summary_statistics, "NUM_VALUES_PER_BLOCK", num_values_per_block)
+    random_number_generator = np.random.default_rng(0)
+    # A large offset checks the stability of the merge
+    data = 1e6 + random_number_generator.normal(size=(1000, 4))
+    data[random_number_generator.uniform(size=data.shape) < 0.1] = np.nan
+
+    tap = RunningStatisticsTap(series=None, shape=data.shape, dtype=data.dtype)
+    # The chunks cover part of the channels and arrive out of order
+    for start, stop in [(500, 1000), (0, 230), (230, 500)]:
+        for channel_selection in [slice(0, 3), slice(3, 4)]:
+            selection = (slice(start, stop), channel_selection)
+            tap.update(data=data[selection], selection=selection)
+
+    statistics = tap.get_statistics()
+    np.testing.assert_array_equal(statistics["num_samples"], (~np.isnan(data)).sum(axis=0))
+    np.testing.assert_allclose(statistics["mean"], np.nanmean(data, axis=0), rtol=1e-12)
+    np.testing.assert_allclose(statistics["std"], np.nanstd(data, axis=0), rtol=1e-8)
+    np.testing.assert_array_equal(statistics["min"], np.nanmin(data, axis=0))
+    np.testing.assert_array_equal(statistics["max"], np.nanmax(data, axis=0))
+
+
+def test_running_statistics_of_integer_movie():
+    random_number_generator = np.random.default_rng(1)
+    movie = random_number_generator.integers(0, 256, size=(20, 6, 5), dtype=np.uint8)
+
+    tap = RunningStatisticsTap(series=None, shape=movie.shape, dtype=movie.dtype)
+    for start in range(0, 20, 8):
+        selection = (slice(start, start + 8), slice(0, 6), slice(0, 5))
+        tap.update(data=movie[selection], selection=selection)
+
+    statistics = tap.get_statistics()
+    np.testing.assert_allclose(statistics["mean"], movie.mean(axis=0))
+    np.testing.assert_allclose(statistics["std"], movie.std(axis=0))
+    np.testing.assert_array_equal(statistics["max"], movie.max(axis=0))
+
+
+def test_elements_without_samples_are_nan():
+    tap = RunningStatisticsTap(series=None, shape=(10, 2), dtype=np.float64)
+    data = np.full((10, 1), np.nan)
+    tap.update(data=data, selection=(slice(0, 10), slice(0, 1)))
+
+    statistics = tap.get_statistics()
+    assert statistics["num_samples"].tolist() == [0, 0]
+    assert np.isnan(statistics["mean"]).all() and np.isnan(statistics["min"]).all()
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+from pynwb import NWBHDF5IO, NWBFile
+
+from tye_lab_to_nwb.tools.time_intervals import (
+    add_time_intervals,
+    build_time_intervals,
+    build_time_intervals_from_dataframe,
+)
+
+
+def test_time_intervals_match_the_intervals_added_by_rows(tmp_path):
+    start_times, stop_times, labels = [0.5, 2.0, 4.5], [1.5, 3.0, 6.0], ["reward", "shock", "reward"]
+    time_intervals = build_time_intervals(
+        start_times=start_times,
+        stop_times=stop_times,
+        columns=dict(label=labels),
+        column_descriptions=dict(label="The type of the trial."),
+    )
+    nwbfile = NWBFile(session_description="", identifier="", session_start_time=datetime.now(timezone.utc))
+    nwbfile_by_rows = NWBFile(session_description="", identifier="", session_start_time=datetime.now(timezone.utc))
+    nwbfile_by_rows.add_trial_column(name="label", description="The type of the trial.")
+    for start_time, stop_time, label in zip(start_times, stop_times, labels):
+        nwbfile_by_rows.add_trial(start_time=start_time, stop_time=stop_time, label=label)
+
+    pd.testing.assert_frame_equal(time_intervals.to_dataframe(), nwbfile_by_rows.trials.to_dataframe())
+    assert time_intervals["label"].description == "The type of the trial."
+
+    # The table is written and read back as the trials of the file
+    add_time_intervals(nwbfile=nwbfile, time_intervals=time_intervals)
+    with NWBHDF5IO(tmp_path / "trials.nwb", mode="w") as io:
+        io.write(nwbfile)
+    with NWBHDF5IO(tmp_path / "trials.nwb", mode="r") as io:
+        trials = io.read().trials.to_dataframe()
+    assert trials["label"].tolist() == labels
+    np.testing.assert_array_equal(trials["stop_time"], stop_times)
+
+
+def test_stop_times_default_to_the_next_start_time():
+    time_intervals = build_time_intervals(start_times=[1.0, 2.0, 3.5], name="events", description="events")
+    np.testing.assert_array_equal(time_intervals["stop_time"].data, [2.0, 3.5, np.nan])
+
+
+def test_dataframe_columns_are_renamed():
+    dataframe = pd.DataFrame(dict(onset=[0.0, 1.0], offset=[0.5, 1.5], tone=[1, 2]))
+    time_intervals = build_time_intervals_from_dataframe(
+        dataframe=dataframe, column_name_mapping=dict(onset="start_time", offset="stop_time")
+    )
+    assert time_intervals.colnames == ("start_time", "stop_time", "tone")
+    np.testing.assert_array_equal(time_intervals["stop_time"].data, [0.5, 1.5])
+
+    with pytest.raises(ValueError, match="start_time"):
+        build_time_intervals_from_dataframe(dataframe=dataframe)
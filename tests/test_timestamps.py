@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+
+from tye_lab_to_nwb.ast_ophys.tools.timestamps import MiniscopeSessionTimestamps, get_session_timestamps
+from tye_lab_to_nwb.benchmarks.synthetic_data import generate_timestamps_mat
+
+
+def test_kept_frames_and_trial_boundaries():
+    # The columns are the cumulative time, the frame in the trial, the trial, the time in the trial, the frame in the
+    # session and the kept time (NaN for the deleted frames), the rows of the second trial come first
+    frame_numbers = np.arange(1, 9)
+    trial_numbers = np.array([2, 2, 2, 2, 1, 1, 1, 1])
+    kept_times = np.array([np.nan, 10.0, 20.0, 30.0, np.nan, np.nan, 10.0, 20.0])
+    timestamps_arr = np.column_stack([np.zeros(8), np.zeros(8), trial_numbers, np.zeros(8), frame_numbers, kept_times])
+
+    session_timestamps = MiniscopeSessionTimestamps(timestamps_arr=timestamps_arr)
+
+    np.testing.assert_array_equal(session_timestamps.kept_frame_indices, [1, 2, 3, 6, 7])
+    np.testing.assert_array_equal(session_timestamps.get_timestamps(sampling_frequency=2.0), [0.5, 1.0, 1.5, 3.0, 3.5])
+    # The trials are in the order of their numbers
+    np.testing.assert_array_equal(session_timestamps.get_trial_times(sampling_frequency=2.0), [[3.0, 3.5], [0.5, 1.5]])
+
+
+def test_session_without_kept_frames():
+    timestamps_arr = np.column_stack(
+        [np.zeros(3), np.zeros(3), np.ones(3), np.zeros(3), np.arange(1, 4), np.full(3, np.nan)]
+    )
+
+    session_timestamps = MiniscopeSessionTimestamps(timestamps_arr=timestamps_arr)
+
+    assert session_timestamps.get_timestamps(sampling_frequency=15.0).shape == (0,)
+    assert session_timestamps.get_trial_times(sampling_frequency=15.0).shape == (0, 2)
+
+
+def test_timestamps_file_is_parsed_once_until_it_changes(tmp_path):
+    file_path = generate_timestamps_mat(tmp_path / "timestamps.mat", num_trials=3, frames_per_trial=10)
+
+    session_timestamps = get_session_timestamps(file_path=file_path)
+    assert get_session_timestamps(file_path=str(file_path)) is session_timestamps
+    assert len(session_timestamps.get_timestamps(sampling_frequency=15.0)) == 3 * (10 - 3)
+    assert not session_timestamps.get_timestamps(sampling_frequency=15.0).flags.writeable
+
+    generate_timestamps_mat(file_path, num_trials=4, frames_per_trial=10)
+    # The modification time is changed explicitly, the file can be rewritten within the resolution of the clock
+    os.utime(file_path, ns=(0, os.stat(file_path).st_mtime_ns + 10**9))
+    modified_session_timestamps = get_session_timestamps(file_path=file_path)
+    assert modified_session_timestamps is not session_timestamps
+    assert len(modified_session_timestamps.trial_frame_indices) == 4
@@ -0,0 +1,30 @@
+from tye_lab_to_nwb.tools.verify_nwbfile import get_nested_conversion_options
+
+
+class ImagingInterface:
+    def add_to_nwbfile(self, nwbfile, metadata, stub_test=False, photon_series_index=0, external_file=False):
+        pass
+
+
+class BehaviorInterface:
+    def add_to_nwbfile(self, nwbfile, metadata):
+        pass
+
+
+class Converter:
+    def __init__(self):
+        self.data_interface_objects = dict(Imaging=ImagingInterface(), Behavior=BehaviorInterface())
+
+
+def test_flat_options_are_given_to_the_interfaces_that_accept_them():
+    conversion_options = get_nested_conversion_options(
+        converter=Converter(), conversion_options=dict(stub_test=True, external_file=True, num_decoding_threads=4)
+    )
+    assert conversion_options == dict(Imaging=dict(stub_test=True, external_file=True), Behavior=dict())
+
+
+def test_options_by_interface_name_are_kept():
+    conversion_options = get_nested_conversion_options(
+        converter=Converter(), conversion_options=dict(Imaging=dict(photon_series_index=1))
+    )
+    assert conversion_options == dict(Imaging=dict(photon_series_index=1), Behavior=dict())
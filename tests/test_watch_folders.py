@@ -0,0 +1,56 @@
+import sys
+
+import pytest
+
+from tye_lab_to_nwb.tools.watch_folders import watch_folders
+
+
+@pytest.fixture
+def photometry_folder_path(tmp_path):
+    folder_path = tmp_path / "recording"
+    folder_path.mkdir()
+    (folder_path / "Photometry_data0.csv").write_text("FrameCounter,Timestamp,Flags\n0,0.0,17\n")
+    return folder_path
+
+
+@pytest.fixture
+def conversions(monkeypatch):
+    conversions = []
+
+    def failing_parallel_execute(session_to_nwb_function, kwargs_list, num_parallel_jobs):
+        # The session fails before it writes its error log (e.g. a missing argument)
+        conversions.extend(kwargs_list)
+        raise TypeError("session_to_nwb() got an unexpected keyword argument")
+
+    # The package exports the watch_folders function under the name of its module
+    watch_folders_module = sys.modules["tye_lab_to_nwb.tools.watch_folders"]
+    monkeypatch.setattr(watch_folders_module, "parallel_execute", failing_parallel_execute)
+    return conversions
+
+
+def test_session_without_start_time_is_skipped(tmp_path, photometry_folder_path, conversions):
+    with pytest.warns(UserWarning, match="start time") as records:
+        watch_folders(
+            data_roots=dict(fiber_photometry=[photometry_folder_path]),
+            nwbfile_folder_path=tmp_path / "nwbfiles",
+            settle_time=0.0,
+            poll_interval=0.0,
+            max_polls=3,
+        )
+    assert conversions == []
+    # The warning is not repeated on every poll
+    assert len(records) == 1
+
+
+def test_failed_session_is_not_retried(tmp_path, photometry_folder_path, conversions):
+    with pytest.warns(UserWarning, match="failed"):
+        watch_folders(
+            data_roots=dict(fiber_photometry=[photometry_folder_path]),
+            nwbfile_folder_path=tmp_path / "nwbfiles",
+            settle_time=0.0,
+            poll_interval=0.0,
+            session_start_times=dict(Photometry_data0="2023-08-21T15:30:00"),
+            max_polls=5,
+        )
+    assert len(conversions) == 1
+    assert conversions[0]["session_start_time"] == "2023-08-21T15:30:00"